@@ -0,0 +1,733 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import itertools
+import time
+from dataclasses import dataclass, field, replace
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .batch_pricing import PriceBatch
+from .config import MonitorConfig, PoolConfig, TokenConfig, load_config
+from .fixed_point import FixedPrice
+from .inventory import TokenInventory
+from .metadata_store import ChainMetadata, MetadataStore
+from .strategy import StrategyEngine
+from .v2_sizing import DEFAULT_FEE_BPS, get_amount_out, size_sell
+
+try:  # pragma: no cover - optional dependency
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None  # type: ignore
+
+BACKTEST_ENGINES = ("vectorized", "reference")
+
+# Raw pool values are stored as three little-endian uint64 limbs, enough for
+# uint112 reserves and uint160 sqrt prices.
+_LIMBS = 3
+_LIMB_MASK = (1 << 64) - 1
+
+_V2_TYPES = {"uniswap_v2", "univ2", "sushiswap"}
+
+
+@dataclass
+class PoolSeries:
+    """Historical state of one pool, one row per block in block order.
+
+    ``first`` and ``second`` are ``(rows, 3)`` uint64 limb arrays holding
+    ``reserve0``/``reserve1`` for V2 pools and ``sqrtPriceX96``/0 for V3.
+    """
+
+    pool: str
+    blocks: Any
+    timestamps: Any
+    first: Any
+    second: Any
+
+    def __len__(self) -> int:
+        return len(self.blocks)
+
+    @classmethod
+    def from_rows(cls, pool: str, rows: Iterable[Tuple[int, int, int, int]]) -> "PoolSeries":
+        """Build from ``(block, timestamp, first, second)`` rows in log order.
+
+        Several rows in one block (e.g. one ``Sync`` per swap) collapse to the
+        last one, the state the block ends with.
+        """
+        _require_numpy()
+        by_block: Dict[int, Tuple[int, int, int]] = {}
+        for block, timestamp, first, second in rows:
+            by_block[int(block)] = (int(timestamp), int(first), int(second))
+        blocks = sorted(by_block)
+        return cls(
+            pool=pool.lower(),
+            blocks=np.array(blocks, dtype=np.int64),
+            timestamps=np.array([by_block[block][0] for block in blocks], dtype=np.int64),
+            first=_to_limbs([by_block[block][1] for block in blocks]),
+            second=_to_limbs([by_block[block][2] for block in blocks]),
+        )
+
+    def value(self, column: Any, index: int) -> int:
+        limbs = column[index]
+        return int(limbs[0]) | int(limbs[1]) << 64 | int(limbs[2]) << 128
+
+
+Archive = Dict[str, PoolSeries]
+
+
+def load_archive(path: Path) -> Archive:
+    """Read a price archive written by :func:`save_archive` (``.npz``) or a CSV export.
+
+    CSV rows need ``pool``, ``block`` and ``timestamp`` plus either
+    ``reserve0``/``reserve1`` (V2 ``Sync`` events or sampled
+    ``getReserves``) or ``sqrt_price_x96`` (V3 ``Swap`` events or sampled
+    ``slot0``). An optional ``log_index`` column orders events within a block.
+    """
+    _require_numpy()
+    path = Path(path)
+    if path.suffix == ".npz":
+        with np.load(path) as data:
+            pools = sorted({name.rsplit(".", 1)[0] for name in data.files})
+            return {
+                pool: PoolSeries(
+                    pool=pool,
+                    blocks=data[f"{pool}.blocks"],
+                    timestamps=data[f"{pool}.timestamps"],
+                    first=data[f"{pool}.first"],
+                    second=data[f"{pool}.second"],
+                )
+                for pool in pools
+            }
+
+    rows: Dict[str, List[Tuple[int, int, int, int, int]]] = {}
+    with path.open(newline="") as handle:
+        for record in csv.DictReader(handle):
+            sqrt_price = record.get("sqrt_price_x96") or ""
+            if sqrt_price:
+                first, second = int(sqrt_price), 0
+            else:
+                first, second = int(record.get("reserve0") or 0), int(record.get("reserve1") or 0)
+            rows.setdefault(record["pool"].lower(), []).append(
+                (int(record["block"]), int(record.get("log_index") or 0), int(record["timestamp"]), first, second)
+            )
+    archive: Archive = {}
+    for pool, entries in rows.items():
+        entries.sort(key=lambda entry: (entry[0], entry[1]))
+        archive[pool] = PoolSeries.from_rows(
+            pool, ((block, timestamp, first, second) for block, _, timestamp, first, second in entries)
+        )
+    return archive
+
+
+def save_archive(archive: Archive, path: Path) -> None:
+    """Store an archive as ``.npz`` so later runs skip CSV parsing."""
+    _require_numpy()
+    arrays: Dict[str, Any] = {}
+    for pool, series in archive.items():
+        arrays[f"{pool}.blocks"] = series.blocks
+        arrays[f"{pool}.timestamps"] = series.timestamps
+        arrays[f"{pool}.first"] = series.first
+        arrays[f"{pool}.second"] = series.second
+    np.savez(path, **arrays)
+
+
+@dataclass
+class SimulatedSell:
+    """One simulated vault sell.
+
+    ``amount_out`` is in raw quote units; ``missed_upside`` is what the sold
+    amount would have fetched at the highest later spot price in the same
+    pool, minus ``amount_out`` (0 when the price never went higher).
+    """
+
+    token: str
+    pool: str
+    quote_token: str
+    block: int
+    timestamp: int
+    price: FixedPrice
+    change_bps: int
+    amount_in: int
+    amount_out: int
+    missed_upside: int
+
+
+@dataclass
+class BacktestReport:
+    sells: List[SimulatedSell]
+    initial_balances: Dict[str, int]
+    final_balances: Dict[str, int]
+
+    def proceeds(self) -> Dict[Tuple[str, str], int]:
+        """Realized raw quote units per ``(token, quote_token)``."""
+        totals: Dict[Tuple[str, str], int] = {}
+        for sell in self.sells:
+            key = (sell.token, sell.quote_token)
+            totals[key] = totals.get(key, 0) + sell.amount_out
+        return totals
+
+    def missed_upside(self) -> Dict[Tuple[str, str], int]:
+        totals: Dict[Tuple[str, str], int] = {}
+        for sell in self.sells:
+            key = (sell.token, sell.quote_token)
+            totals[key] = totals.get(key, 0) + sell.missed_upside
+        return totals
+
+
+@dataclass
+class _PoolContext:
+    """One configured pool with its archive series and resolved pricing inputs."""
+
+    token: TokenConfig
+    pool: PoolConfig
+    pool_index: int
+    series: PoolSeries
+    is_v2: bool
+    base_is_token0: bool
+    base_decimals: int
+    quote_decimals: int
+    _prices: Any = field(default=None, repr=False)
+    _valid: Any = field(default=None, repr=False)
+
+    def prices(self) -> Tuple[Any, Any]:
+        """Float64 spot prices for every row (0 where invalid) and the validity mask."""
+        if self._prices is None:
+            first = _limbs_to_float(self.series.first)
+            with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+                if self.is_v2:
+                    second = _limbs_to_float(self.series.second)
+                    valid = _nonzero(self.series.first) & _nonzero(self.series.second)
+                    base, quote = (first, second) if self.base_is_token0 else (second, first)
+                    prices = quote / base
+                else:
+                    valid = _nonzero(self.series.first)
+                    root = first / float(1 << 96)
+                    prices = root * root if self.base_is_token0 else 1.0 / (root * root)
+                prices = prices * 10.0 ** (self.base_decimals - self.quote_decimals)
+            prices[~valid] = 0.0
+            self._prices, self._valid = prices, valid
+        return self._prices, self._valid
+
+    def exact_price(self, index: int) -> FixedPrice:
+        """The price :class:`PriceBatch` produces for row ``index``."""
+        first = self.series.value(self.series.first, index)
+        if self.is_v2:
+            second = self.series.value(self.series.second, index)
+            base, quote = (first, second) if self.base_is_token0 else (second, first)
+            if base == 0:
+                return FixedPrice(0, 1)
+            return FixedPrice.from_raw(quote, base, self.base_decimals, self.quote_decimals)
+        if first == 0:
+            return FixedPrice(0, 1)
+        return FixedPrice.from_sqrt_price_x96(
+            first, self.base_decimals, self.quote_decimals, base_is_token0=self.base_is_token0
+        )
+
+    def add_to_batch(self, batch: PriceBatch, key: Any, index: int, baseline: Optional[FixedPrice]) -> None:
+        first = self.series.value(self.series.first, index)
+        if self.is_v2:
+            second = self.series.value(self.series.second, index)
+            base, quote = (first, second) if self.base_is_token0 else (second, first)
+            batch.add_reserves(key, base, quote, self.base_decimals, self.quote_decimals, baseline=baseline)
+        else:
+            batch.add_sqrt_price(
+                key,
+                first,
+                self.base_decimals,
+                self.quote_decimals,
+                base_is_token0=self.base_is_token0,
+                baseline=baseline,
+            )
+
+
+@dataclass
+class _Trigger:
+    context: _PoolContext
+    index: int
+    price: FixedPrice
+    change_bps: int
+
+    @property
+    def block(self) -> int:
+        return int(self.context.series.blocks[self.index])
+
+
+class BacktestRunner:
+    """Replays archived pool prices through the strategy with a simulated vault.
+
+    Every block present in the archive is one cycle: each configured pool
+    with a row at that block is evaluated against the token's balance at
+    the start of the block, with the block timestamp as the cycle time.
+    Sells are filled at the archived state of the block (V2 with
+    ``getAmountOut`` and the executor's price-impact sizing, V3 at spot less
+    the pool fee); the fill does not move later archived prices. With
+    ``split_routing`` one sell per token and cycle goes through the first
+    triggered pool.
+
+    ``engine="reference"`` calls :meth:`StrategyEngine.evaluate` row by row on
+    :class:`PriceBatch` results, exactly as the service does.
+    ``engine="vectorized"`` finds the same sells with NumPy: baselines only
+    move when a sell triggers, so each pool's next trigger is the first row
+    past the cooldown whose change against the current baseline reaches
+    the threshold. Rows are screened in float64 with a 1 bp margin, and
+    every candidate is confirmed with the engine's exact
+    :meth:`FixedPrice.change_bps`. Both engines report identical results.
+    """
+
+    def __init__(
+        self,
+        config: MonitorConfig,
+        archive: Archive,
+        *,
+        balances: Optional[Dict[str, int]] = None,
+        decimals: Optional[Dict[str, int]] = None,
+        metadata: Optional[ChainMetadata] = None,
+    ) -> None:
+        _require_numpy()
+        self._config = config
+        self._archive = {pool.lower(): series for pool, series in archive.items()}
+        self._decimals = {address.lower(): value for address, value in (decimals or {}).items()}
+        self._metadata = metadata
+        self._token_decimals: Dict[str, int] = {}
+        self._contexts: Dict[str, List[_PoolContext]] = {}
+        for token in config.tokens:
+            token_decimals = self._resolve_decimals(token.address, token.decimals)
+            self._token_decimals[token.address.lower()] = token_decimals
+            self._contexts[token.address.lower()] = [
+                self._build_context(token, pool, pool_index, token_decimals)
+                for pool_index, pool in enumerate(token.pools)
+                if pool.address.lower() in self._archive
+            ]
+        given = {address.lower(): value for address, value in (balances or {}).items()}
+        self._balances = {
+            address: given.get(address, 10**decimals_) for address, decimals_ in self._token_decimals.items()
+        }
+
+    def run(
+        self,
+        *,
+        threshold_bps: Optional[int] = None,
+        cooldown_seconds: Optional[int] = None,
+        sell_percentage: Optional[int] = None,
+        engine: str = "vectorized",
+    ) -> BacktestReport:
+        """Backtest with the strategy overrides given (None keeps the config value).
+
+        The overrides replace the ``strategy`` defaults; token and pool level
+        ``threshold_bps`` and pool ``cooldown_seconds`` metadata still win, as
+        they do live.
+        """
+        if engine not in BACKTEST_ENGINES:
+            raise ValueError(f"Unsupported backtest engine: {engine}")
+        overrides = {
+            name: value
+            for name, value in (
+                ("default_threshold_bps", threshold_bps),
+                ("cooldown_seconds", cooldown_seconds),
+                ("sell_percentage", sell_percentage),
+            )
+            if value is not None
+        }
+        config = replace(self._config, strategy=replace(self._config.strategy, **overrides), state_file=None)
+        strategy = StrategyEngine(config)
+        sells: List[SimulatedSell] = []
+        final_balances: Dict[str, int] = {}
+        for token in config.tokens:
+            key = token.address.lower()
+            if engine == "reference":
+                balance, token_sells = self._replay_reference(token, strategy, config)
+            else:
+                balance, token_sells = self._replay_vectorized(token, strategy, config)
+            final_balances[key] = balance
+            sells.extend(token_sells)
+        return BacktestReport(sells=sells, initial_balances=dict(self._balances), final_balances=final_balances)
+
+    def _replay_reference(
+        self,
+        token: TokenConfig,
+        strategy: StrategyEngine,
+        config: MonitorConfig,
+    ) -> Tuple[int, List[SimulatedSell]]:
+        contexts = self._contexts[token.address.lower()]
+        balance = self._balances[token.address.lower()]
+        rows = sorted(
+            (int(block), context.pool_index, index, context)
+            for context in contexts
+            for index, block in enumerate(context.series.blocks.tolist())
+        )
+        sells: List[SimulatedSell] = []
+        for block, group in itertools.groupby(rows, key=lambda row: row[0]):
+            cycle = [(index, context) for _, _, index, context in group]
+            inventory = self._inventory(token, balance)
+            batch = PriceBatch()
+            for position, (index, context) in enumerate(cycle):
+                context.add_to_batch(
+                    batch, position, index, strategy.baseline(token.address, context.pool.address)
+                )
+            results = batch.compute()
+            triggered: List[_Trigger] = []
+            for position, (index, context) in enumerate(cycle):
+                decision = strategy.evaluate(
+                    inventory,
+                    context.pool,
+                    results.result(position),
+                    timestamp=int(context.series.timestamps[index]),
+                )
+                if decision.should_swap:
+                    triggered.append(_Trigger(context, index, decision.price, decision.price_change_bps))
+            if triggered:
+                balance, filled = self._execute(token, balance, triggered, config)
+                sells.extend(filled)
+        return balance, sells
+
+    def _replay_vectorized(
+        self,
+        token: TokenConfig,
+        strategy: StrategyEngine,
+        config: MonitorConfig,
+    ) -> Tuple[int, List[SimulatedSell]]:
+        inventory = self._inventory(token, 0)
+        triggers: List[_Trigger] = []
+        for context in self._contexts[token.address.lower()]:
+            divergence = strategy.resolve_twap_divergence(context.pool)
+            windows = [seconds for seconds in (context.pool.twap_seconds, *context.pool.twap_windows) if seconds]
+            if divergence is not None and windows:
+                # Archived spot rows carry no TWAPs, so evaluate() always holds.
+                continue
+            triggers.extend(
+                self._find_triggers(
+                    context,
+                    strategy.resolve_threshold(inventory, context.pool),
+                    strategy.resolve_cooldown(context.pool),
+                )
+            )
+        triggers.sort(key=lambda trigger: (trigger.block, trigger.context.pool_index))
+
+        balance = self._balances[token.address.lower()]
+        sells: List[SimulatedSell] = []
+        for _, group in itertools.groupby(triggers, key=lambda trigger: trigger.block):
+            if balance * config.strategy.sell_percentage // 10_000 == 0:
+                # evaluate() reports "insufficient balance" from here on.
+                break
+            balance, filled = self._execute(token, balance, list(group), config)
+            sells.extend(filled)
+        return balance, sells
+
+    @staticmethod
+    def _find_triggers(
+        context: _PoolContext,
+        threshold_bps: int,
+        cooldown: int,
+        window: int = 4096,
+    ) -> List[_Trigger]:
+        """Rows where :meth:`StrategyEngine.evaluate` sells, assuming a non-zero sell amount."""
+        prices, valid = context.prices()
+        rows = np.flatnonzero(valid)
+        if not len(rows):
+            return []
+        valid_prices = prices[rows]
+        timestamps = context.series.timestamps[rows]
+        baseline = context.exact_price(int(rows[0]))
+        baseline_float = float(valid_prices[0])
+        last_trigger: Optional[int] = None
+        position = 1
+        triggers: List[_Trigger] = []
+        while position < len(rows):
+            start = position
+            if last_trigger:
+                start = max(start, int(np.searchsorted(timestamps, last_trigger + cooldown, side="left")))
+            found: Optional[_Trigger] = None
+            size = window
+            while start < len(rows) and found is None:
+                stop = min(len(rows), start + size)
+                with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+                    change = (valid_prices[start:stop] / baseline_float - 1.0) * 10_000
+                for offset in np.flatnonzero(~(change < threshold_bps - 1)).tolist():
+                    index = int(rows[start + offset])
+                    price = context.exact_price(index)
+                    change_bps = price.change_bps(baseline)
+                    if change_bps >= threshold_bps:
+                        found = _Trigger(context, index, price, change_bps)
+                        break
+                start = stop
+                size *= 2
+            if found is None:
+                break
+            triggers.append(found)
+            position = int(np.searchsorted(rows, found.index)) + 1
+            baseline, baseline_float = found.price, float(prices[found.index])
+            last_trigger = int(context.series.timestamps[found.index])
+        return triggers
+
+    def _execute(
+        self,
+        token: TokenConfig,
+        balance: int,
+        triggered: Sequence[_Trigger],
+        config: MonitorConfig,
+    ) -> Tuple[int, List[SimulatedSell]]:
+        """Fill one cycle's sells for ``token`` and return the new balance."""
+        sell_amount = balance * config.strategy.sell_percentage // 10_000
+        legs = list(triggered[:1]) if config.strategy.split_routing else list(triggered)
+        sells: List[SimulatedSell] = []
+        for trigger in legs:
+            amount = min(sell_amount, balance)
+            if amount <= 0:
+                break
+            filled = self._fill(trigger, amount, config)
+            if filled is None:
+                continue
+            amount_in, amount_out = filled
+            balance -= amount_in
+            sells.append(
+                SimulatedSell(
+                    token=token.address.lower(),
+                    pool=trigger.context.pool.address.lower(),
+                    quote_token=trigger.context.pool.quote_token.lower(),
+                    block=trigger.block,
+                    timestamp=int(trigger.context.series.timestamps[trigger.index]),
+                    price=trigger.price,
+                    change_bps=trigger.change_bps,
+                    amount_in=amount_in,
+                    amount_out=amount_out,
+                    missed_upside=self._missed_upside(trigger, amount_in, amount_out),
+                )
+            )
+        return balance, sells
+
+    @staticmethod
+    def _fill(trigger: _Trigger, amount: int, config: MonitorConfig) -> Optional[Tuple[int, int]]:
+        context = trigger.context
+        pool = context.pool
+        if context.is_v2:
+            first = context.series.value(context.series.first, trigger.index)
+            second = context.series.value(context.series.second, trigger.index)
+            reserve_in, reserve_out = (first, second) if context.base_is_token0 else (second, first)
+            fee_bps = int(pool.metadata.get("fee_bps", DEFAULT_FEE_BPS)) if pool.metadata else DEFAULT_FEE_BPS
+            max_impact = pool.metadata.get("max_price_impact_bps") if pool.metadata else None
+            if max_impact is None:
+                max_impact = config.strategy.max_price_impact_bps
+            if max_impact is None:
+                return amount, get_amount_out(amount, reserve_in, reserve_out, fee_bps)
+            sized = size_sell(amount, reserve_in, reserve_out, fee_bps=fee_bps, max_impact_bps=int(max_impact))
+            return (sized.amount_in, sized.amount_out) if sized is not None else None
+        gross = trigger.price.quote_amount(amount, context.base_decimals, context.quote_decimals)
+        return amount, gross * (1_000_000 - (pool.fee or 0)) // 1_000_000
+
+    @staticmethod
+    def _missed_upside(trigger: _Trigger, amount_in: int, amount_out: int) -> int:
+        context = trigger.context
+        prices, _ = context.prices()
+        later = prices[trigger.index + 1 :]
+        if not len(later):
+            return 0
+        peak = context.exact_price(trigger.index + 1 + int(np.argmax(later)))
+        if peak <= trigger.price:
+            return 0
+        return max(0, peak.quote_amount(amount_in, context.base_decimals, context.quote_decimals) - amount_out)
+
+    def _build_context(
+        self,
+        token: TokenConfig,
+        pool: PoolConfig,
+        pool_index: int,
+        token_decimals: int,
+    ) -> _PoolContext:
+        tokens = self._metadata.get_pool_tokens(pool.address) if self._metadata is not None else None
+        if tokens is not None:
+            base_is_token0 = tokens[0].lower() == pool.base_token.lower()
+        else:
+            # Uniswap orders pool tokens by address.
+            base_is_token0 = pool.base_token.lower() < pool.quote_token.lower()
+        return _PoolContext(
+            token=token,
+            pool=pool,
+            pool_index=pool_index,
+            series=self._archive[pool.address.lower()],
+            is_v2=pool.type.lower() in _V2_TYPES,
+            base_is_token0=base_is_token0,
+            base_decimals=token_decimals,
+            quote_decimals=self._resolve_decimals(pool.quote_token),
+        )
+
+    def _resolve_decimals(self, address: str, configured: Optional[int] = None) -> int:
+        if configured is not None:
+            return configured
+        if address.lower() in self._decimals:
+            return self._decimals[address.lower()]
+        known = self._metadata.get_decimals(address) if self._metadata is not None else None
+        if known is None:
+            raise ValueError(f"decimals unknown for {address}; pass them with --decimals")
+        return known
+
+    def _inventory(self, token: TokenConfig, balance: int) -> TokenInventory:
+        decimals = self._token_decimals[token.address.lower()]
+        return TokenInventory(
+            config=token,
+            raw_balance=balance,
+            human_balance=Decimal(balance) / Decimal(10) ** decimals,
+            decimals=decimals,
+            symbol=token.symbol or "UNKNOWN",
+        )
+
+    def format_report(self, report: BacktestReport) -> List[str]:
+        lines = []
+        for token in self._config.tokens:
+            key = token.address.lower()
+            decimals = self._token_decimals[key]
+            sold = report.initial_balances[key] - report.final_balances[key]
+            count = sum(1 for sell in report.sells if sell.token == key)
+            lines.append(
+                f"{token.symbol or key}: {count} sells, sold {_human(sold, decimals)} of "
+                f"{_human(report.initial_balances[key], decimals)}"
+            )
+            missed = report.missed_upside()
+            for (token_address, quote), proceeds in sorted(report.proceeds().items()):
+                if token_address != key:
+                    continue
+                quote_decimals = self._resolve_decimals(quote)
+                lines.append(
+                    f"  -> {quote}: proceeds {_human(proceeds, quote_decimals)}, "
+                    f"missed upside {_human(missed.get((token_address, quote), 0), quote_decimals)}"
+                )
+        return lines
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("backtesting needs NumPy (pip install numpy)")
+
+
+def _to_limbs(values: Sequence[int]) -> Any:
+    for value in values:
+        if value < 0 or value >> (64 * _LIMBS):
+            raise ValueError(f"pool value out of range: {value}")
+    return np.array(
+        [[(value >> shift) & _LIMB_MASK for shift in (0, 64, 128)] for value in values], dtype=np.uint64
+    ).reshape(-1, _LIMBS)
+
+
+def _limbs_to_float(limbs: Any) -> Any:
+    return (
+        limbs[:, 0].astype(np.float64)
+        + limbs[:, 1].astype(np.float64) * 2.0**64
+        + limbs[:, 2].astype(np.float64) * 2.0**128
+    )
+
+
+def _nonzero(limbs: Any) -> Any:
+    return (limbs != 0).any(axis=1)
+
+
+def _human(amount: int, decimals: int) -> str:
+    return f"{Decimal(amount) / Decimal(10) ** decimals:f}"
+
+
+def _parse_assignments(values: Sequence[str], flag: str) -> Dict[str, int]:
+    parsed: Dict[str, int] = {}
+    for value in values:
+        address, _, amount = value.partition("=")
+        if not amount:
+            raise SystemExit(f"{flag} expects ADDRESS=INTEGER, got {value!r}")
+        parsed[address.lower()] = int(amount)
+    return parsed
+
+
+def _parse_grid(value: Optional[str]) -> List[Optional[int]]:
+    if value is None:
+        return [None]
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backtest the sell strategy on archived pool prices.")
+    parser.add_argument("archive", type=Path, help="price archive (.csv export or .npz from --save-archive)")
+    parser.add_argument(
+        "--config",
+        type=Path,
+        default=Path(__file__).with_name("config.json"),
+        help="monitor config providing tokens, pools and strategy defaults",
+    )
+    parser.add_argument(
+        "--balance",
+        action="append",
+        default=[],
+        metavar="TOKEN=RAW",
+        help="starting raw vault balance of a token (default: one whole token)",
+    )
+    parser.add_argument(
+        "--decimals",
+        action="append",
+        default=[],
+        metavar="TOKEN=N",
+        help="decimals for tokens missing from the config and metadata cache",
+    )
+    parser.add_argument("--threshold-bps", default=None, help="comma-separated default_threshold_bps values")
+    parser.add_argument("--cooldown-seconds", default=None, help="comma-separated cooldown_seconds values")
+    parser.add_argument("--sell-percentage", default=None, help="comma-separated sell_percentage values (bps)")
+    parser.add_argument("--engine", choices=BACKTEST_ENGINES, default="vectorized")
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="also run the reference engine and fail if the results differ",
+    )
+    parser.add_argument("--sells", action="store_true", help="list every simulated sell")
+    parser.add_argument("--save-archive", type=Path, default=None, help="write the loaded archive as .npz")
+    args = parser.parse_args()
+
+    try:
+        config = load_config(args.config)
+    except EnvironmentError as exc:
+        raise SystemExit(str(exc)) from exc
+    started = time.perf_counter()
+    archive = load_archive(args.archive)
+    rows = sum(len(series) for series in archive.values())
+    print(f"[backtest] loaded {rows} rows for {len(archive)} pools in {time.perf_counter() - started:.1f}s")
+    if args.save_archive:
+        save_archive(archive, args.save_archive)
+
+    metadata = MetadataStore(config.metadata_file).view(config.chain_id or 0) if config.metadata_file else None
+    runner = BacktestRunner(
+        config,
+        archive,
+        balances=_parse_assignments(args.balance, "--balance"),
+        decimals=_parse_assignments(args.decimals, "--decimals"),
+        metadata=metadata,
+    )
+    for threshold, cooldown, percentage in itertools.product(
+        _parse_grid(args.threshold_bps), _parse_grid(args.cooldown_seconds), _parse_grid(args.sell_percentage)
+    ):
+        started = time.perf_counter()
+        report = runner.run(
+            threshold_bps=threshold, cooldown_seconds=cooldown, sell_percentage=percentage, engine=args.engine
+        )
+        elapsed = time.perf_counter() - started
+        strategy = config.strategy
+        print(
+            f"[backtest] threshold_bps={threshold if threshold is not None else strategy.default_threshold_bps} "
+            f"cooldown_seconds={cooldown if cooldown is not None else strategy.cooldown_seconds} "
+            f"sell_percentage={percentage if percentage is not None else strategy.sell_percentage} "
+            f"({elapsed:.2f}s)"
+        )
+        for line in runner.format_report(report):
+            print(f"[backtest]   {line}")
+        if args.sells:
+            for sell in report.sells:
+                print(
+                    f"[backtest]   block {sell.block} {sell.pool}: sold {sell.amount_in} for {sell.amount_out} "
+                    f"at +{sell.change_bps}bps (missed {sell.missed_upside})"
+                )
+        if args.verify:
+            other = "reference" if args.engine == "vectorized" else "vectorized"
+            expected = runner.run(
+                threshold_bps=threshold, cooldown_seconds=cooldown, sell_percentage=percentage, engine=other
+            )
+            if expected != report:
+                raise SystemExit(f"[backtest] {args.engine} and {other} engines disagree")
+            print(f"[backtest]   {other} engine agrees")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+from .fixed_point import MAX_TICK, MAX_UINT256, Q128, Q192, TICK_FACTORS, FixedPrice, mean_tick
+
+try:  # pragma: no cover - optional dependency
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None  # type: ignore
+
+_RESERVES = 0
+_SQRT_PRICE = 1
+_TWAP = 2
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+# 10 ** n for every decimals difference an ERC-20 can produce (uint8 decimals).
+_POW10 = [10**exponent for exponent in range(256)]
+
+
+def sqrt_ratios_at_ticks(ticks: Any) -> Any:
+    """Vectorized ``TickMath.getSqrtRatioAtTick`` over an int64 array.
+
+    Returns an object array of exact Q64.96 integers, bit-identical to
+    :func:`fixed_point.get_sqrt_ratio_at_tick`.
+    """
+    ticks = np.asarray(ticks, dtype=np.int64)
+    abs_ticks = np.abs(ticks)
+    if ticks.size and int(abs_ticks.max()) > MAX_TICK:
+        raise ValueError("tick out of range")
+    ratio = np.full(ticks.shape, Q128, dtype=object)
+    for bit, factor in TICK_FACTORS:
+        mask = (abs_ticks & bit) != 0
+        if mask.any():
+            ratio[mask] = (ratio[mask] * factor) >> 128
+    positive = ticks > 0
+    if positive.any():
+        ratio[positive] = MAX_UINT256 // ratio[positive]
+    return (ratio >> 32) + ((ratio & 0xFFFFFFFF) != 0).astype(object)
+
+
+@dataclass
+class PriceResult:
+    price: FixedPrice
+    tick: Optional[int]
+    change_bps: Optional[int] = None
+    baseline: Optional[FixedPrice] = None
+    twaps: Dict[int, FixedPrice] = field(default_factory=dict)
+    tick_variance: Optional[float] = None
+
+
+@dataclass
+class PriceBatchResult:
+    """Prices for every row of a :class:`PriceBatch`.
+
+    ``prices`` holds float64 quote-per-base prices for ranking, metrics and
+    volatility; ``change_bps`` holds the change against each row's baseline
+    as int64 (0 where ``has_baseline`` is false, saturated at the int64
+    range). :meth:`result` returns the exact :class:`PriceResult` the
+    strategy consumes. Rows attached to another key as extra TWAP windows
+    are folded into that key's ``PriceResult.twaps``.
+    """
+
+    keys: List[Hashable]
+    numerators: Sequence[int]
+    denominators: Sequence[int]
+    ticks: List[Optional[int]]
+    prices: Any
+    change_bps: Any
+    has_baseline: Any
+    baselines: List[Optional[FixedPrice]]
+    exact_change_bps: Sequence[int]
+    windows: List[Optional[int]]
+    attached: List[bool]
+    tick_variances: Dict[Hashable, float]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def price(self, index: int) -> FixedPrice:
+        return FixedPrice(int(self.numerators[index]), int(self.denominators[index]))
+
+    def result(self, index: int) -> PriceResult:
+        baseline = self.baselines[index] if self.has_baseline[index] else None
+        price = self.price(index)
+        key = self.keys[index]
+        window = self.windows[index]
+        return PriceResult(
+            price=price,
+            tick=self.ticks[index],
+            change_bps=int(self.exact_change_bps[index]) if baseline is not None else None,
+            baseline=baseline,
+            twaps={window: price} if window is not None else {},
+            tick_variance=self.tick_variances.get(key),
+        )
+
+    def results(self) -> Dict[Hashable, PriceResult]:
+        results: Dict[Hashable, PriceResult] = {}
+        for index, key in enumerate(self.keys):
+            if not self.attached[index]:
+                results[key] = self.result(index)
+        for index, key in enumerate(self.keys):
+            if self.attached[index] and key in results:
+                results[key].twaps[self.windows[index]] = self.price(index)
+        return results
+
+
+class PriceBatch:
+    """Collects raw pool state for a whole cycle and prices it in one pass.
+
+    Rows are V2 reserves, V3 ``sqrtPriceX96`` values or V3 tick-cumulative
+    deltas (TWAP). With NumPy installed, :meth:`compute` evaluates every row
+    at once: ratios, TickMath, decimal scaling and the change against the
+    baseline stay exact on object arrays of Python ints, while the display
+    price is float64. Without NumPy the same results come from
+    :class:`FixedPrice` row by row. A zero base reserve prices at 0, which
+    the strategy reports as an invalid price.
+    """
+
+    def __init__(self) -> None:
+        self._keys: List[Hashable] = []
+        self._kinds: List[int] = []
+        self._first: List[int] = []
+        self._second: List[int] = []
+        self._ticks: List[Optional[int]] = []
+        self._base_is_token0: List[bool] = []
+        self._base_decimals: List[int] = []
+        self._quote_decimals: List[int] = []
+        self._baselines: List[Optional[FixedPrice]] = []
+        self._windows: List[Optional[int]] = []
+        self._attached: List[bool] = []
+        self._tick_variances: Dict[Hashable, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add_reserves(
+        self,
+        key: Hashable,
+        reserve_base: int,
+        reserve_quote: int,
+        base_decimals: int,
+        quote_decimals: int,
+        *,
+        baseline: Optional[FixedPrice] = None,
+    ) -> None:
+        self._add(key, _RESERVES, reserve_quote, reserve_base, None, True, base_decimals, quote_decimals, baseline)
+
+    def add_sqrt_price(
+        self,
+        key: Hashable,
+        sqrt_price_x96: int,
+        base_decimals: int,
+        quote_decimals: int,
+        *,
+        base_is_token0: bool,
+        tick: Optional[int] = None,
+        baseline: Optional[FixedPrice] = None,
+    ) -> None:
+        self._add(
+            key, _SQRT_PRICE, sqrt_price_x96, 0, tick, base_is_token0, base_decimals, quote_decimals, baseline
+        )
+
+    def add_twap(
+        self,
+        key: Hashable,
+        tick_cumulative_delta: int,
+        seconds: int,
+        base_decimals: int,
+        quote_decimals: int,
+        *,
+        base_is_token0: bool,
+        baseline: Optional[FixedPrice] = None,
+        window: Optional[int] = None,
+        attach: bool = False,
+    ) -> None:
+        """Mean-tick price over ``seconds``.
+
+        ``window`` is the nominal window length reported in ``twaps``. With
+        ``attach`` the row is an extra window of ``key`` rather than its price.
+        """
+        self._add(
+            key,
+            _TWAP,
+            tick_cumulative_delta,
+            seconds,
+            None,
+            base_is_token0,
+            base_decimals,
+            quote_decimals,
+            baseline,
+            window,
+            attach,
+        )
+
+    def add_cumulative_twap(
+        self,
+        key: Hashable,
+        price_cumulative_delta: int,
+        seconds: int,
+        base_decimals: int,
+        quote_decimals: int,
+        *,
+        baseline: Optional[FixedPrice] = None,
+        window: Optional[int] = None,
+        attach: bool = False,
+    ) -> None:
+        """Mean of a Uniswap V2 UQ112x112 ``priceXCumulativeLast`` over ``seconds``."""
+        self._add(
+            key,
+            _RESERVES,
+            price_cumulative_delta,
+            seconds << 112,
+            None,
+            True,
+            base_decimals,
+            quote_decimals,
+            baseline,
+            window,
+            attach,
+        )
+
+    def set_tick_variance(self, key: Hashable, variance: float) -> None:
+        self._tick_variances[key] = variance
+
+    def compute(self) -> PriceBatchResult:
+        if np is None:
+            return self._compute_python()
+        return self._compute_numpy()
+
+    def _add(
+        self,
+        key: Hashable,
+        kind: int,
+        first: int,
+        second: int,
+        tick: Optional[int],
+        base_is_token0: bool,
+        base_decimals: int,
+        quote_decimals: int,
+        baseline: Optional[FixedPrice],
+        window: Optional[int] = None,
+        attach: bool = False,
+    ) -> None:
+        self._keys.append(key)
+        self._kinds.append(kind)
+        self._first.append(int(first))
+        self._second.append(int(second))
+        self._ticks.append(tick)
+        self._base_is_token0.append(base_is_token0)
+        self._base_decimals.append(int(base_decimals))
+        self._quote_decimals.append(int(quote_decimals))
+        self._baselines.append(baseline if not attach else None)
+        self._windows.append(window)
+        self._attached.append(attach)
+
+    def _compute_numpy(self) -> PriceBatchResult:
+        size = len(self._keys)
+        kinds = np.array(self._kinds, dtype=np.int8)
+        first = np.array(self._first, dtype=object)
+        second = np.array(self._second, dtype=object)
+        ticks = list(self._ticks)
+        numerators = np.empty(size, dtype=object)
+        denominators = np.empty(size, dtype=object)
+
+        reserves = kinds == _RESERVES
+        numerators[reserves] = first[reserves]
+        denominators[reserves] = second[reserves]
+
+        squared = ~reserves
+        if squared.any():
+            sqrt_prices = first.copy()
+            twap = kinds == _TWAP
+            if twap.any():
+                mean_ticks = (first[twap] // second[twap]).astype(np.int64)
+                sqrt_prices[twap] = sqrt_ratios_at_ticks(mean_ticks)
+                for index, tick in zip(np.flatnonzero(twap), mean_ticks.tolist()):
+                    ticks[index] = tick
+            ratios = sqrt_prices[squared] * sqrt_prices[squared]
+            token0 = np.array(self._base_is_token0, dtype=bool)[squared]
+            numerators[squared] = np.where(token0, ratios, Q192)
+            denominators[squared] = np.where(token0, Q192, ratios)
+
+        shift = np.array(self._base_decimals, dtype=np.int64) - np.array(self._quote_decimals, dtype=np.int64)
+        scale = np.array(_POW10, dtype=object)[np.abs(shift)]
+        up = shift > 0
+        numerators[up] = numerators[up] * scale[up]
+        down = shift < 0
+        denominators[down] = denominators[down] * scale[down]
+
+        empty = denominators == 0
+        numerators[empty] = 0
+        denominators[empty] = 1
+
+        prices = (numerators / denominators).astype(np.float64) if size else np.zeros(0)
+
+        has_baseline = np.array(
+            [baseline is not None and baseline.is_positive() for baseline in self._baselines], dtype=bool
+        )
+        exact_change = np.zeros(size, dtype=object)
+        if has_baseline.any():
+            baselines = [baseline for baseline, present in zip(self._baselines, has_baseline) if present]
+            base_num = np.array([baseline.numerator for baseline in baselines], dtype=object)
+            base_den = np.array([baseline.denominator for baseline in baselines], dtype=object)
+            delta = (numerators[has_baseline] * base_den - base_num * denominators[has_baseline]) * 10_000
+            change = np.abs(delta) // (denominators[has_baseline] * base_num)
+            negative = delta < 0
+            change[negative] = -change[negative]
+            exact_change[has_baseline] = change
+
+        return PriceBatchResult(
+            keys=list(self._keys),
+            numerators=numerators,
+            denominators=denominators,
+            ticks=ticks,
+            prices=prices,
+            change_bps=np.clip(exact_change, _INT64_MIN, _INT64_MAX).astype(np.int64),
+            has_baseline=has_baseline,
+            baselines=list(self._baselines),
+            exact_change_bps=exact_change,
+            windows=list(self._windows),
+            attached=list(self._attached),
+            tick_variances=dict(self._tick_variances),
+        )
+
+    def _compute_python(self) -> PriceBatchResult:
+        numerators: List[int] = []
+        denominators: List[int] = []
+        ticks = list(self._ticks)
+        prices: List[float] = []
+        exact_change: List[int] = []
+        has_baseline: List[bool] = []
+        for index, kind in enumerate(self._kinds):
+            base_decimals = self._base_decimals[index]
+            quote_decimals = self._quote_decimals[index]
+            if kind == _RESERVES:
+                if self._second[index] == 0:
+                    price = FixedPrice(0, 1)
+                else:
+                    price = FixedPrice.from_raw(self._first[index], self._second[index], base_decimals, quote_decimals)
+            else:
+                if kind == _TWAP:
+                    ticks[index] = mean_tick(self._first[index], self._second[index])
+                    price = FixedPrice.from_tick(
+                        ticks[index],
+                        base_decimals,
+                        quote_decimals,
+                        base_is_token0=self._base_is_token0[index],
+                    )
+                elif self._first[index] == 0:
+                    price = FixedPrice(0, 1)
+                else:
+                    price = FixedPrice.from_sqrt_price_x96(
+                        self._first[index],
+                        base_decimals,
+                        quote_decimals,
+                        base_is_token0=self._base_is_token0[index],
+                    )
+            baseline = self._baselines[index]
+            present = baseline is not None and baseline.is_positive()
+            numerators.append(price.numerator)
+            denominators.append(price.denominator)
+            prices.append(float(price))
+            exact_change.append(price.change_bps(baseline) if present else 0)
+            has_baseline.append(present)
+        return PriceBatchResult(
+            keys=list(self._keys),
+            numerators=numerators,
+            denominators=denominators,
+            ticks=ticks,
+            prices=prices,
+            change_bps=[min(max(change, _INT64_MIN), _INT64_MAX) for change in exact_change],
+            has_baseline=has_baseline,
+            baselines=list(self._baselines),
+            exact_change_bps=exact_change,
+            windows=list(self._windows),
+            attached=list(self._attached),
+            tick_variances=dict(self._tick_variances),
+        )
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from web3.providers.base import BaseProvider
+
+from .metrics import MetricsRegistry
+from .multicall import function_selector
+
+try:  # pragma: no cover - optional dependency
+    from web3.providers.async_base import AsyncBaseProvider
+except ImportError:  # pragma: no cover - optional dependency
+    AsyncBaseProvider = None  # type: ignore
+
+# Views whose result never changes for a given contract; cached across blocks.
+IMMUTABLE_SELECTORS = frozenset(
+    "0x" + function_selector(signature).hex()
+    for signature in (
+        "decimals()",
+        "symbol()",
+        "name()",
+        "token0()",
+        "token1()",
+        "fee()",
+        "tickSpacing()",
+        "factory()",
+    )
+)
+
+_BLOCK_TAGS = frozenset({"latest", "pending", "safe", "finalized", "earliest"})
+
+
+def _block_key(block: Any) -> Optional[Hashable]:
+    if isinstance(block, int):
+        return block
+    if isinstance(block, str):
+        if block in _BLOCK_TAGS:
+            return None
+        if block.startswith("0x") and len(block) <= 18:
+            return int(block, 16)
+        return block.lower()
+    if isinstance(block, dict):
+        return tuple(sorted((key, str(value).lower()) for key, value in block.items()))
+    return None
+
+
+def _hex(value: Any) -> str:
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    return str(value).lower()
+
+
+class CallCache:
+    """LRU cache of ``eth_call`` responses keyed by ``(block, to, calldata)``.
+
+    Calls pinned to a block number are cached for that block. Calls to a
+    selector in :data:`IMMUTABLE_SELECTORS` on a contract registered with
+    :meth:`set_immutable_targets` (the monitored pools) are cached regardless
+    of block, in a second LRU tier of the same size; empty ``0x`` results are
+    not kept there, since the address may not be deployed yet. Calls against a
+    tag such as ``latest`` are otherwise passed through. Only successful
+    responses are stored.
+    """
+
+    def __init__(self, max_entries: int = 10_000, metrics: Optional[MetricsRegistry] = None) -> None:
+        self._max_entries = max(1, max_entries)
+        self._metrics = metrics
+        self._entries: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._immutable: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._immutable_targets: frozenset = frozenset()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries) + len(self._immutable)
+
+    def set_immutable_targets(self, addresses: Iterable[str]) -> None:
+        """Replace the contracts whose immutable views are cached across blocks."""
+        targets = frozenset(address.lower() for address in addresses)
+        with self._lock:
+            self._immutable_targets = targets
+            for key in [key for key in self._immutable if key[1] not in targets]:
+                del self._immutable[key]
+
+    def key(self, method: str, params: Any) -> Optional[Hashable]:
+        if method != "eth_call" or not params:
+            return None
+        transaction = params[0]
+        if not isinstance(transaction, dict) or not transaction.get("to"):
+            return None
+        data = _hex(transaction.get("data") or transaction.get("input") or "0x")
+        target = _hex(transaction["to"])
+        sender = _hex(transaction.get("from", ""))
+        if data[:10] in IMMUTABLE_SELECTORS and target in self._immutable_targets:
+            return ("immutable", target, data, sender)
+        block = _block_key(params[1] if len(params) > 1 else "latest")
+        if block is None:
+            return None
+        return (block, target, data, sender)
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            tier = self._immutable if key[0] == "immutable" else self._entries
+            response = tier.get(key)
+            if response is not None:
+                tier.move_to_end(key)
+        self.record("hit" if response is not None else "miss")
+        return response
+
+    def put(self, key: Hashable, response: Any) -> None:
+        if not isinstance(response, dict) or response.get("error") or "result" not in response:
+            return
+        tier = self._entries
+        if key[0] == "immutable":
+            if response["result"] in (None, "", "0x", b""):
+                return
+            tier = self._immutable
+        with self._lock:
+            if tier is self._immutable and key[1] not in self._immutable_targets:
+                return
+            tier[key] = response
+            tier.move_to_end(key)
+            while len(tier) > self._max_entries:
+                tier.popitem(last=False)
+
+    def record(self, result: str) -> None:
+        if self._metrics is not None:
+            self._metrics.cache_requests.inc(cache="eth_call", result=result)
+
+
+class _Flight:
+    __slots__ = ("done", "response")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.response: Any = None
+
+
+class CachingProvider(BaseProvider):
+    """Serves ``eth_call`` from a :class:`CallCache` in front of another provider.
+
+    Concurrent identical calls are coalesced: the first caller goes to the
+    network and the rest wait for its response (counted as ``coalesced``).
+    """
+
+    def __init__(self, provider: BaseProvider, cache: CallCache) -> None:
+        super().__init__()
+        self.provider = provider
+        self.cache = cache
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return self.provider.is_connected(show_traceback)
+
+    def make_request(self, method, params):
+        key = self.cache.key(str(method), params)
+        if key is None:
+            return self.provider.make_request(method, params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.response is not None:
+                self.cache.record("coalesced")
+                return flight.response
+            # The leader raised; try again ourselves.
+            return self.provider.make_request(method, params)
+
+        try:
+            flight.response = self.provider.make_request(method, params)
+            self.cache.put(key, flight.response)
+            return flight.response
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def make_batch_request(self, requests: Sequence[Tuple[str, Any]]) -> List[Any]:
+        responses: List[Any] = [None] * len(requests)
+        misses: List[int] = []
+        keys: List[Optional[Hashable]] = []
+        for index, (method, params) in enumerate(requests):
+            key = self.cache.key(str(method), params)
+            keys.append(key)
+            cached = self.cache.get(key) if key is not None else None
+            if cached is not None:
+                responses[index] = cached
+            else:
+                misses.append(index)
+        if misses:
+            fetched = self.provider.make_batch_request([requests[index] for index in misses])
+            for index, response in zip(misses, fetched):
+                responses[index] = response
+                if keys[index] is not None:
+                    self.cache.put(keys[index], response)
+        return responses
+
+
+if AsyncBaseProvider is not None:
+
+    class AsyncCachingProvider(AsyncBaseProvider):  # type: ignore[misc, valid-type]
+        """Async counterpart of :class:`CachingProvider`."""
+
+        def __init__(self, provider: Any, cache: CallCache) -> None:
+            super().__init__()
+            self.provider = provider
+            self.cache = cache
+            self._inflight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+        async def is_connected(self, show_traceback: bool = False) -> bool:
+            return await self.provider.is_connected(show_traceback)
+
+        async def make_request(self, method, params):
+            key = self.cache.key(str(method), params)
+            if key is None:
+                return await self.provider.make_request(method, params)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+            pending = self._inflight.get(key)
+            if pending is not None:
+                try:
+                    response = await asyncio.shield(pending)
+                except asyncio.CancelledError:
+                    if not pending.cancelled():
+                        raise
+                    # The leader was cancelled; try again ourselves.
+                    return await self.provider.make_request(method, params)
+                self.cache.record("coalesced")
+                return response
+
+            future: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            try:
+                response = await self.provider.make_request(method, params)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as exc:
+                future.set_exception(exc)
+                # Waiters re-raise; mark retrieved so an unawaited future does not warn.
+                future.exception()
+                raise
+            else:
+                self.cache.put(key, response)
+                future.set_result(response)
+                return response
+            finally:
+                self._inflight.pop(key, None)
+
+        async def make_batch_request(self, requests: Sequence[Tuple[str, Any]]) -> List[Any]:
+            responses: List[Any] = [None] * len(requests)
+            misses: List[int] = []
+            keys: List[Optional[Hashable]] = []
+            for index, (method, params) in enumerate(requests):
+                key = self.cache.key(str(method), params)
+                keys.append(key)
+                cached = self.cache.get(key) if key is not None else None
+                if cached is not None:
+                    responses[index] = cached
+                else:
+                    misses.append(index)
+            if misses:
+                fetched = await self.provider.make_batch_request([requests[index] for index in misses])
+                for index, response in zip(misses, fetched):
+                    responses[index] = response
+                    if keys[index] is not None:
+                        self.cache.put(keys[index], response)
+            return responses
+
+else:  # pragma: no cover - optional dependency
+    AsyncCachingProvider = None  # type: ignore
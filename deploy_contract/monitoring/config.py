@@ -17,6 +17,7 @@ class PoolConfig:
     fee: Optional[int] = None
     threshold_bps: Optional[int] = None
     twap_seconds: Optional[int] = None
+    twap_windows: List[int] = field(default_factory=list)
     metadata: Dict[str, Any] = field(default_factory=dict)
 
 
@@ -36,16 +37,45 @@ class StrategyConfig:
     default_slippage_bps: int
     default_threshold_bps: int
     use_twap: bool = True
+    max_twap_divergence_bps: Optional[int] = None
+    max_price_impact_bps: Optional[int] = None
+    split_routing: bool = False
 
     @property
     def sell_ratio(self) -> float:
         return self.sell_percentage / 10_000
 
 
+@dataclass
+class HistoryConfig:
+    """Retention of per-cycle price/decision history (SQLite state backend only)."""
+
+    raw_seconds: int = 86_400
+    bucket_seconds: int = 300
+    retention_seconds: int = 30 * 86_400
+
+
+@dataclass
+class RpcEndpointConfig:
+    http: str
+    websocket: Optional[str] = None
+    weight: float = 1.0
+
+
 @dataclass
 class RpcConfig:
     http: str
     websocket: Optional[str] = None
+    multicall_address: Optional[str] = None
+    multicall_batch_size: int = 500
+    max_concurrency: int = 16
+    endpoints: List[RpcEndpointConfig] = field(default_factory=list)
+    hedge_after_ms: Optional[int] = None
+    eject_after_errors: int = 3
+    eject_seconds: float = 30.0
+    batch_window_ms: Optional[float] = None
+    max_batch_size: int = 50
+    call_cache_size: int = 10_000
 
 
 @dataclass
@@ -56,7 +86,15 @@ class MonitorConfig:
     tokens: List[TokenConfig]
     strategy: StrategyConfig
     state_file: Optional[Path] = None
+    state_backend: str = "json"
+    history: HistoryConfig = field(default_factory=HistoryConfig)
+    metadata_file: Optional[Path] = None
+    twap_file: Optional[Path] = None
     source_path: Optional[Path] = None
+    chain_name: Optional[str] = None
+    chain_id: Optional[int] = None
+    block_time_seconds: Optional[float] = None
+    blocks_per_cycle: int = 1
 
 
 _ENV_PATTERN = re.compile(r"\$\{?([A-Za-z_][A-Za-z0-9_]*)\}?")
@@ -88,6 +126,7 @@ def _load_pool_config(raw: Dict[str, Any]) -> PoolConfig:
         fee=raw.get("fee"),
         threshold_bps=raw.get("threshold_bps"),
         twap_seconds=raw.get("twap_seconds"),
+        twap_windows=[int(seconds) for seconds in raw.get("twap_windows", [])],
         metadata=_resolve_env(raw.get("metadata", {})),
     )
 
@@ -103,6 +142,10 @@ def _load_token_config(raw: Dict[str, Any]) -> TokenConfig:
     )
 
 
+def load_token_config(raw: Dict[str, Any]) -> TokenConfig:
+    return _load_token_config(_resolve_env(raw))
+
+
 def _load_strategy_config(raw: Dict[str, Any]) -> StrategyConfig:
     return StrategyConfig(
         sell_percentage=raw["sell_percentage"],
@@ -110,25 +153,69 @@ def _load_strategy_config(raw: Dict[str, Any]) -> StrategyConfig:
         default_slippage_bps=raw.get("default_slippage_bps", 100),
         default_threshold_bps=raw.get("default_threshold_bps", 1000),
         use_twap=raw.get("use_twap", True),
+        max_twap_divergence_bps=raw.get("max_twap_divergence_bps"),
+        max_price_impact_bps=raw.get("max_price_impact_bps"),
+        split_routing=raw.get("split_routing", False),
     )
 
 
-def load_config(path: str | Path) -> MonitorConfig:
-    parsed_path = Path(path)
-    data = json.loads(parsed_path.read_text())
+def _load_history_config(raw: Dict[str, Any]) -> HistoryConfig:
+    defaults = HistoryConfig()
+    return HistoryConfig(
+        raw_seconds=int(raw.get("raw_seconds", defaults.raw_seconds)),
+        bucket_seconds=int(raw.get("bucket_seconds", defaults.bucket_seconds)),
+        retention_seconds=int(raw.get("retention_seconds", defaults.retention_seconds)),
+    )
 
-    resolved = _resolve_env(data)
 
+def _load_rpc_endpoint_config(raw: Dict[str, Any]) -> RpcEndpointConfig:
+    return RpcEndpointConfig(
+        http=raw["http"],
+        websocket=raw.get("websocket"),
+        weight=float(raw.get("weight", 1.0)),
+    )
+
+
+def _load_rpc_config(raw: Dict[str, Any]) -> RpcConfig:
+    endpoints = [_load_rpc_endpoint_config(endpoint) for endpoint in raw.get("endpoints", [])]
+    if not endpoints:
+        endpoints = [RpcEndpointConfig(http=raw["http"], websocket=raw.get("websocket"))]
+    websocket = raw.get("websocket") or next(
+        (endpoint.websocket for endpoint in endpoints if endpoint.websocket),
+        None,
+    )
+    return RpcConfig(
+        http=raw.get("http") or endpoints[0].http,
+        websocket=websocket,
+        multicall_address=raw.get("multicall_address"),
+        multicall_batch_size=raw.get("multicall_batch_size", 500),
+        max_concurrency=raw.get("max_concurrency", 16),
+        endpoints=endpoints,
+        hedge_after_ms=raw.get("hedge_after_ms"),
+        eject_after_errors=raw.get("eject_after_errors", 3),
+        eject_seconds=raw.get("eject_seconds", 30.0),
+        batch_window_ms=raw.get("batch_window_ms"),
+        max_batch_size=raw.get("max_batch_size", 50),
+        call_cache_size=raw.get("call_cache_size", 10_000),
+    )
+
+
+def _load_monitor_config(resolved: Dict[str, Any], source_path: Optional[Path]) -> MonitorConfig:
     tokens = [_load_token_config(raw_token) for raw_token in resolved["tokens"]]
 
-    rpc_raw = resolved["rpc"]
-    rpc = RpcConfig(http=rpc_raw["http"], websocket=rpc_raw.get("websocket"))
+    rpc = _load_rpc_config(resolved["rpc"])
 
     strategy = _load_strategy_config(resolved["strategy"])
 
     state_file = resolved.get("state_file")
     state_path = Path(state_file) if state_file else None
 
+    metadata_file = resolved.get("metadata_file")
+    metadata_path = Path(metadata_file) if metadata_file else None
+
+    twap_file = resolved.get("twap_file")
+    twap_path = Path(twap_file) if twap_file else None
+
     return MonitorConfig(
         vault_address=resolved["vault_address"],
         executor_address=resolved["executor_address"],
@@ -136,10 +223,69 @@ def load_config(path: str | Path) -> MonitorConfig:
         tokens=tokens,
         strategy=strategy,
         state_file=state_path,
-        source_path=parsed_path,
+        state_backend=resolved.get("state_backend", "json"),
+        history=_load_history_config(resolved.get("history", {})),
+        metadata_file=metadata_path,
+        twap_file=twap_path,
+        source_path=source_path,
     )
 
 
+def load_config(path: str | Path) -> MonitorConfig:
+    parsed_path = Path(path)
+    data = json.loads(parsed_path.read_text())
+
+    resolved = _resolve_env(data)
+
+    return _load_monitor_config(resolved, parsed_path)
+
+
+def is_multichain_config(path: str | Path) -> bool:
+    return "chains" in json.loads(Path(path).read_text())
+
+
+def load_multichain_config(path: str | Path) -> List[MonitorConfig]:
+    """Load a config with a top-level ``chains`` list into one config per chain.
+
+    Top-level ``strategy``, ``state_file``, ``state_backend``, ``history``,
+    ``twap_file`` and ``metadata_file`` act as defaults for every chain. A
+    shared ``state_file`` or ``twap_file`` gets a per-chain suffix because
+    strategy and pool keys are only unique within a chain; the metadata file
+    is keyed by chain id and can be shared as-is. Chain configs carry no
+    ``source_path``, so they are neither reloaded nor written back.
+    """
+    parsed_path = Path(path)
+    data = json.loads(parsed_path.read_text())
+
+    resolved = _resolve_env(data)
+
+    configs: List[MonitorConfig] = []
+    for raw_chain in resolved["chains"]:
+        merged = {
+            key: resolved[key]
+            for key in ("strategy", "metadata_file", "state_backend", "history")
+            if key in resolved
+        }
+        merged.update(raw_chain)
+        chain_name = str(raw_chain.get("name") or raw_chain.get("chain_id") or len(configs))
+        for per_chain_key in ("state_file", "twap_file"):
+            if per_chain_key not in raw_chain and resolved.get(per_chain_key):
+                shared_path = Path(resolved[per_chain_key])
+                merged[per_chain_key] = str(
+                    shared_path.with_name(f"{shared_path.stem}.{chain_name}{shared_path.suffix}")
+                )
+
+        # No source_path: the chain's tokens do not live in a top-level ``tokens``
+        # list the config writer or reload could use.
+        config = _load_monitor_config(merged, None)
+        config.chain_name = chain_name
+        config.chain_id = raw_chain.get("chain_id")
+        config.block_time_seconds = raw_chain.get("block_time")
+        config.blocks_per_cycle = raw_chain.get("blocks_per_cycle", 1)
+        configs.append(config)
+    return configs
+
+
 def load_default_config() -> MonitorConfig:
     default_path = Path(__file__).with_name("config.example.json")
     return load_config(default_path)
@@ -1,22 +1,32 @@
 from __future__ import annotations
 
 import asyncio
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 from web3 import Web3
+from web3.providers.base import BaseProvider
 from web3.providers.rpc import HTTPProvider
 
+from .call_cache import AsyncCachingProvider, CachingProvider, CallCache
 from .config import RpcConfig
+from .metrics import MetricsRegistry
+from .rpc_batch import BatchingAsyncHTTPProvider, BatchingHTTPProvider
+from .rpc_pool import READ_METHODS, EndpointHealth, EndpointPool, is_endpoint_failure
 
 try:  # pragma: no cover - optional dependency
-    from web3 import AsyncWeb3
-    from web3.providers.async_http import AsyncHTTPProvider
-    from web3.providers.async_websocket import AsyncWebsocketProvider
+    from web3 import AsyncHTTPProvider, AsyncWeb3
 except ImportError:  # pragma: no cover - optional dependency
     AsyncWeb3 = None  # type: ignore
     AsyncHTTPProvider = None  # type: ignore
-    AsyncWebsocketProvider = None  # type: ignore
+
+try:  # pragma: no cover - optional dependency
+    # web3 >= 7; the persistent provider must be connected before first use.
+    from web3 import WebSocketProvider
+except ImportError:  # pragma: no cover - optional dependency
+    WebSocketProvider = None  # type: ignore
 
 try:  # pragma: no cover - optional dependency
     from degenbot.connection import connection_manager as degen_connection_manager
@@ -24,17 +34,303 @@ except ImportError:  # pragma: no cover - optional dependency
     degen_connection_manager = None
 
 
+class InstrumentedHTTPProvider(HTTPProvider):
+    """HTTP provider that counts requests and errors per JSON-RPC method."""
+
+    def __init__(self, endpoint_uri: str, metrics: MetricsRegistry, **kwargs) -> None:
+        super().__init__(endpoint_uri, **kwargs)
+        self._metrics = metrics
+
+    def make_request(self, method, params):
+        self._metrics.rpc_requests.inc(method=str(method))
+        try:
+            response = super().make_request(method, params)
+        except Exception:
+            self._metrics.rpc_errors.inc(method=str(method))
+            raise
+        if isinstance(response, dict) and response.get("error"):
+            self._metrics.rpc_errors.inc(method=str(method))
+        return response
+
+
+if AsyncHTTPProvider is not None:
+
+    class InstrumentedAsyncHTTPProvider(AsyncHTTPProvider):  # type: ignore[misc, valid-type]
+        def __init__(self, endpoint_uri: str, metrics: MetricsRegistry, **kwargs) -> None:
+            super().__init__(endpoint_uri, **kwargs)
+            self._metrics = metrics
+
+        async def make_request(self, method, params):
+            self._metrics.rpc_requests.inc(method=str(method))
+            try:
+                response = await super().make_request(method, params)
+            except Exception:
+                self._metrics.rpc_errors.inc(method=str(method))
+                raise
+            if isinstance(response, dict) and response.get("error"):
+                self._metrics.rpc_errors.inc(method=str(method))
+            return response
+
+else:  # pragma: no cover - optional dependency
+    InstrumentedAsyncHTTPProvider = None  # type: ignore
+
+
+class PooledHTTPProvider(BaseProvider):
+    """Routes each request to the best-ranked endpoint of an ``EndpointPool``.
+
+    Reads fail over to the next endpoint on transport errors or throttling
+    responses. With ``hedge_after`` set, a read that has not answered within
+    that many seconds is re-sent to the runner-up and the first good answer
+    wins. Writes always go to a single endpoint and are never retried.
+    """
+
+    def __init__(
+        self,
+        pool: EndpointPool,
+        metrics: Optional[MetricsRegistry] = None,
+        *,
+        hedge_after: Optional[float] = None,
+        provider_factory: Optional[Callable[[str], Any]] = None,
+    ) -> None:
+        super().__init__()
+        self._pool = pool
+        self._hedge_after = hedge_after
+        if provider_factory is None:
+            provider_factory = (
+                (lambda url: InstrumentedHTTPProvider(url, metrics)) if metrics is not None else HTTPProvider
+            )
+        self._providers: Dict[str, Any] = {endpoint.url: provider_factory(endpoint.url) for endpoint in pool.endpoints}
+        self._hedges = (
+            metrics.counter("monitor_rpc_hedges_total", "Reads re-sent to a second endpoint.")
+            if metrics is not None
+            else None
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return any(
+            self._providers[endpoint.url].is_connected(show_traceback) for endpoint in self._pool.ranked()
+        )
+
+    def make_request(self, method, params):
+        return self._route(str(method), lambda provider: provider.make_request(method, params))
+
+    def make_batch_request(self, requests: List[Tuple[str, Any]]) -> List[Any]:
+        method = "eth_call" if all(str(name) in READ_METHODS for name, _ in requests) else "batch"
+        return self._route(method, lambda provider: provider.make_batch_request(requests))
+
+    def _route(self, method: str, send: Callable[[HTTPProvider], Any]) -> Any:
+        candidates = self._pool.ranked()
+        if method not in READ_METHODS:
+            return self._send(candidates[0], send)[0]
+        if self._hedge_after is not None and len(candidates) > 1:
+            return self._hedged(candidates, send)
+        return self._failover(candidates, send)
+
+    def _send(self, endpoint: EndpointHealth, send: Callable[[HTTPProvider], Any]) -> Tuple[Any, bool]:
+        start = time.perf_counter()
+        try:
+            response = send(self._providers[endpoint.url])
+        except Exception:
+            self._pool.record(endpoint, time.perf_counter() - start, False)
+            raise
+        ok = not is_endpoint_failure(response)
+        self._pool.record(endpoint, time.perf_counter() - start, ok)
+        return response, ok
+
+    def _failover(self, candidates: List[EndpointHealth], send: Callable[[HTTPProvider], Any]) -> Any:
+        last_error: Optional[Exception] = None
+        fallback: Any = None
+        for endpoint in candidates:
+            try:
+                response, ok = self._send(endpoint, send)
+            except Exception as exc:
+                last_error = exc
+                continue
+            if ok:
+                return response
+            fallback = response
+        if fallback is not None:
+            return fallback
+        raise last_error or ConnectionError("no RPC endpoint available")
+
+    def _hedged(self, candidates: List[EndpointHealth], send: Callable[[HTTPProvider], Any]) -> Any:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="monitor-rpc-hedge")
+        futures = {self._executor.submit(self._send, candidates[0], send): candidates[0]}
+        done, _ = wait(futures, timeout=self._hedge_after)
+        if not done:
+            if self._hedges is not None:
+                self._hedges.inc(endpoint=candidates[1].label)
+            futures[self._executor.submit(self._send, candidates[1], send)] = candidates[1]
+
+        fallback: Any = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response, ok = future.result()
+                except Exception:
+                    continue
+                if ok:
+                    return response
+                fallback = response
+        remaining = [endpoint for endpoint in candidates if endpoint not in futures.values()]
+        if remaining:
+            return self._failover(remaining, send)
+        if fallback is not None:
+            return fallback
+        raise ConnectionError("all RPC endpoints failed")
+
+
+if AsyncHTTPProvider is not None:
+    from web3.providers.async_base import AsyncBaseProvider
+
+    class PooledAsyncHTTPProvider(AsyncBaseProvider):  # type: ignore[misc, valid-type]
+        """Async counterpart of :class:`PooledHTTPProvider`."""
+
+        def __init__(
+            self,
+            pool: EndpointPool,
+            metrics: Optional[MetricsRegistry] = None,
+            *,
+            hedge_after: Optional[float] = None,
+            provider_factory: Optional[Callable[[str], Any]] = None,
+        ) -> None:
+            super().__init__()
+            self._pool = pool
+            self._hedge_after = hedge_after
+            if provider_factory is None:
+                provider_factory = (
+                    (lambda url: InstrumentedAsyncHTTPProvider(url, metrics))
+                    if metrics is not None
+                    else AsyncHTTPProvider
+                )
+            self._providers: Dict[str, Any] = {
+                endpoint.url: provider_factory(endpoint.url) for endpoint in pool.endpoints
+            }
+            self._hedges = (
+                metrics.counter("monitor_rpc_hedges_total", "Reads re-sent to a second endpoint.")
+                if metrics is not None
+                else None
+            )
+
+        async def is_connected(self, show_traceback: bool = False) -> bool:
+            for endpoint in self._pool.ranked():
+                if await self._providers[endpoint.url].is_connected(show_traceback):
+                    return True
+            return False
+
+        async def make_request(self, method, params):
+            return await self._route(str(method), lambda provider: provider.make_request(method, params))
+
+        async def make_batch_request(self, requests: List[Tuple[str, Any]]) -> List[Any]:
+            method = "eth_call" if all(str(name) in READ_METHODS for name, _ in requests) else "batch"
+            return await self._route(method, lambda provider: provider.make_batch_request(requests))
+
+        async def _route(self, method: str, send: Callable[[Any], Awaitable[Any]]) -> Any:
+            candidates = self._pool.ranked()
+            if method not in READ_METHODS:
+                return (await self._send(candidates[0], send))[0]
+            if self._hedge_after is not None and len(candidates) > 1:
+                return await self._hedged(candidates, send)
+            return await self._failover(candidates, send)
+
+        async def _send(self, endpoint: EndpointHealth, send: Callable[[Any], Awaitable[Any]]) -> Tuple[Any, bool]:
+            start = time.perf_counter()
+            try:
+                response = await send(self._providers[endpoint.url])
+            except Exception:
+                self._pool.record(endpoint, time.perf_counter() - start, False)
+                raise
+            ok = not is_endpoint_failure(response)
+            self._pool.record(endpoint, time.perf_counter() - start, ok)
+            return response, ok
+
+        async def _failover(self, candidates: List[EndpointHealth], send: Callable[[Any], Awaitable[Any]]) -> Any:
+            last_error: Optional[Exception] = None
+            fallback: Any = None
+            for endpoint in candidates:
+                try:
+                    response, ok = await self._send(endpoint, send)
+                except Exception as exc:
+                    last_error = exc
+                    continue
+                if ok:
+                    return response
+                fallback = response
+            if fallback is not None:
+                return fallback
+            raise last_error or ConnectionError("no RPC endpoint available")
+
+        async def _hedged(self, candidates: List[EndpointHealth], send: Callable[[Any], Awaitable[Any]]) -> Any:
+            tasks = {asyncio.ensure_future(self._send(candidates[0], send)): candidates[0]}
+            done, _ = await asyncio.wait(tasks, timeout=self._hedge_after)
+            if not done:
+                if self._hedges is not None:
+                    self._hedges.inc(endpoint=candidates[1].label)
+                tasks[asyncio.ensure_future(self._send(candidates[1], send))] = candidates[1]
+
+            fallback: Any = None
+            pending = set(tasks)
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        try:
+                            response, ok = task.result()
+                        except Exception:
+                            continue
+                        if ok:
+                            return response
+                        fallback = response
+            finally:
+                for task in pending:
+                    task.cancel()
+            remaining = [endpoint for endpoint in candidates if endpoint not in tasks.values()]
+            if remaining:
+                return await self._failover(remaining, send)
+            if fallback is not None:
+                return fallback
+            raise ConnectionError("all RPC endpoints failed")
+
+else:  # pragma: no cover - optional dependency
+    PooledAsyncHTTPProvider = None  # type: ignore
+
+
 @dataclass
 class ConnectionBundle:
     http: Web3
     async_client: Optional["AsyncWeb3"]
+    chain_id: Optional[int] = None
 
 
 class Web3ConnectionManager:
-    def __init__(self, rpc: RpcConfig) -> None:
+    def __init__(self, rpc: RpcConfig, metrics: Optional[MetricsRegistry] = None) -> None:
         self._rpc = rpc
+        self._metrics = metrics
         self._bundle: Optional[ConnectionBundle] = None
         self._lock = asyncio.Lock()
+        self._pool: Optional[EndpointPool] = None
+        self._call_cache: Optional[CallCache] = (
+            CallCache(rpc.call_cache_size, metrics) if rpc.call_cache_size > 0 else None
+        )
+        if len(rpc.endpoints) > 1:
+            self._pool = EndpointPool(
+                rpc.endpoints,
+                eject_after_errors=rpc.eject_after_errors,
+                eject_seconds=rpc.eject_seconds,
+                metrics=metrics,
+            )
+
+    @property
+    def endpoint_pool(self) -> Optional[EndpointPool]:
+        return self._pool
+
+    @property
+    def call_cache(self) -> Optional[CallCache]:
+        return self._call_cache
 
     async def get_connections(self) -> ConnectionBundle:
         async with self._lock:
@@ -43,24 +339,103 @@ class Web3ConnectionManager:
         return self._bundle
 
     async def _create_bundle(self) -> ConnectionBundle:
-        http_client = Web3(HTTPProvider(self._rpc.http))
+        if self._pool is not None:
+            http_client, async_client = self._create_pooled_clients()
+        elif self._rpc.batch_window_ms is not None:
+            http_client, async_client = self._create_batching_clients()
+        else:
+            http_client, async_client = self._create_default_clients()
+        if async_client is not None and getattr(async_client.provider, "has_persistent_connection", False):
+            await async_client.provider.connect()
+        return self._finish_bundle(http_client, async_client)
+
+    def _create_default_clients(self) -> Tuple[Web3, Optional["AsyncWeb3"]]:
+        if self._metrics is not None:
+            http_client = Web3(InstrumentedHTTPProvider(self._rpc.http, self._metrics))
+        else:
+            http_client = Web3(HTTPProvider(self._rpc.http))
         async_client: Optional["AsyncWeb3"] = None
 
         if AsyncWeb3 is not None:
-            if self._rpc.websocket and AsyncWebsocketProvider is not None:
-                async_client = AsyncWeb3(AsyncWebsocketProvider(self._rpc.websocket))
+            if self._rpc.websocket and WebSocketProvider is not None:
+                async_client = AsyncWeb3(WebSocketProvider(self._rpc.websocket))
+            elif self._metrics is not None and InstrumentedAsyncHTTPProvider is not None:
+                async_client = AsyncWeb3(InstrumentedAsyncHTTPProvider(self._rpc.http, self._metrics))
             elif AsyncHTTPProvider is not None:
                 async_client = AsyncWeb3(AsyncHTTPProvider(self._rpc.http))
+        return http_client, async_client
+
+    def _create_batching_clients(self) -> Tuple[Web3, Optional["AsyncWeb3"]]:
+        http_client = Web3(self._batching_provider(self._rpc.http))
+        async_client: Optional["AsyncWeb3"] = None
+        if AsyncWeb3 is not None:
+            if self._rpc.websocket and WebSocketProvider is not None:
+                async_client = AsyncWeb3(WebSocketProvider(self._rpc.websocket))
+            elif BatchingAsyncHTTPProvider is not None:
+                async_client = AsyncWeb3(self._batching_async_provider(self._rpc.http))
+        return http_client, async_client
+
+    def _create_pooled_clients(self) -> Tuple[Web3, Optional["AsyncWeb3"]]:
+        hedge_after = self._rpc.hedge_after_ms / 1000 if self._rpc.hedge_after_ms else None
+        batching = self._rpc.batch_window_ms is not None
+        http_client = Web3(
+            PooledHTTPProvider(
+                self._pool,
+                self._metrics,
+                hedge_after=hedge_after,
+                provider_factory=self._batching_provider if batching else None,
+            )
+        )
+        async_client: Optional["AsyncWeb3"] = None
+        if AsyncWeb3 is not None and PooledAsyncHTTPProvider is not None:
+            async_factory = (
+                self._batching_async_provider if batching and BatchingAsyncHTTPProvider is not None else None
+            )
+            async_client = AsyncWeb3(
+                PooledAsyncHTTPProvider(
+                    self._pool,
+                    self._metrics,
+                    hedge_after=hedge_after,
+                    provider_factory=async_factory,
+                )
+            )
+        return http_client, async_client
+
+    def _batching_provider(self, url: str) -> BatchingHTTPProvider:
+        return BatchingHTTPProvider(
+            url,
+            metrics=self._metrics,
+            window=(self._rpc.batch_window_ms or 0) / 1000,
+            max_batch_size=self._rpc.max_batch_size,
+        )
+
+    def _batching_async_provider(self, url: str) -> Any:
+        return BatchingAsyncHTTPProvider(
+            url,
+            metrics=self._metrics,
+            window=(self._rpc.batch_window_ms or 0) / 1000,
+            max_batch_size=self._rpc.max_batch_size,
+        )
+
+    def _finish_bundle(self, http_client: Web3, async_client: Optional["AsyncWeb3"]) -> ConnectionBundle:
+        if self._call_cache is not None:
+            http_client.provider = CachingProvider(http_client.provider, self._call_cache)
+            if (
+                async_client is not None
+                and AsyncCachingProvider is not None
+                and not getattr(async_client.provider, "has_persistent_connection", False)
+            ):
+                async_client.provider = AsyncCachingProvider(async_client.provider, self._call_cache)
 
         if not http_client.is_connected():  # pragma: no cover - runtime guard
             raise ConnectionError(f"Failed to connect HTTP provider {self._rpc.http}")
 
-        if async_client and degen_connection_manager is not None:
-            try:
-                chain_id = http_client.eth.chain_id
-            except Exception:  # pragma: no cover - runtime guard
-                chain_id = None
-            if chain_id is not None:
-                degen_connection_manager.connections[chain_id] = async_client
+        try:
+            chain_id: Optional[int] = int(http_client.eth.chain_id)
+        except Exception:  # pragma: no cover - runtime guard
+            chain_id = None
+
+        if async_client and degen_connection_manager is not None and chain_id is not None:
+            degen_connection_manager.connections[chain_id] = async_client
 
-        return ConnectionBundle(http=http_client, async_client=async_client)
+        return ConnectionBundle(http=http_client, async_client=async_client, chain_id=chain_id)
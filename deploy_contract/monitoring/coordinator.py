@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import hashlib
+import multiprocessing
+import os
+import queue as queue_module
+import re
+import time
+import traceback
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import MonitorConfig, load_config
+from .profiling import SignalProfiler
+from .service import EvaluationContext, MonitorService, log_contexts
+from .state_store import JournalStateBackend, Record, open_state_backend
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.sha1(value.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent-hash ring mapping token addresses to shard indexes.
+
+    Each shard owns ``replicas`` virtual points, so adding a shard only moves
+    roughly ``1/shards`` of the tokens.
+    """
+
+    def __init__(self, shards: int, replicas: int = 64) -> None:
+        if shards < 1:
+            raise ValueError("HashRing needs at least one shard")
+        self.shards = shards
+        points = sorted(
+            (_hash(f"shard-{shard}-{replica}"), shard)
+            for shard in range(shards)
+            for replica in range(replicas)
+        )
+        self._keys = [point for point, _ in points]
+        self._owners = [shard for _, shard in points]
+
+    def shard_for(self, address: str) -> int:
+        index = bisect.bisect(self._keys, _hash(address.lower())) % len(self._keys)
+        return self._owners[index]
+
+
+def _shard_path(path: Optional[Path], shard: int) -> Optional[Path]:
+    if path is None:
+        return None
+    return path.with_name(f"{path.stem}.shard{shard}{path.suffix}")
+
+
+def partition_config(config: MonitorConfig, ring: HashRing, shard: int) -> MonitorConfig:
+    """Return the slice of ``config`` owned by ``shard``.
+
+    State, metadata and TWAP files get a per-shard suffix so strategy state
+    for a token is only ever written by the shard that owns it. A SQLite
+    state database is shared as-is; shards write disjoint keys.
+    """
+    return replace(
+        config,
+        tokens=[token for token in config.tokens if ring.shard_for(token.address) == shard],
+        state_file=config.state_file if config.state_backend == "sqlite" else _shard_path(config.state_file, shard),
+        metadata_file=_shard_path(config.metadata_file, shard),
+        twap_file=_shard_path(config.twap_file, shard),
+    )
+
+
+def _shard_state_files(path: Path) -> List[Path]:
+    """Shard state files next to ``path``, including journal-only ones."""
+    if not path.parent.is_dir():
+        return []
+    pattern = re.compile(rf"({re.escape(path.stem)}\.shard\d+{re.escape(path.suffix)})(\.journal)?")
+    names = {match.group(1) for match in map(pattern.fullmatch, os.listdir(path.parent)) if match}
+    return [path.with_name(name) for name in sorted(names)]
+
+
+def rebalance_state(config: MonitorConfig, ring: Optional[HashRing]) -> None:
+    """Fold per-shard state files into ``state_file`` and split it for ``ring``.
+
+    Every shard file only ever holds keys its shard owned in the run that
+    wrote it, so merging them over ``state_file`` yields the latest state
+    whatever the previous shard count was. The merged state is written back
+    to ``state_file`` before the old shard files are removed, then each
+    shard of ``ring`` is seeded with the keys it owns (``ring=None`` only
+    folds, for a single-process run). Call it before any monitor starts;
+    SQLite state is shared and left alone.
+    """
+    if config.state_file is None or config.state_backend == "sqlite":
+        return
+    shared = open_state_backend(config.state_file, config.state_backend)
+    merged: Dict[str, Record] = shared.load()
+    shard_files = _shard_state_files(config.state_file)
+    for path in shard_files:
+        merged.update(open_state_backend(path, config.state_backend).load())
+    if shard_files:
+        shared.write(merged)
+        if isinstance(shared, JournalStateBackend):
+            shared.compact()
+        for path in shard_files:
+            path.unlink(missing_ok=True)
+            path.with_name(path.name + ".journal").unlink(missing_ok=True)
+    if ring is None:
+        return
+    for shard in range(ring.shards):
+        owned = {key: record for key, record in merged.items() if ring.shard_for(key.partition("::")[0]) == shard}
+        if owned:
+            open_state_backend(_shard_path(config.state_file, shard), config.state_backend).write(owned)
+
+
+@dataclass
+class ShardReport:
+    shard: int
+    contexts: List[EvaluationContext] = field(default_factory=list)
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+
+def _run_worker(
+    config_path: str,
+    shard: int,
+    shards: int,
+    results: "multiprocessing.Queue[ShardReport]",
+    interval_seconds: int,
+    service_kwargs: Dict[str, Any],
+    profile_dir: Optional[Path] = None,
+) -> None:
+    config = partition_config(load_config(config_path), HashRing(shards), shard)
+    service = MonitorService(config, **service_kwargs)
+    if profile_dir is not None:
+        SignalProfiler(profile_dir / f"shard{shard}").install()
+    print(f"[monitor] shard {shard}/{shards} (pid {os.getpid()}) tracking {len(config.tokens)} token(s)")
+
+    async def loop() -> None:
+        while True:
+            start = time.time()
+            try:
+                contexts = await service.run_once()
+                report = ShardReport(shard=shard, contexts=contexts)
+            except Exception as exc:
+                report = ShardReport(shard=shard, error=f"{exc}\n{traceback.format_exc()}")
+            report.elapsed = time.time() - start
+            results.put(report)
+            await asyncio.sleep(max(0, interval_seconds - report.elapsed))
+
+    asyncio.run(loop())
+
+
+class ShardCoordinator:
+    """Runs one ``MonitorService`` per shard in separate processes.
+
+    Tokens are assigned to shards by consistent hashing of their address. Each
+    worker builds its own connection manager, price sources and strategy
+    engine and reports ``EvaluationContext`` results back over a queue.
+    Auto discovery is disabled in workers because every shard would otherwise
+    rewrite the shared config file. JSON and journal state is re-split across
+    the shards on every start (see :func:`rebalance_state`), so changing the
+    worker count keeps baselines and cooldowns. With ``profile_dir`` each worker installs
+    the SIGUSR1/SIGUSR2 sampler, writing to ``<profile_dir>/shard<n>``.
+    """
+
+    def __init__(
+        self,
+        config_path: str | Path,
+        workers: int,
+        *,
+        interval_seconds: int = 60,
+        on_report: Optional[Callable[[ShardReport], None]] = None,
+        profile_dir: Optional[Path] = None,
+        **service_kwargs: Any,
+    ) -> None:
+        self._config_path = str(config_path)
+        self._workers = max(1, workers)
+        self._interval = interval_seconds
+        self._profile_dir = Path(profile_dir) if profile_dir is not None else None
+        self._on_report = on_report or self._log_report
+        service_kwargs.pop("auto_discover", None)
+        service_kwargs.pop("metrics_port", None)
+        self._service_kwargs = service_kwargs
+        self._context = multiprocessing.get_context("spawn")
+        self._results = self._context.Queue()
+        self._processes: Dict[int, multiprocessing.process.BaseProcess] = {}
+
+    def start(self) -> None:
+        rebalance_state(load_config(self._config_path), HashRing(self._workers))
+        for shard in range(self._workers):
+            self._spawn(shard)
+
+    def stop(self) -> None:
+        for process in self._processes.values():
+            process.terminate()
+        for process in self._processes.values():
+            process.join(timeout=5)
+        self._processes.clear()
+
+    def run(self, poll_timeout: float = 1.0) -> None:
+        self.start()
+        try:
+            while True:
+                try:
+                    report = self._results.get(timeout=poll_timeout)
+                except queue_module.Empty:
+                    report = None
+                if report is not None:
+                    self._on_report(report)
+                self._restart_dead_workers()
+        finally:
+            self.stop()
+
+    def _spawn(self, shard: int) -> None:
+        process = self._context.Process(
+            target=_run_worker,
+            args=(
+                self._config_path,
+                shard,
+                self._workers,
+                self._results,
+                self._interval,
+                self._service_kwargs,
+                self._profile_dir,
+            ),
+            name=f"monitor-shard-{shard}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[shard] = process
+
+    def _restart_dead_workers(self) -> None:
+        for shard, process in list(self._processes.items()):
+            if not process.is_alive():
+                print(f"[monitor] shard {shard} exited with {process.exitcode}; restarting")
+                self._spawn(shard)
+
+    @staticmethod
+    def _log_report(report: ShardReport) -> None:
+        prefix = f"[monitor:shard{report.shard}]"
+        if report.error:
+            print(f"{prefix} cycle error: {report.error}")
+            return
+        log_contexts(report.contexts, prefix=prefix)
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from typing import Dict, Iterable, List, Optional, Set
+
+from eth_abi import decode as abi_decode
+from web3 import Web3
+
+from .price_sources import PoolSnapshot
+
+SYNC_TOPIC = Web3.keccak(text="Sync(uint112,uint112)")
+SWAP_V3_TOPIC = Web3.keccak(text="Swap(address,address,int256,int256,uint160,uint128,int24)")
+
+
+def _topic_hex(topic: bytes) -> str:
+    return "0x" + bytes(topic).hex()
+
+
+class PoolStateTracker:
+    """In-memory pool state kept current from Uniswap ``Sync``/``Swap`` logs.
+
+    Pools are seeded from a full read and then advanced with ``eth_getLogs``
+    over all tracked addresses, so quiet pools cost nothing between cycles.
+    Both events carry absolute state (reserves, sqrtPriceX96, tick), which
+    makes re-applying a log idempotent. A full resync is requested every
+    ``resync_blocks`` blocks and whenever a log fetch fails.
+
+    ``eth_getLogs`` never reports reorged logs as ``removed`` (only
+    subscriptions do), so reorgs are detected by block hash instead: the
+    hash of the synced block is kept and must still be canonical before the
+    tracker advances, and the hash of the target block must not change while
+    its logs are fetched. Either mismatch requests a resync.
+    """
+
+    def __init__(
+        self,
+        *,
+        resync_blocks: int = 300,
+        max_log_range: int = 2_000,
+    ) -> None:
+        self._resync_blocks = max(1, resync_blocks)
+        self._max_log_range = max(1, max_log_range)
+        self._snapshots: Dict[str, PoolSnapshot] = {}
+        self._synced_block: Optional[int] = None
+        self._synced_hash: Optional[bytes] = None
+        self._last_resync_block: Optional[int] = None
+
+    @property
+    def synced_block(self) -> Optional[int]:
+        return self._synced_block
+
+    @property
+    def pools(self) -> Set[str]:
+        """Lower-cased addresses of the pools being tracked."""
+        return set(self._snapshots)
+
+    def snapshot(self, pool_address: str) -> Optional[PoolSnapshot]:
+        snapshot = self._snapshots.get(pool_address.lower())
+        return replace(snapshot) if snapshot is not None else None
+
+    def needs_resync(self, block_number: int) -> bool:
+        if self._synced_block is None or self._last_resync_block is None:
+            return True
+        return block_number - self._last_resync_block >= self._resync_blocks
+
+    def seed(self, pool_address: str, snapshot: PoolSnapshot) -> None:
+        self._snapshots[pool_address.lower()] = replace(
+            snapshot,
+            tick_cumulatives=None,
+            price_cumulative=None,
+            timestamp=None,
+        )
+
+    def request_resync(self) -> None:
+        self._last_resync_block = None
+
+    def mark_synced(self, block_number: int, *, block_hash: Optional[bytes] = None, full: bool = False) -> None:
+        """Record that the snapshots reflect ``block_number``.
+
+        ``block_hash`` is the hash the block had when it was read; it is kept
+        from :meth:`advance` when omitted for the block already synced. A
+        synced block without a hash cannot be checked for reorgs, so the next
+        :meth:`advance` asks for a resync.
+        """
+        if block_hash is not None or block_number != self._synced_block:
+            self._synced_hash = bytes(block_hash) if block_hash is not None else None
+        self._synced_block = block_number
+        if full:
+            self._last_resync_block = block_number
+
+    def block_hash(self, w3: Web3, block_number: int) -> Optional[bytes]:
+        try:
+            return bytes(w3.eth.get_block(block_number)["hash"])
+        except Exception as exc:
+            print(f"[monitor] eth_getBlockByNumber({block_number}) failed ({exc})")
+            return None
+
+    def forget(self, pool_addresses: Iterable[str]) -> None:
+        for address in pool_addresses:
+            self._snapshots.pop(address.lower(), None)
+
+    def advance(self, w3: Web3, to_block: int) -> bool:
+        """Apply logs up to ``to_block``; returns False when a resync is needed."""
+        if self._synced_block is None:
+            return False
+        if to_block <= self._synced_block or not self._snapshots:
+            return True
+        if to_block - self._synced_block > self._resync_blocks:
+            return False
+        if self._synced_hash is None or self.block_hash(w3, self._synced_block) != self._synced_hash:
+            print(f"[monitor] block {self._synced_block} is no longer canonical; scheduling pool resync")
+            self.request_resync()
+            return False
+        target_hash = self.block_hash(w3, to_block)
+        if target_hash is None:
+            self.request_resync()
+            return False
+
+        addresses = [Web3.to_checksum_address(address) for address in self._snapshots]
+        start = self._synced_block + 1
+        logs: List[dict] = []
+        try:
+            while start <= to_block:
+                end = min(to_block, start + self._max_log_range - 1)
+                logs.extend(
+                    w3.eth.get_logs(
+                        {
+                            "fromBlock": start,
+                            "toBlock": end,
+                            "address": addresses,
+                            "topics": [[_topic_hex(SYNC_TOPIC), _topic_hex(SWAP_V3_TOPIC)]],
+                        }
+                    )
+                )
+                start = end + 1
+        except Exception as exc:
+            print(f"[monitor] eth_getLogs failed ({exc}); scheduling pool resync")
+            self.request_resync()
+            return False
+
+        if self.block_hash(w3, to_block) != target_hash:
+            print(f"[monitor] block {to_block} was reorged while its logs were fetched; scheduling pool resync")
+            self.request_resync()
+            return False
+
+        logs.sort(key=lambda log: (log["blockNumber"], log["logIndex"]))
+        for log in logs:
+            self._apply(log)
+        self._synced_block = to_block
+        self._synced_hash = target_hash
+        return True
+
+    def _apply(self, log: dict) -> None:
+        snapshot = self._snapshots.get(str(log["address"]).lower())
+        if snapshot is None or not log["topics"]:
+            return
+        topic = bytes(log["topics"][0])
+        data = bytes(log["data"])
+        if topic == SYNC_TOPIC:
+            reserve0, reserve1 = abi_decode(["uint112", "uint112"], data)
+            snapshot.reserve0 = reserve0
+            snapshot.reserve1 = reserve1
+        elif topic == SWAP_V3_TOPIC:
+            _, _, sqrt_price_x96, _, tick = abi_decode(
+                ["int256", "int256", "uint160", "uint128", "int24"],
+                data,
+            )
+            snapshot.sqrt_price_x96 = sqrt_price_x96
+            snapshot.tick = tick
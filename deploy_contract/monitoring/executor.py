@@ -1,16 +1,23 @@
 from __future__ import annotations
 
 import time
-from dataclasses import dataclass
-from decimal import Decimal
-from typing import Dict, Optional
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from web3 import Web3
+from web3.types import BlockIdentifier
 
 from .config import MonitorConfig, PoolConfig
+from .fixed_point import FixedPrice
 from .inventory import ERC20_ABI
+from .metadata_store import ChainMetadata, MetadataStore
+from .price_sources import PoolSnapshot
 from .strategy import StrategyDecision
+from .v2_sizing import DEFAULT_FEE_BPS, quote_candidates, size_sell
+from .v3_simulator import V3PoolState, V3StateLoader, simulate_exact_input
 
+# HOLD reason for a triggered V2 sell that no size can fill.
+NO_SIZE_REASON = "no size within impact budget"
 
 UNISWAP_V3_ROUTER_ABI = [
     {
@@ -87,6 +94,7 @@ class SwapExecution:
     min_amount_out: int
     recipient: str
     payload: bytes
+    expected_amount_out: Optional[int] = None
 
 
 class DexAdapter:
@@ -160,10 +168,17 @@ class UniswapV2Adapter(DexAdapter):
 
 
 class SwapExecutor:
-    def __init__(self, w3: Web3, config: MonitorConfig) -> None:
+    def __init__(
+        self,
+        w3: Web3,
+        config: MonitorConfig,
+        metadata: Optional[ChainMetadata] = None,
+        v3_states: Optional[V3StateLoader] = None,
+    ) -> None:
         self._w3 = w3
         self._config = config
-        self._decimals_cache: Dict[str, int] = {}
+        self._metadata = metadata if metadata is not None else MetadataStore().view(0)
+        self._v3_states = v3_states
         self._vault_contract = w3.eth.contract(
             address=Web3.to_checksum_address(config.vault_address),
             abi=AIRSHIP_VAULT_ABI,
@@ -173,9 +188,24 @@ class SwapExecutor:
         self,
         decision: StrategyDecision,
         pool: PoolConfig,
-        price: Decimal,
+        price: FixedPrice,
         timestamp: Optional[int] = None,
-    ) -> SwapExecution:
+        *,
+        snapshot: Optional[PoolSnapshot] = None,
+        block_identifier: BlockIdentifier = "latest",
+    ) -> Optional[SwapExecution]:
+        """Build the vault swap for ``decision``.
+
+        For V2 pools with reserves in ``snapshot`` the minimum output comes
+        from ``getAmountOut``, and the sell is cut to the largest size within
+        ``max_price_impact_bps``. For V3 pools with a :class:`V3StateLoader`
+        it comes from a local swap simulation at ``block_identifier``, and a
+        sell that runs past the loaded ticks is cut to the part the
+        simulation covered. Otherwise it is derived from ``price``. Returns
+        None when a V2 pair is drained, no size fits the impact budget, or a
+        V3 swap cannot be simulated past the current tick
+        (:data:`NO_SIZE_REASON`).
+        """
         if timestamp is None:
             timestamp = int(time.time())
 
@@ -185,11 +215,30 @@ class SwapExecutor:
         quote_decimals = self._get_decimals(token_out_address)
         base_decimals = decision.token_inventory.decimals
 
-        amount_in_decimal = Decimal(decision.sell_amount) / Decimal(10) ** base_decimals
-        expected_out_decimal = amount_in_decimal * price
-        slippage_factor = Decimal(1) - Decimal(decision.slippage_bps) / Decimal(10_000)
-        min_out_decimal = expected_out_decimal * slippage_factor
-        min_out = int(min_out_decimal * Decimal(10) ** quote_decimals)
+        expected_out: Optional[int] = None
+        if self._is_v2(pool) and snapshot is not None and snapshot.reserve0 is not None:
+            sized = self._size_v2(decision, pool, snapshot)
+            if sized is None:
+                return None
+            amount_in, expected_out = sized
+            if amount_in != decision.sell_amount:
+                decision = replace(decision, sell_amount=amount_in)
+        else:
+            simulated = self._simulate_v3(decision, pool, snapshot, block_identifier)
+            if simulated is not None:
+                amount_in, expected_out = simulated
+                if amount_in <= 0:
+                    return None
+                if amount_in != decision.sell_amount:
+                    decision = replace(decision, sell_amount=amount_in)
+        if expected_out is not None:
+            min_out = expected_out * (10_000 - decision.slippage_bps) // 10_000
+        else:
+            min_out = price.quote_amount(
+                decision.sell_amount * (10_000 - decision.slippage_bps),
+                base_decimals,
+                quote_decimals,
+            ) // 10_000
         if min_out <= 0:
             min_out = 1
 
@@ -206,6 +255,7 @@ class SwapExecutor:
             min_amount_out=min_out,
             recipient=recipient,
             payload=adapter_call.payload,
+            expected_amount_out=expected_out,
         )
 
     def build_vault_tx(self, execution: SwapExecution, sender: str) -> Dict[str, object]:
@@ -229,24 +279,149 @@ class SwapExecutor:
         }
         return tx
 
+    def quote_sizes(
+        self,
+        decision: StrategyDecision,
+        pool: PoolConfig,
+        snapshot: Optional[PoolSnapshot],
+        amounts: Sequence[int],
+        block_identifier: BlockIdentifier = "latest",
+    ) -> Optional[List[int]]:
+        """Expected output of selling each of ``amounts`` through ``pool``.
+
+        Uses ``getAmountOut`` on the snapshot reserves for V2 pools and the
+        local swap simulation for V3 pools; None when neither is available.
+        """
+        if self._is_v2(pool):
+            if snapshot is None or snapshot.reserve0 is None:
+                return None
+            reserve_in, reserve_out = self._v2_reserves(decision, snapshot)
+            return quote_candidates(amounts, reserve_in, reserve_out, self._resolve_fee_bps(pool)).amounts_out
+        zero_for_one = self._v3_zero_for_one(decision, pool, snapshot)
+        state = self._load_v3_state(pool, block_identifier) if zero_for_one is not None else None
+        if state is None:
+            return None
+        return [simulate_exact_input(state, int(amount), zero_for_one).amount_out for amount in amounts]
+
+    @staticmethod
+    def _v2_reserves(decision: StrategyDecision, snapshot: PoolSnapshot) -> Tuple[int, int]:
+        if snapshot.token0.lower() == decision.token_inventory.config.address.lower():
+            return snapshot.reserve0, snapshot.reserve1
+        return snapshot.reserve1, snapshot.reserve0
+
+    def _size_v2(
+        self,
+        decision: StrategyDecision,
+        pool: PoolConfig,
+        snapshot: PoolSnapshot,
+    ) -> Optional[Tuple[int, int]]:
+        reserve_in, reserve_out = self._v2_reserves(decision, snapshot)
+        max_impact_bps = self._resolve_max_impact(pool)
+        size = size_sell(
+            int(decision.sell_amount),
+            reserve_in,
+            reserve_out,
+            fee_bps=self._resolve_fee_bps(pool),
+            max_impact_bps=max_impact_bps,
+        )
+        if size is None:
+            print(
+                f"[monitor] no sell size on {pool.address} within {max_impact_bps} bps price impact "
+                f"(reserves {reserve_in}/{reserve_out})"
+            )
+            return None
+        if size.amount_in < decision.sell_amount:
+            print(
+                f"[monitor] sell on {pool.address} cut to {size.amount_in} of {decision.sell_amount} "
+                f"({size.impact_bps} bps impact, budget {max_impact_bps})"
+            )
+        return size.amount_in, size.amount_out
+
+    def _resolve_fee_bps(self, pool: PoolConfig) -> int:
+        metadata_value = pool.metadata.get("fee_bps") if pool.metadata else None
+        if metadata_value is not None:
+            return int(metadata_value)
+        return DEFAULT_FEE_BPS
+
+    def _resolve_max_impact(self, pool: PoolConfig) -> Optional[int]:
+        metadata_value = pool.metadata.get("max_price_impact_bps") if pool.metadata else None
+        if metadata_value is not None:
+            return int(metadata_value)
+        return self._config.strategy.max_price_impact_bps
+
+    def _simulate_v3(
+        self,
+        decision: StrategyDecision,
+        pool: PoolConfig,
+        snapshot: Optional[PoolSnapshot],
+        block_identifier: BlockIdentifier,
+    ) -> Optional[Tuple[int, int]]:
+        """``(amount_in, amount_out)`` of the simulated sell; None without pool state.
+
+        The output is only exact for the input the simulation covered, so a
+        swap that leaves the loaded tick range is cut to ``amount_in_used``.
+        """
+        zero_for_one = self._v3_zero_for_one(decision, pool, snapshot)
+        state = self._load_v3_state(pool, block_identifier) if zero_for_one is not None else None
+        if state is None:
+            return None
+        simulation = simulate_exact_input(state, int(decision.sell_amount), zero_for_one)
+        if not simulation.complete:
+            if simulation.amount_in_used <= 0:
+                print(f"[monitor] no sell size on {pool.address}: the swap leaves the loaded tick range at once")
+            else:
+                print(
+                    f"[monitor] sell on {pool.address} cut to {simulation.amount_in_used} of "
+                    f"{simulation.amount_in}: the swap leaves the loaded tick range"
+                )
+        return simulation.amount_in_used, simulation.amount_out
+
+    def _v3_zero_for_one(
+        self,
+        decision: StrategyDecision,
+        pool: PoolConfig,
+        snapshot: Optional[PoolSnapshot],
+    ) -> Optional[bool]:
+        if self._v3_states is None or pool.type.lower() not in {"uniswap_v3", "univ3"}:
+            return None
+        if snapshot is not None:
+            token0 = snapshot.token0
+        else:
+            tokens = self._metadata.get_pool_tokens(pool.address)
+            if not tokens:
+                return None
+            token0 = tokens[0]
+        return token0.lower() == decision.token_inventory.config.address.lower()
+
+    def _load_v3_state(self, pool: PoolConfig, block_identifier: BlockIdentifier) -> Optional[V3PoolState]:
+        try:
+            return self._v3_states.load(self._w3, pool, block_identifier)
+        except Exception as exc:
+            print(f"[monitor] V3 swap simulation unavailable for {pool.address}: {exc}")
+            return None
+
+    @staticmethod
+    def _is_v2(pool: PoolConfig) -> bool:
+        return pool.type.lower() in {"uniswap_v2", "univ2", "sushiswap"}
+
     def _select_adapter(self, pool: PoolConfig) -> DexAdapter:
         pool_type = pool.type.lower()
         if pool_type in {"uniswap_v3", "univ3"}:
             return UniswapV3Adapter(self._w3, pool, self._config)
-        if pool_type in {"uniswap_v2", "univ2", "sushiswap"}:
+        if self._is_v2(pool):
             return UniswapV2Adapter(self._w3, pool, self._config)
         raise ValueError(f"Unsupported adapter type: {pool.type}")
 
     def _get_decimals(self, token_address: str) -> int:
-        key = token_address.lower()
-        if key not in self._decimals_cache:
+        decimals = self._metadata.get_decimals(token_address)
+        if decimals is None:
             contract = self._w3.eth.contract(
                 address=Web3.to_checksum_address(token_address),
                 abi=ERC20_ABI,
             )
-            decimals = contract.functions.decimals().call()
-            self._decimals_cache[key] = int(decimals)
-        return self._decimals_cache[key]
+            decimals = int(contract.functions.decimals().call())
+            self._metadata.set_token(token_address, decimals=decimals)
+        return decimals
 
     def _resolve_recipient(self, pool: PoolConfig) -> str:
         if pool.metadata and pool.metadata.get("recipient"):
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import functools
+from dataclasses import dataclass
+from decimal import Decimal, localcontext
+from math import gcd
+from typing import Union
+
+Q96 = 1 << 96
+Q128 = 1 << 128
+Q192 = 1 << 192
+
+MIN_TICK = -887272
+MAX_TICK = 887272
+MIN_SQRT_RATIO = 4295128739
+MAX_SQRT_RATIO = 1461446703485210103287273052203988822378723970342
+
+MAX_UINT256 = (1 << 256) - 1
+
+# TickMath.getSqrtRatioAtTick magic numbers: 1 / sqrt(1.0001) ** (2 ** i) in Q128.
+TICK_FACTORS = (
+    (0x1, 0xFFFCB933BD6FAD37AA2D162D1A594001),
+    (0x2, 0xFFF97272373D413259A46990580E213A),
+    (0x4, 0xFFF2E50F5F656932EF12357CF3C7FDCC),
+    (0x8, 0xFFE5CACA7E10E4E61C3624EAA0941CD0),
+    (0x10, 0xFFCB9843D60F6159C9DB58835C926644),
+    (0x20, 0xFF973B41FA98C081472E6896DFB254C0),
+    (0x40, 0xFF2EA16466C96A3843EC78B326B52861),
+    (0x80, 0xFE5DEE046A99A2A811C461F1969C3053),
+    (0x100, 0xFCBE86C7900A88AEDCFFC83B479AA3A4),
+    (0x200, 0xF987A7253AC413176F2B074CF7815E54),
+    (0x400, 0xF3392B0822B70005940C7A398E4B70F3),
+    (0x800, 0xE7159475A2C29B7443B29C7FA6E889D9),
+    (0x1000, 0xD097F3BDFD2022B8845AD8F792AA5825),
+    (0x2000, 0xA9F746462D870FDF8A65DC1F90E061E5),
+    (0x4000, 0x70D869A156D2A1B890BB3DF62BAF32F7),
+    (0x8000, 0x31BE135F97D08FD981231505542FCFA6),
+    (0x10000, 0x9AA508B5B7A84E1C677DE54F3E99BC9),
+    (0x20000, 0x5D6AF8DEDB81196699C329225EE604),
+    (0x40000, 0x2216E584F5FA1EA926041BEDFE98),
+    (0x80000, 0x48A170391F7DC42444E8FA2),
+)
+
+
+def get_sqrt_ratio_at_tick(tick: int) -> int:
+    """Exact port of Uniswap V3 ``TickMath.getSqrtRatioAtTick`` (Q64.96)."""
+    abs_tick = -tick if tick < 0 else tick
+    if abs_tick > MAX_TICK:
+        raise ValueError(f"tick {tick} out of range")
+    ratio = Q128
+    for bit, factor in TICK_FACTORS:
+        if abs_tick & bit:
+            ratio = (ratio * factor) >> 128
+    if tick > 0:
+        ratio = MAX_UINT256 // ratio
+    return (ratio >> 32) + (1 if ratio & 0xFFFFFFFF else 0)
+
+
+def mean_tick(tick_cumulative_delta: int, seconds: int) -> int:
+    """Arithmetic mean tick rounded towards negative infinity, as OracleLibrary.consult."""
+    return tick_cumulative_delta // seconds
+
+
+Number = Union[int, "FixedPrice"]
+
+
+@functools.total_ordering
+@dataclass(frozen=True)
+class FixedPrice:
+    """Exact quote-per-base price as a reduced integer ratio.
+
+    Prices are built from raw pool integers (reserves, Q64.96 sqrt prices) and
+    token decimals only, so equal inputs always give bit-identical values.
+    Comparisons cross-multiply; :meth:`to_decimal` is meant for display.
+    """
+
+    numerator: int
+    denominator: int
+
+    def __post_init__(self) -> None:
+        if self.denominator == 0:
+            raise ZeroDivisionError("FixedPrice denominator is zero")
+        numerator, denominator = self.numerator, self.denominator
+        if denominator < 0:
+            numerator, denominator = -numerator, -denominator
+        divisor = gcd(numerator, denominator)
+        if divisor > 1:
+            numerator //= divisor
+            denominator //= divisor
+        object.__setattr__(self, "numerator", numerator)
+        object.__setattr__(self, "denominator", denominator)
+
+    @classmethod
+    def from_raw(
+        cls,
+        quote_amount: int,
+        base_amount: int,
+        base_decimals: int,
+        quote_decimals: int,
+    ) -> "FixedPrice":
+        """Human price of ``base_amount`` raw base units trading for ``quote_amount`` raw quote units."""
+        shift = base_decimals - quote_decimals
+        if shift >= 0:
+            return cls(quote_amount * 10**shift, base_amount)
+        return cls(quote_amount, base_amount * 10**-shift)
+
+    @classmethod
+    def from_sqrt_price_x96(
+        cls,
+        sqrt_price_x96: int,
+        base_decimals: int,
+        quote_decimals: int,
+        *,
+        base_is_token0: bool = True,
+    ) -> "FixedPrice":
+        ratio_x192 = sqrt_price_x96 * sqrt_price_x96
+        if base_is_token0:
+            return cls.from_raw(ratio_x192, Q192, base_decimals, quote_decimals)
+        return cls.from_raw(Q192, ratio_x192, base_decimals, quote_decimals)
+
+    @classmethod
+    def from_tick(
+        cls,
+        tick: int,
+        base_decimals: int,
+        quote_decimals: int,
+        *,
+        base_is_token0: bool = True,
+    ) -> "FixedPrice":
+        return cls.from_sqrt_price_x96(
+            get_sqrt_ratio_at_tick(tick),
+            base_decimals,
+            quote_decimals,
+            base_is_token0=base_is_token0,
+        )
+
+    @classmethod
+    def from_decimal(cls, value: Decimal) -> "FixedPrice":
+        return cls(*Decimal(value).as_integer_ratio())
+
+    @classmethod
+    def parse(cls, text: str) -> "FixedPrice":
+        """Parse ``"num/den"`` or a plain decimal string."""
+        if "/" in text:
+            numerator, denominator = text.split("/", 1)
+            return cls(int(numerator), int(denominator))
+        return cls.from_decimal(Decimal(text))
+
+    @property
+    def x128(self) -> int:
+        """Price as an unsigned Q128 fixed-point integer (floored)."""
+        return (self.numerator << 128) // self.denominator
+
+    def is_positive(self) -> bool:
+        return self.numerator > 0
+
+    def change_bps(self, baseline: "FixedPrice") -> int:
+        """``(self / baseline - 1) * 10_000`` truncated towards zero."""
+        delta = (self.numerator * baseline.denominator - baseline.numerator * self.denominator) * 10_000
+        scale = self.denominator * baseline.numerator
+        if delta >= 0:
+            return delta // scale
+        return -((-delta) // scale)
+
+    def quote_amount(self, base_amount: int, base_decimals: int, quote_decimals: int) -> int:
+        """Raw quote units for ``base_amount`` raw base units, floored."""
+        return (base_amount * self.numerator * 10**quote_decimals) // (
+            self.denominator * 10**base_decimals
+        )
+
+    def to_decimal(self, precision: int = 28) -> Decimal:
+        with localcontext() as context:
+            context.prec = precision
+            return Decimal(self.numerator) / Decimal(self.denominator)
+
+    def ratio_string(self) -> str:
+        return f"{self.numerator}/{self.denominator}"
+
+    def __float__(self) -> float:
+        return self.numerator / self.denominator
+
+    def __str__(self) -> str:
+        return str(self.to_decimal())
+
+    def __lt__(self, other: Number) -> bool:
+        other = _coerce(other)
+        return self.numerator * other.denominator < other.numerator * self.denominator
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, int):
+            other = FixedPrice(other, 1)
+        if not isinstance(other, FixedPrice):
+            return NotImplemented
+        return self.numerator == other.numerator and self.denominator == other.denominator
+
+    def __hash__(self) -> int:
+        return hash((self.numerator, self.denominator))
+
+
+def _coerce(value: Number) -> FixedPrice:
+    if isinstance(value, FixedPrice):
+        return value
+    if isinstance(value, int):
+        return FixedPrice(value, 1)
+    raise TypeError(f"cannot compare FixedPrice with {type(value).__name__}")
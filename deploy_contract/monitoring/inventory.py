@@ -2,11 +2,14 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from decimal import Decimal
-from typing import Dict, Iterable, Optional
+from typing import Dict, Iterable, Optional, Tuple
 
 from web3 import Web3
+from web3.types import BlockIdentifier
 
 from .config import TokenConfig
+from .metadata_store import ChainMetadata, MetadataStore
+from .multicall import BatchReader, view_call
 
 ERC20_ABI = [
     {
@@ -43,51 +46,92 @@ class TokenInventory:
 
 
 class InventoryFetcher:
-    def __init__(self, w3: Web3, vault_address: str) -> None:
+    def __init__(self, w3: Web3, vault_address: str, metadata: Optional[ChainMetadata] = None) -> None:
         self._w3 = w3
         self._vault = Web3.to_checksum_address(vault_address)
-        self._metadata_cache: Dict[str, TokenInventory] = {}
+        self._metadata = metadata if metadata is not None else MetadataStore().view(0)
 
-    def fetch(self, tokens: Iterable[TokenConfig]) -> Dict[str, TokenInventory]:
+    def fetch(
+        self,
+        tokens: Iterable[TokenConfig],
+        block_identifier: BlockIdentifier = "latest",
+    ) -> Dict[str, TokenInventory]:
         balances: Dict[str, TokenInventory] = {}
         for token in tokens:
             checksum = Web3.to_checksum_address(token.address)
             contract = self._w3.eth.contract(address=checksum, abi=ERC20_ABI)
-            raw_balance = contract.functions.balanceOf(self._vault).call()
-
-            inventory = self._metadata_cache.get(checksum.lower())
-            if inventory is None:
-                decimals = token.decimals
-                if decimals is None:
-                    decimals = contract.functions.decimals().call()
-                symbol = token.symbol
-                if symbol is None:
-                    try:
-                        symbol = contract.functions.symbol().call()
-                    except Exception:
-                        symbol = "UNKNOWN"
-                human_balance = self._to_decimal(raw_balance, decimals)
-                inventory = TokenInventory(
-                    config=token,
-                    raw_balance=raw_balance,
-                    human_balance=human_balance,
-                    decimals=decimals,
-                    symbol=symbol,
-                )
-                self._metadata_cache[checksum.lower()] = inventory
-            else:
-                human_balance = self._to_decimal(raw_balance, inventory.decimals)
-                inventory = TokenInventory(
-                    config=token,
-                    raw_balance=raw_balance,
-                    human_balance=human_balance,
-                    decimals=inventory.decimals,
-                    symbol=inventory.symbol,
-                )
-
-            balances[checksum.lower()] = inventory
+            raw_balance = contract.functions.balanceOf(self._vault).call(block_identifier=block_identifier)
+
+            decimals, symbol = self._known_metadata(token, checksum)
+            if decimals is None:
+                decimals = int(contract.functions.decimals().call())
+            if symbol is None:
+                try:
+                    symbol = contract.functions.symbol().call()
+                except Exception:
+                    symbol = "UNKNOWN"
+            self._metadata.set_token(checksum, decimals=decimals, symbol=symbol)
+
+            balances[checksum.lower()] = self._build_inventory(token, raw_balance, decimals, symbol)
+        return balances
+
+    def queue(self, tokens: Iterable[TokenConfig], batch: BatchReader) -> None:
+        for token in tokens:
+            checksum = Web3.to_checksum_address(token.address)
+            key = checksum.lower()
+            batch.add(
+                (key, "balanceOf"),
+                view_call(checksum, "balanceOf(address)", ["uint256"], ["address"], [self._vault]),
+            )
+            decimals, symbol = self._known_metadata(token, checksum)
+            if decimals is None:
+                batch.add((key, "decimals"), view_call(checksum, "decimals()", ["uint8"]))
+            if symbol is None:
+                batch.add((key, "symbol"), view_call(checksum, "symbol()", ["string"]))
+
+    def collect(self, tokens: Iterable[TokenConfig], batch: BatchReader) -> Dict[str, TokenInventory]:
+        balances: Dict[str, TokenInventory] = {}
+        for token in tokens:
+            checksum = Web3.to_checksum_address(token.address)
+            key = checksum.lower()
+            balance = batch.get((key, "balanceOf"))
+            if balance is None or not balance.success:
+                continue
+
+            decimals, symbol = self._known_metadata(token, checksum)
+            if decimals is None:
+                result = batch.get((key, "decimals"))
+                if result is None or not result.success:
+                    continue
+                decimals = int(result.value())
+            if symbol is None:
+                result = batch.get((key, "symbol"))
+                symbol = result.value() if result is not None and result.success else "UNKNOWN"
+            self._metadata.set_token(checksum, decimals=decimals, symbol=symbol)
+
+            balances[key] = self._build_inventory(token, balance.value(), decimals, symbol)
         return balances
 
+    def _known_metadata(self, token: TokenConfig, checksum: str) -> Tuple[Optional[int], Optional[str]]:
+        decimals = token.decimals if token.decimals is not None else self._metadata.get_decimals(checksum)
+        symbol = token.symbol if token.symbol is not None else self._metadata.get_symbol(checksum)
+        return decimals, symbol
+
+    def _build_inventory(
+        self,
+        token: TokenConfig,
+        raw_balance: int,
+        decimals: int,
+        symbol: str,
+    ) -> TokenInventory:
+        return TokenInventory(
+            config=token,
+            raw_balance=raw_balance,
+            human_balance=self._to_decimal(raw_balance, decimals),
+            decimals=decimals,
+            symbol=symbol,
+        )
+
     @staticmethod
     def _to_decimal(amount: int, decimals: int) -> Decimal:
         return Decimal(amount) / Decimal(10) ** decimals
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .metrics import MetricsRegistry
+
+
+class MetadataStore:
+    """On-disk cache of immutable token and pool metadata.
+
+    Entries are keyed by ``<chain_id>:<address>`` so one file can back several
+    chains. Token entries hold ERC-20 ``decimals``/``symbol``; pool entries hold
+    ``token0``/``token1``/``fee``. Without a path the store is memory-only.
+    """
+
+    def __init__(self, path: Optional[Path] = None, metrics: Optional[MetricsRegistry] = None) -> None:
+        self._path = Path(path) if path else None
+        self.metrics = metrics
+        self._tokens: Dict[str, Dict[str, Any]] = {}
+        self._pools: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        if self._path:
+            self._load(self._path)
+
+    def view(self, chain_id: int, metrics: Optional[MetricsRegistry] = None) -> "ChainMetadata":
+        """Bind to ``chain_id``; ``metrics`` overrides the store's registry for its cache counts."""
+        return ChainMetadata(self, chain_id, metrics)
+
+    def get_token(self, chain_id: int, address: str) -> Dict[str, Any]:
+        return dict(self._tokens.get(self._key(chain_id, address), {}))
+
+    def get_pool(self, chain_id: int, address: str) -> Dict[str, Any]:
+        return dict(self._pools.get(self._key(chain_id, address), {}))
+
+    def set_token(self, chain_id: int, address: str, **fields: Any) -> None:
+        self._update(self._tokens, self._key(chain_id, address), fields)
+
+    def set_pool(self, chain_id: int, address: str, **fields: Any) -> None:
+        self._update(self._pools, self._key(chain_id, address), fields)
+
+    def flush(self) -> None:
+        if not self._path or not self._dirty:
+            return
+        with self._write_lock:
+            with self._lock:
+                payload = json.dumps({"tokens": self._tokens, "pools": self._pools}, sort_keys=True)
+                self._dirty = False
+            tmp_path = self._path.with_name(self._path.name + ".tmp")
+            try:
+                tmp_path.write_text(payload)
+                os.replace(tmp_path, self._path)
+            except Exception as exc:
+                self._dirty = True
+                print(f"[monitor] failed to persist metadata cache: {exc}")
+
+    def _update(self, table: Dict[str, Dict[str, Any]], key: str, fields: Dict[str, Any]) -> None:
+        values = {name: value for name, value in fields.items() if value is not None}
+        if not values:
+            return
+        with self._lock:
+            entry = table.setdefault(key, {})
+            for name, value in values.items():
+                if entry.get(name) != value:
+                    entry[name] = value
+                    self._dirty = True
+
+    @staticmethod
+    def _key(chain_id: int, address: str) -> str:
+        return f"{int(chain_id)}:{address.lower()}"
+
+    def _load(self, path: Path) -> None:
+        if not path.exists():
+            return
+        try:
+            raw = json.loads(path.read_text())
+        except Exception:
+            return
+        self._tokens = dict(raw.get("tokens", {}))
+        self._pools = dict(raw.get("pools", {}))
+
+
+class ChainMetadata:
+    """A :class:`MetadataStore` bound to a single chain id."""
+
+    def __init__(self, store: MetadataStore, chain_id: int, metrics: Optional[MetricsRegistry] = None) -> None:
+        self.store = store
+        self.chain_id = int(chain_id)
+        self.metrics = metrics if metrics is not None else store.metrics
+
+    def get_decimals(self, address: str) -> Optional[int]:
+        value = self._record(self.store.get_token(self.chain_id, address).get("decimals"))
+        return int(value) if value is not None else None
+
+    def get_symbol(self, address: str) -> Optional[str]:
+        return self._record(self.store.get_token(self.chain_id, address).get("symbol"))
+
+    def get_pool_tokens(self, address: str) -> Optional[Tuple[str, str]]:
+        entry = self.store.get_pool(self.chain_id, address)
+        if "token0" not in entry or "token1" not in entry:
+            return self._record(None)
+        return self._record((entry["token0"], entry["token1"]))
+
+    def get_pool_fee(self, address: str) -> Optional[int]:
+        value = self._record(self.store.get_pool(self.chain_id, address).get("fee"))
+        return int(value) if value is not None else None
+
+    def set_token(
+        self,
+        address: str,
+        *,
+        decimals: Optional[int] = None,
+        symbol: Optional[str] = None,
+    ) -> None:
+        self.store.set_token(
+            self.chain_id,
+            address,
+            decimals=int(decimals) if decimals is not None else None,
+            symbol=symbol,
+        )
+
+    def set_pool(
+        self,
+        address: str,
+        *,
+        token0: Optional[str] = None,
+        token1: Optional[str] = None,
+        fee: Optional[int] = None,
+    ) -> None:
+        self.store.set_pool(self.chain_id, address, token0=token0, token1=token1, fee=fee)
+
+    def flush(self) -> None:
+        self.store.flush()
+
+    def _record(self, value: Any) -> Any:
+        metrics = self.metrics
+        if metrics is not None:
+            if value is None:
+                metrics.cache_miss("metadata")
+            else:
+                metrics.cache_hit("metadata")
+        return value
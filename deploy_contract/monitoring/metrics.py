@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = ",".join(
+        '{}="{}"'.format(name, value.replace("\\", "\\\\").replace('"', '\\"')) for name, value in pairs
+    )
+    return "{" + escaped + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.help = help_text
+        self._buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            counts, totals = self._series.setdefault(key, ([0] * (len(self._buckets) + 1), [0.0]))
+            counts[bisect.bisect_left(self._buckets, value)] += 1
+            totals[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, totals) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self._buckets, counts):
+                    cumulative += count
+                    lines.append(
+                        f"{self.name}_bucket{_format_labels(labels, [('le', f'{bound:g}')])} {cumulative}"
+                    )
+                cumulative += counts[-1]
+                lines.append(f"{self.name}_bucket{_format_labels(labels, [('le', '+Inf')])} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {totals[0]:g}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Minimal Prometheus-style registry for the monitor."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, object] = {}
+        self.phase_seconds = self.histogram(
+            "monitor_phase_seconds", "Latency of run_once phases in seconds."
+        )
+        self.cycle_seconds = self.histogram("monitor_cycle_seconds", "Wall time of run_once in seconds.")
+        self.rpc_requests = self.counter("monitor_rpc_requests_total", "JSON-RPC requests by method.")
+        self.rpc_errors = self.counter("monitor_rpc_errors_total", "JSON-RPC requests that failed, by method.")
+        self.cache_requests = self.counter(
+            "monitor_cache_requests_total", "Cache lookups by cache and result (hit/miss)."
+        )
+        self.errors = self.counter("monitor_errors_total", "Monitor errors by stage.")
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = Counter(name, help_text)
+            self._metrics[name] = metric
+        return metric  # type: ignore[return-value]
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = Histogram(name, help_text, buckets)
+            self._metrics[name] = metric
+        return metric  # type: ignore[return-value]
+
+    @contextmanager
+    def phase(self, phase: str, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_seconds.observe(time.perf_counter() - start, phase=phase, **labels)
+
+    def cache_hit(self, cache: str) -> None:
+        self.cache_requests.inc(cache=cache, result="hit")
+
+    def cache_miss(self, cache: str) -> None:
+        self.cache_requests.inc(cache=cache, result="miss")
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())  # type: ignore[attr-defined]
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Serves ``MetricsRegistry.render()`` as Prometheus text over plain HTTP."""
+
+    def __init__(self, registry: MetricsRegistry, *, host: str = "0.0.0.0", port: int = 9108) -> None:
+        self._registry = registry
+        self._host = host
+        self._port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        if self._server is None:
+            self._server = await asyncio.start_server(self._handle, self._host, self._port)
+            print(f"[monitor] metrics available on http://{self._host}:{self._port}/metrics")
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] in ("/", "/metrics"):
+                status = "200 OK"
+                body = self._registry.render().encode()
+            else:
+                status = "404 Not Found"
+                body = b"not found\n"
+            writer.write(
+                (
+                    f"HTTP/1.1 {status}\r\n"
+                    "Content-Type: text/plain; version=0.0.4\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "Connection: close\r\n\r\n"
+                ).encode()
+                + body
+            )
+            await writer.drain()
+        finally:
+            writer.close()
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from eth_abi import decode as abi_decode
+from eth_abi import encode as abi_encode
+from web3 import Web3
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from web3 import AsyncWeb3
+
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+_AGGREGATE3_SELECTOR = Web3.keccak(text="aggregate3((address,bool,bytes)[])")[:4]
+
+# Rough per-entry overhead of the aggregate3 tuple encoding (offsets, target,
+# flag and length words) used when sizing chunks.
+_CALL_OVERHEAD_BYTES = 160
+
+
+def function_selector(signature: str) -> bytes:
+    return Web3.keccak(text=signature)[:4]
+
+
+def encode_call(signature: str, arg_types: Sequence[str] = (), args: Sequence[Any] = ()) -> bytes:
+    return function_selector(signature) + (abi_encode(list(arg_types), list(args)) if arg_types else b"")
+
+
+@dataclass
+class CallRequest:
+    target: str
+    data: bytes
+    output_types: Tuple[str, ...]
+    allow_failure: bool = True
+
+
+@dataclass
+class CallResult:
+    success: bool
+    values: Optional[Tuple[Any, ...]]
+
+    def value(self, index: int = 0) -> Any:
+        if not self.success or self.values is None:
+            raise ValueError("Call failed")
+        return self.values[index]
+
+
+def view_call(
+    target: str,
+    signature: str,
+    output_types: Sequence[str],
+    arg_types: Sequence[str] = (),
+    args: Sequence[Any] = (),
+    *,
+    allow_failure: bool = True,
+) -> CallRequest:
+    return CallRequest(
+        target=Web3.to_checksum_address(target),
+        data=encode_call(signature, arg_types, args),
+        output_types=tuple(output_types),
+        allow_failure=allow_failure,
+    )
+
+
+def decode_result(request: CallRequest, success: bool, return_data: bytes) -> CallResult:
+    if not success or not return_data:
+        return CallResult(success=False, values=None)
+    try:
+        values = tuple(abi_decode(list(request.output_types), return_data))
+    except Exception:
+        return CallResult(success=False, values=None)
+    return CallResult(success=True, values=values)
+
+
+class Multicall3Client:
+    """Executes view calls through Multicall3 ``aggregate3``.
+
+    Calls are split into chunks bounded by call count and calldata size so a
+    single ``eth_call`` stays under typical node gas and payload limits.
+    """
+
+    def __init__(
+        self,
+        w3: Web3,
+        *,
+        address: str = MULTICALL3_ADDRESS,
+        max_calls_per_batch: int = 500,
+        max_calldata_bytes: int = 120_000,
+    ) -> None:
+        self._w3 = w3
+        self._address = Web3.to_checksum_address(address)
+        self._max_calls = max(1, max_calls_per_batch)
+        self._max_bytes = max(1, max_calldata_bytes)
+
+    def chunk(self, requests: Sequence[CallRequest]) -> List[List[CallRequest]]:
+        chunks: List[List[CallRequest]] = []
+        current: List[CallRequest] = []
+        current_bytes = 0
+        for request in requests:
+            size = len(request.data) + _CALL_OVERHEAD_BYTES
+            if current and (len(current) >= self._max_calls or current_bytes + size > self._max_bytes):
+                chunks.append(current)
+                current = []
+                current_bytes = 0
+            current.append(request)
+            current_bytes += size
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def build_calldata(self, requests: Sequence[CallRequest]) -> bytes:
+        calls = [(request.target, request.allow_failure, request.data) for request in requests]
+        return _AGGREGATE3_SELECTOR + abi_encode(["(address,bool,bytes)[]"], [calls])
+
+    @staticmethod
+    def decode_response(requests: Sequence[CallRequest], response: bytes) -> List[CallResult]:
+        (entries,) = abi_decode(["(bool,bytes)[]"], bytes(response))
+        return [
+            decode_result(request, success, return_data)
+            for request, (success, return_data) in zip(requests, entries)
+        ]
+
+    def execute(
+        self,
+        requests: Sequence[CallRequest],
+        block_identifier: Any = "latest",
+    ) -> List[CallResult]:
+        results: List[CallResult] = []
+        for chunk in self.chunk(requests):
+            response = self._w3.eth.call(
+                {"to": self._address, "data": self.build_calldata(chunk)},
+                block_identifier,
+            )
+            results.extend(self.decode_response(chunk, response))
+        return results
+
+
+class BatchReader:
+    """Collects keyed view calls for a cycle and resolves them in bulk.
+
+    Identical requests registered under different keys are only sent once.
+    """
+
+    def __init__(self) -> None:
+        self._requests: List[CallRequest] = []
+        self._index: Dict[Tuple[str, bytes], int] = {}
+        self._keys: Dict[Hashable, int] = {}
+        self._results: Optional[List[CallResult]] = None
+
+    def __len__(self) -> int:
+        return len(self._requests)
+
+    def add(self, key: Hashable, request: CallRequest) -> None:
+        dedup_key = (request.target.lower(), request.data)
+        position = self._index.get(dedup_key)
+        if position is None:
+            position = len(self._requests)
+            self._requests.append(request)
+            self._index[dedup_key] = position
+        self._keys[key] = position
+
+    @property
+    def requests(self) -> List[CallRequest]:
+        return list(self._requests)
+
+    def resolve(self, results: Sequence[CallResult]) -> None:
+        if len(results) != len(self._requests):
+            raise ValueError("Result count does not match queued requests")
+        self._results = list(results)
+
+    def execute(self, client: Multicall3Client, block_identifier: Any = "latest") -> None:
+        self.resolve(client.execute(self._requests, block_identifier))
+
+    def execute_sequential(self, w3: Web3, block_identifier: Any = "latest") -> None:
+        results: List[CallResult] = []
+        for request in self._requests:
+            try:
+                response = w3.eth.call({"to": request.target, "data": request.data}, block_identifier)
+            except Exception:
+                if not request.allow_failure:
+                    raise
+                results.append(CallResult(success=False, values=None))
+                continue
+            results.append(decode_result(request, True, bytes(response)))
+        self.resolve(results)
+
+    def execute_rpc_batch(self, w3: Web3, block_identifier: Any = "latest", *, batch_size: int = 50) -> None:
+        """Send every call as a plain ``eth_call`` inside JSON-RPC batch arrays.
+
+        Needs a provider with ``make_batch_request`` (see ``rpc_batch``); useful
+        for targets that cannot be reached through Multicall3.
+        """
+        block = hex(block_identifier) if isinstance(block_identifier, int) else block_identifier
+        calls = [
+            ("eth_call", [{"to": request.target, "data": "0x" + request.data.hex()}, block])
+            for request in self._requests
+        ]
+        results: List[CallResult] = []
+        for start in range(0, len(calls), max(1, batch_size)):
+            responses = w3.provider.make_batch_request(calls[start : start + batch_size])
+            for request, response in zip(self._requests[start : start + batch_size], responses):
+                if response.get("error") or response.get("result") is None:
+                    if not request.allow_failure:
+                        raise ValueError(f"eth_call to {request.target} failed: {response.get('error')}")
+                    results.append(CallResult(success=False, values=None))
+                    continue
+                results.append(decode_result(request, True, bytes.fromhex(response["result"][2:])))
+        self.resolve(results)
+
+    async def execute_async(
+        self,
+        w3: "AsyncWeb3",
+        block_identifier: Any = "latest",
+        *,
+        concurrency: int = 16,
+    ) -> None:
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def run(request: CallRequest) -> CallResult:
+            async with semaphore:
+                try:
+                    response = await w3.eth.call(
+                        {"to": request.target, "data": request.data},
+                        block_identifier,
+                    )
+                except Exception:
+                    if not request.allow_failure:
+                        raise
+                    return CallResult(success=False, values=None)
+            return decode_result(request, True, bytes(response))
+
+        self.resolve(await asyncio.gather(*(run(request) for request in self._requests)))
+
+    def get(self, key: Hashable) -> Optional[CallResult]:
+        if self._results is None:
+            raise RuntimeError("BatchReader has not been executed")
+        position = self._keys.get(key)
+        if position is None:
+            return None
+        return self._results[position]
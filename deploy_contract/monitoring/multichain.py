@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .config import MonitorConfig, load_multichain_config
+from .metadata_store import MetadataStore
+from .service import MonitorService
+
+
+class MultiChainMonitor:
+    """Runs one ``MonitorService`` per chain inside a single process.
+
+    Every chain gets its own thread and event loop, so a slow or failing RPC on
+    one chain never delays cycles on another. Chains share one
+    ``MetadataStore`` (entries are keyed by chain id), each counting its
+    metadata cache hits in its own metrics, and each follows its own block
+    cadence derived from ``block_time``/``blocks_per_cycle``. When a metrics
+    port is given, chain ``i`` serves its metrics on ``port + i``;
+    ``blocks_per_cycle`` overrides every chain's configured cadence.
+    Auto discovery and config watching are not supported because they work
+    on a single-chain ``tokens`` list.
+    """
+
+    def __init__(self, configs: List[MonitorConfig], **service_kwargs: Any) -> None:
+        if not configs:
+            raise ValueError("MultiChainMonitor needs at least one chain")
+        if service_kwargs.pop("watch_config", False):
+            raise ValueError("watch_config is not supported with a multi-chain config")
+        service_kwargs.pop("auto_discover", None)
+        metrics_port: Optional[int] = service_kwargs.pop("metrics_port", None)
+        blocks_per_cycle: Optional[int] = service_kwargs.pop("blocks_per_cycle", None)
+        if blocks_per_cycle:
+            configs = [replace(config, blocks_per_cycle=blocks_per_cycle) for config in configs]
+        metadata_file = next((config.metadata_file for config in configs if config.metadata_file), None)
+        self._metadata_store = MetadataStore(metadata_file)
+        self._configs = configs
+        self._services: Dict[str, MonitorService] = {}
+        for index, config in enumerate(configs):
+            self._services[config.chain_name or str(index)] = MonitorService(
+                config,
+                metadata_store=self._metadata_store,
+                metrics_port=metrics_port + index if metrics_port is not None else None,
+                **service_kwargs,
+            )
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def services(self) -> Dict[str, MonitorService]:
+        return dict(self._services)
+
+    def start(self) -> None:
+        for config, (name, service) in zip(self._configs, self._services.items()):
+            thread = threading.Thread(
+                target=self._run_chain,
+                args=(name, service, config),
+                name=f"monitor-{name}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def run(self) -> None:
+        self.start()
+        try:
+            for thread in self._threads:
+                thread.join()
+        finally:
+            self._metadata_store.flush()
+
+    @staticmethod
+    def _run_chain(name: str, service: MonitorService, config: MonitorConfig) -> None:
+        block_time = config.block_time_seconds or 12.0
+        print(
+            f"[monitor:{name}] tracking {len(config.tokens)} token(s) every "
+            f"{config.blocks_per_cycle} block(s)"
+        )
+        try:
+            asyncio.run(
+                service.run_on_blocks(
+                    blocks_per_cycle=config.blocks_per_cycle,
+                    poll_interval=max(0.5, block_time / 2),
+                )
+            )
+        except Exception as exc:
+            print(f"[monitor:{name}] chain stopped: {exc}")
+
+
+def load_multichain_monitor(path: str | Path, **service_kwargs: Any) -> MultiChainMonitor:
+    return MultiChainMonitor(load_multichain_config(path), **service_kwargs)
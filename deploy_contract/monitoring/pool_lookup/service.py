@@ -8,6 +8,7 @@ from typing import Dict, Iterable, List, Optional
 
 from web3 import Web3
 
+from ..metadata_store import ChainMetadata
 from .quote_sets import QuoteCandidate, load_quote_candidates
 from .v2 import V2Pool, find_uniswap_v2_pools
 from .v3 import V3Pool, find_uniswap_v3_pools
@@ -84,6 +85,7 @@ def _build_v2_matches(
     quotes: List[QuoteCandidate],
     *,
     min_token_reserve: int,
+    metadata: Optional[ChainMetadata] = None,
 ) -> List[PoolMatch]:
     factory_env = _DEFAULT_V2_FACTORY_ENV
     try:
@@ -101,6 +103,7 @@ def _build_v2_matches(
         token_address=token_address,
         quote_candidates=quotes,
         min_token_reserve=min_token_reserve,
+        metadata=metadata,
     )
 
     token_placeholder = _PLACEHOLDER_PREFIX + token_env
@@ -139,6 +142,7 @@ def _build_v3_matches(
     quotes: List[QuoteCandidate],
     *,
     min_liquidity: int,
+    metadata: Optional[ChainMetadata] = None,
 ) -> List[PoolMatch]:
     try:
         factory_address = _get_env_value(_DEFAULT_V3_FACTORY_ENV)
@@ -157,6 +161,7 @@ def _build_v3_matches(
         quote_candidates=quotes,
         fee_tiers=fee_tiers,
         min_liquidity=min_liquidity,
+        metadata=metadata,
     )
 
     token_placeholder = _PLACEHOLDER_PREFIX + token_env
@@ -197,6 +202,7 @@ def find_pools(
     include_v3: bool = True,
     min_v2_reserve: int = 0,
     min_v3_liquidity: int = 0,
+    metadata: Optional[ChainMetadata] = None,
 ) -> List[PoolMatch]:
     if not include_v2 and not include_v3:
         return []
@@ -216,6 +222,7 @@ def find_pools(
                 token_env=token_env,
                 quotes=quotes,
                 min_token_reserve=min_v2_reserve,
+                metadata=metadata,
             )
         )
     if include_v3:
@@ -226,6 +233,7 @@ def find_pools(
                 token_env=token_env,
                 quotes=quotes,
                 min_liquidity=min_v3_liquidity,
+                metadata=metadata,
             )
         )
 
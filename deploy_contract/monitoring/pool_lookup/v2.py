@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Iterable, List
+from typing import Iterable, List, Optional
 
 from web3 import Web3
 
+from ..metadata_store import ChainMetadata
 from .quote_sets import QuoteCandidate
 
 _UNISWAP_V2_FACTORY_ABI = [
@@ -66,6 +67,7 @@ def find_uniswap_v2_pools(
     quote_candidates: Iterable[QuoteCandidate],
     *,
     min_token_reserve: int = 0,
+    metadata: Optional[ChainMetadata] = None,
 ) -> List[V2Pool]:
     factory = w3.eth.contract(address=Web3.to_checksum_address(factory_address), abi=_UNISWAP_V2_FACTORY_ABI)
     token_checksum = Web3.to_checksum_address(token_address)
@@ -78,13 +80,21 @@ def find_uniswap_v2_pools(
         pair_checksum = Web3.to_checksum_address(pair_address)
         pair_contract = w3.eth.contract(address=pair_checksum, abi=_UNISWAP_V2_PAIR_ABI)
 
+        cached_tokens = metadata.get_pool_tokens(pair_checksum) if metadata is not None else None
+
         try:
             reserves = pair_contract.functions.getReserves().call()
-            token0 = Web3.to_checksum_address(pair_contract.functions.token0().call())
-            token1 = Web3.to_checksum_address(pair_contract.functions.token1().call())
+            if cached_tokens:
+                token0, token1 = cached_tokens
+            else:
+                token0 = Web3.to_checksum_address(pair_contract.functions.token0().call())
+                token1 = Web3.to_checksum_address(pair_contract.functions.token1().call())
         except Exception:  # pragma: no cover - on-chain failure
             continue
 
+        if metadata is not None and not cached_tokens:
+            metadata.set_pool(pair_checksum, token0=token0, token1=token1)
+
         if token0.lower() == token_checksum.lower():
             reserve_token = reserves[0]
             reserve_quote = reserves[1]
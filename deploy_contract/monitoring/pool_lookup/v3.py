@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Iterable, List
+from typing import Iterable, List, Optional
 
 from web3 import Web3
 
+from ..metadata_store import ChainMetadata
 from .quote_sets import QuoteCandidate
 
 _UNISWAP_V3_FACTORY_ABI = [
@@ -63,6 +64,7 @@ def find_uniswap_v3_pools(
     fee_tiers: Iterable[int],
     *,
     min_liquidity: int = 0,
+    metadata: Optional[ChainMetadata] = None,
 ) -> List[V3Pool]:
     factory = w3.eth.contract(address=Web3.to_checksum_address(factory_address), abi=_UNISWAP_V3_FACTORY_ABI)
     token_checksum = Web3.to_checksum_address(token_address)
@@ -74,6 +76,15 @@ def find_uniswap_v3_pools(
             if int(pool_address, 16) == 0:
                 continue
             pool_checksum = Web3.to_checksum_address(pool_address)
+            if metadata is not None:
+                # Factories sort pool tokens by address, so token0/token1 need no call.
+                token0, token1 = sorted([token_checksum, quote.address], key=str.lower)
+                metadata.set_pool(
+                    pool_checksum,
+                    token0=Web3.to_checksum_address(token0),
+                    token1=Web3.to_checksum_address(token1),
+                    fee=int(fee),
+                )
             pool_contract = w3.eth.contract(address=pool_checksum, abi=_UNISWAP_V3_POOL_ABI)
             try:
                 slot0 = pool_contract.functions.slot0().call()
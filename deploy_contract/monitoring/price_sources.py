@@ -1,17 +1,34 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from decimal import Decimal, getcontext
-from typing import Optional
+from typing import Dict, Hashable, List, Optional, Tuple
 
 from web3 import Web3
+from web3.types import BlockIdentifier
 
+from .batch_pricing import PriceBatch, PriceResult
 from .config import PoolConfig
-
-getcontext().prec = 60
+from .fixed_point import FixedPrice
+from .metadata_store import ChainMetadata
+from .multicall import BatchReader, view_call
+from .twap import UINT32, UINT256, Sample, TwapStore, tick_variance
 
 
 UNISWAP_V2_PAIR_ABI = [
+    {
+        "name": "price0CumulativeLast",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "inputs": [],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "name": "price1CumulativeLast",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "inputs": [],
+        "stateMutability": "view",
+        "type": "function",
+    },
     {
         "name": "getReserves",
         "outputs": [
@@ -83,118 +100,446 @@ UNISWAP_V3_POOL_ABI = [
 
 
 @dataclass
-class PriceResult:
-    price: Decimal
-    tick: Optional[int]
+class PoolSnapshot:
+    token0: str
+    token1: str
+    reserve0: Optional[int] = None
+    reserve1: Optional[int] = None
+    sqrt_price_x96: Optional[int] = None
+    tick: Optional[int] = None
+    tick_cumulatives: Optional[List[int]] = None
+    block_timestamp_last: Optional[int] = None
+    price_cumulative: Optional[int] = None
+    timestamp: Optional[int] = None
 
 
 class BasePriceSource:
-    def __init__(self, pool: PoolConfig) -> None:
+    def __init__(
+        self,
+        pool: PoolConfig,
+        metadata: Optional[ChainMetadata] = None,
+        twap: Optional[TwapStore] = None,
+        *,
+        use_twap: bool = True,
+    ) -> None:
         self.pool = pool
+        self.metadata = metadata
+        self.twap = twap
+        self._use_twap = use_twap
         self._address = Web3.to_checksum_address(pool.address)
+        self._spot_fallback = False
+
+    @property
+    def uses_twap(self) -> bool:
+        return self._twap_seconds() is not None
+
+    def fetch(
+        self,
+        w3: Web3,
+        base_decimals: int,
+        quote_decimals: int,
+        block_identifier: BlockIdentifier = "latest",
+    ) -> PriceResult:
+        return self.price(self.read(w3, block_identifier), base_decimals, quote_decimals)
+
+    def read(self, w3: Web3, block_identifier: BlockIdentifier = "latest") -> PoolSnapshot:
+        batch = BatchReader()
+        self.queue(batch)
+        batch.execute_sequential(w3, block_identifier)
+        snapshot = self.collect(batch)
+        if snapshot is None:
+            raise ValueError(f"Failed to read pool state for {self._address}")
+        return snapshot
 
-    def fetch(self, w3: Web3, base_decimals: int, quote_decimals: int) -> PriceResult:
+    def queue(self, batch: BatchReader) -> None:
         raise NotImplementedError
 
+    def collect(self, batch: BatchReader) -> Optional[PoolSnapshot]:
+        raise NotImplementedError
+
+    def price(
+        self,
+        snapshot: PoolSnapshot,
+        base_decimals: int,
+        quote_decimals: int,
+        *,
+        baseline: Optional[FixedPrice] = None,
+    ) -> PriceResult:
+        batch = PriceBatch()
+        self.add_to_batch(batch, snapshot, base_decimals, quote_decimals, baseline=baseline)
+        # results() folds the extra TWAP windows into the pool's PriceResult.
+        return batch.compute().results()[self._address.lower()]
+
+    def add_to_batch(
+        self,
+        batch: PriceBatch,
+        snapshot: PoolSnapshot,
+        base_decimals: int,
+        quote_decimals: int,
+        *,
+        key: Optional[Hashable] = None,
+        baseline: Optional[FixedPrice] = None,
+    ) -> None:
+        raise NotImplementedError
+
+    def queue_dynamic(self, batch: BatchReader) -> None:
+        """Queue reads that cannot be derived from pool events (e.g. TWAP)."""
+
+    def collect_dynamic(self, batch: BatchReader, snapshot: PoolSnapshot) -> PoolSnapshot:
+        return snapshot
+
+    def _twap_seconds(self) -> Optional[int]:
+        """The window that prices the pool: ``twap_seconds``, else the shortest of ``twap_windows``."""
+        if not self._use_twap:
+            return None
+        if self.pool.twap_seconds and self.pool.twap_seconds > 0:
+            return int(self.pool.twap_seconds)
+        windows = [int(seconds) for seconds in self.pool.twap_windows if seconds > 0]
+        return min(windows) if windows else None
+
+    def _twap_windows(self) -> List[int]:
+        seconds = self._twap_seconds()
+        if seconds is None:
+            return []
+        return sorted({seconds, *(int(window) for window in self.pool.twap_windows if window > 0)})
+
+    def _twap_key(self, series: str) -> str:
+        return f"{self._address.lower()}:{series}"
+
+    def _stored_windows(self, series: str) -> Dict[int, Sample]:
+        windows: Dict[int, Sample] = {}
+        if self.twap is None:
+            return windows
+        for seconds in self._twap_windows():
+            window = self.twap.window(self._twap_key(series), seconds)
+            if window is not None and window[1] > 0:
+                windows[seconds] = window
+        return windows
+
+    def _note_spot_fallback(self, fallback: bool) -> None:
+        if fallback and not self._spot_fallback:
+            print(f"[monitor] not enough TWAP history for {self._address} yet; using spot price")
+        self._spot_fallback = fallback
+
+    def _key(self, name: str) -> Tuple[str, str]:
+        return (self._address.lower(), name)
+
+    def _queue_tokens(self, batch: BatchReader) -> None:
+        if self.metadata is not None and self.metadata.get_pool_tokens(self._address):
+            return
+        batch.add(self._key("token0"), view_call(self._address, "token0()", ["address"]))
+        batch.add(self._key("token1"), view_call(self._address, "token1()", ["address"]))
+
+    def _collect_tokens(self, batch: BatchReader) -> Optional[Tuple[str, str]]:
+        if self.metadata is not None:
+            cached = self.metadata.get_pool_tokens(self._address)
+            if cached:
+                return cached
+        token0 = batch.get(self._key("token0"))
+        token1 = batch.get(self._key("token1"))
+        if token0 is None or token1 is None or not token0.success or not token1.success:
+            return None
+        tokens = (
+            Web3.to_checksum_address(token0.value()),
+            Web3.to_checksum_address(token1.value()),
+        )
+        if self.metadata is not None:
+            self.metadata.set_pool(self._address, token0=tokens[0], token1=tokens[1], fee=self.pool.fee)
+        return tokens
+
+    def _is_base_token0(self, snapshot: PoolSnapshot) -> bool:
+        if snapshot.token0.lower() == self.pool.base_token.lower():
+            return True
+        if snapshot.token1.lower() == self.pool.base_token.lower():
+            return False
+        raise ValueError("Base token does not match pool tokens")  # pragma: no cover
+
 
 class UniswapV2PriceSource(BasePriceSource):
-    def fetch(self, w3: Web3, base_decimals: int, quote_decimals: int) -> PriceResult:
-        contract = w3.eth.contract(address=self._address, abi=UNISWAP_V2_PAIR_ABI)
-        reserve0, reserve1, _ = contract.functions.getReserves().call()
-        token0 = Web3.to_checksum_address(contract.functions.token0().call())
-        token1 = Web3.to_checksum_address(contract.functions.token1().call())
+    """Spot price from reserves, or a TWAP from ``priceXCumulativeLast``.
 
-        reserve0_dec = Decimal(reserve0)
-        reserve1_dec = Decimal(reserve1)
+    With a :class:`TwapStore` and ``twap_seconds`` set, every read also
+    samples the pool's counterfactual price cumulative at the block
+    timestamp (as ``UniswapV2OracleLibrary.currentCumulativePrices`` does),
+    and the price is the mean over the stored window.
+    """
 
-        scale = Decimal(10) ** (base_decimals - quote_decimals)
+    def queue(self, batch: BatchReader) -> None:
+        self._queue_tokens(batch)
+        self._queue_reserves(batch)
 
-        if token0.lower() == self.pool.base_token.lower():
-            ratio = reserve1_dec / reserve0_dec
-            price = ratio * scale
-        elif token1.lower() == self.pool.base_token.lower():
-            ratio = reserve0_dec / reserve1_dec
-            price = ratio * scale
-        else:  # pragma: no cover - configuration error
-            raise ValueError("Base token does not match pool tokens")
+    def queue_dynamic(self, batch: BatchReader) -> None:
+        # Sync events carry reserves but not the cumulative or its timestamp.
+        if self._samples_cumulative():
+            self._queue_reserves(batch)
 
-        return PriceResult(price=price, tick=None)
+    def collect(self, batch: BatchReader) -> Optional[PoolSnapshot]:
+        tokens = self._collect_tokens(batch)
+        if tokens is None:
+            return None
+        snapshot = PoolSnapshot(token0=tokens[0], token1=tokens[1])
+        if not self._collect_reserves(batch, snapshot):
+            return None
+        return snapshot
 
+    def collect_dynamic(self, batch: BatchReader, snapshot: PoolSnapshot) -> PoolSnapshot:
+        self._collect_reserves(batch, snapshot)
+        return snapshot
 
-class UniswapV3PriceSource(BasePriceSource):
-    def fetch(self, w3: Web3, base_decimals: int, quote_decimals: int) -> PriceResult:
-        contract = w3.eth.contract(address=self._address, abi=UNISWAP_V3_POOL_ABI)
-        token0 = Web3.to_checksum_address(contract.functions.token0().call())
-        token1 = Web3.to_checksum_address(contract.functions.token1().call())
-
-        tick: Optional[int] = None
-        price: Optional[Decimal] = None
-
-        use_twap = self.pool.twap_seconds and self.pool.twap_seconds > 0
-
-        if use_twap:
-            try:
-                seconds = int(self.pool.twap_seconds)
-                tick_cumulatives, _ = contract.functions.observe([seconds, 0]).call()
-                tick_delta = tick_cumulatives[1] - tick_cumulatives[0]
-                average_tick = Decimal(tick_delta) / Decimal(seconds)
-                tick = int(average_tick.to_integral_value(rounding="ROUND_HALF_EVEN"))
-                price = self._price_from_tick(average_tick, token0, token1, base_decimals, quote_decimals)
-            except Exception:  # pragma: no cover - fallback to spot
-                price = None
-                tick = None
-
-        if price is None:
-            slot0 = contract.functions.slot0().call()
-            sqrt_price_x96 = slot0[0]
-            tick = slot0[1]
-            price = self._price_from_sqrt_price(
-                sqrt_price_x96,
-                token0,
-                token1,
+    def add_to_batch(
+        self,
+        batch: PriceBatch,
+        snapshot: PoolSnapshot,
+        base_decimals: int,
+        quote_decimals: int,
+        *,
+        key: Optional[Hashable] = None,
+        baseline: Optional[FixedPrice] = None,
+    ) -> None:
+        key = key if key is not None else self._address.lower()
+        base_is_token0 = self._is_base_token0(snapshot)
+        if base_is_token0:
+            reserve_base, reserve_quote = snapshot.reserve0, snapshot.reserve1
+        else:
+            reserve_base, reserve_quote = snapshot.reserve1, snapshot.reserve0
+        seconds = self._twap_seconds()
+        windows = self._sample_cumulative(snapshot, base_is_token0, reserve_base, reserve_quote)
+        if seconds:
+            self._note_spot_fallback(seconds not in windows)
+        if seconds in windows:
+            cumulative_delta, elapsed = windows[seconds]
+            batch.add_cumulative_twap(
+                key,
+                cumulative_delta,
+                elapsed,
                 base_decimals,
                 quote_decimals,
+                baseline=baseline,
+                window=seconds,
             )
+        else:
+            batch.add_reserves(
+                key,
+                reserve_base,
+                reserve_quote,
+                base_decimals,
+                quote_decimals,
+                baseline=baseline,
+            )
+        for window, (cumulative_delta, elapsed) in windows.items():
+            if window != seconds:
+                batch.add_cumulative_twap(
+                    key,
+                    cumulative_delta,
+                    elapsed,
+                    base_decimals,
+                    quote_decimals,
+                    window=window,
+                    attach=True,
+                )
+
+    def _samples_cumulative(self) -> bool:
+        return self.twap is not None and self.uses_twap
 
-        return PriceResult(price=price, tick=tick)
+    def _queue_reserves(self, batch: BatchReader) -> None:
+        batch.add(
+            self._key("getReserves"),
+            view_call(self._address, "getReserves()", ["uint112", "uint112", "uint32"]),
+        )
+        if not self._samples_cumulative():
+            return
+        tokens = self.metadata.get_pool_tokens(self._address) if self.metadata is not None else None
+        for index, name in enumerate(("price0CumulativeLast", "price1CumulativeLast")):
+            if tokens is None or tokens[index].lower() == self.pool.base_token.lower():
+                batch.add(self._key(name), view_call(self._address, f"{name}()", ["uint256"]))
 
-    def _price_from_sqrt_price(
+    def _collect_reserves(self, batch: BatchReader, snapshot: PoolSnapshot) -> bool:
+        reserves = batch.get(self._key("getReserves"))
+        if reserves is None or not reserves.success:
+            return False
+        snapshot.reserve0 = reserves.value(0)
+        snapshot.reserve1 = reserves.value(1)
+        snapshot.block_timestamp_last = reserves.value(2)
+        name = "price0CumulativeLast" if self._is_base_token0(snapshot) else "price1CumulativeLast"
+        cumulative = batch.get(self._key(name))
+        snapshot.price_cumulative = cumulative.value() if cumulative is not None and cumulative.success else None
+        return True
+
+    def _sample_cumulative(
         self,
-        sqrt_price_x96: int,
-        token0: str,
-        token1: str,
-        base_decimals: int,
-        quote_decimals: int,
-    ) -> Decimal:
-        ratio = Decimal(sqrt_price_x96) * Decimal(sqrt_price_x96) / Decimal(1 << 192)
-        scale = Decimal(10) ** (base_decimals - quote_decimals)
-        if token0.lower() == self.pool.base_token.lower():
-            return ratio * scale
-        elif token1.lower() == self.pool.base_token.lower():
-            return (Decimal(1) / ratio) * scale
-        raise ValueError("Base token does not match pool tokens")  # pragma: no cover
+        snapshot: PoolSnapshot,
+        base_is_token0: bool,
+        reserve_base: int,
+        reserve_quote: int,
+    ) -> Dict[int, Sample]:
+        if (
+            not self.uses_twap
+            or self.twap is None
+            or snapshot.timestamp is None
+            or snapshot.price_cumulative is None
+            or snapshot.block_timestamp_last is None
+            or not reserve_base
+        ):
+            return {}
+        series = "price0" if base_is_token0 else "price1"
+        since_update = (snapshot.timestamp - snapshot.block_timestamp_last) % UINT32
+        cumulative = (snapshot.price_cumulative + ((reserve_quote << 112) // reserve_base) * since_update) % UINT256
+        self.twap.record_cumulative(self._twap_key(series), snapshot.timestamp, cumulative)
+        return {
+            window: (cumulative_delta % UINT256, elapsed)
+            for window, (cumulative_delta, elapsed) in self._stored_windows(series).items()
+        }
 
-    def _price_from_tick(
+
+class UniswapV3PriceSource(BasePriceSource):
+    """Spot price from ``slot0``, or a TWAP of the pool tick.
+
+    With a :class:`TwapStore` the tick read each cycle is integrated into a
+    local tick cumulative, and ``observe`` is only queued while the stored
+    history does not yet cover the longest window. A single
+    ``observe([w_n, ..., w_1, 0])`` seeds the ring for every window in
+    ``twap_windows``; each cycle then yields all window TWAPs and the tick
+    variance over the longest one. Without a store every read calls
+    ``observe`` as before.
+    """
+
+    def queue(self, batch: BatchReader) -> None:
+        self._queue_tokens(batch)
+        batch.add(
+            self._key("slot0"),
+            view_call(
+                self._address,
+                "slot0()",
+                ["uint160", "int24", "uint16", "uint16", "uint16", "uint8", "bool"],
+            ),
+        )
+        self.queue_dynamic(batch)
+
+    def queue_dynamic(self, batch: BatchReader) -> None:
+        windows = self._twap_windows()
+        if not windows:
+            return
+        if self.twap is not None and self.twap.covers(self._twap_key("tick"), windows[-1]):
+            return
+        batch.add(
+            self._key("observe"),
+            view_call(
+                self._address,
+                "observe(uint32[])",
+                ["int56[]", "uint160[]"],
+                ["uint32[]"],
+                [self._observe_seconds()],
+            ),
+        )
+
+    def _observe_seconds(self) -> List[int]:
+        return [*reversed(self._twap_windows()), 0]
+
+    def collect(self, batch: BatchReader) -> Optional[PoolSnapshot]:
+        tokens = self._collect_tokens(batch)
+        slot0 = batch.get(self._key("slot0"))
+        if tokens is None or slot0 is None or not slot0.success:
+            return None
+        snapshot = PoolSnapshot(
+            token0=tokens[0],
+            token1=tokens[1],
+            sqrt_price_x96=slot0.value(0),
+            tick=slot0.value(1),
+        )
+        return self.collect_dynamic(batch, snapshot)
+
+    def collect_dynamic(self, batch: BatchReader, snapshot: PoolSnapshot) -> PoolSnapshot:
+        observe = batch.get(self._key("observe"))
+        if observe is not None and observe.success:
+            snapshot.tick_cumulatives = list(observe.value(0))
+        return snapshot
+
+    def add_to_batch(
         self,
-        tick: Decimal,
-        token0: str,
-        token1: str,
+        batch: PriceBatch,
+        snapshot: PoolSnapshot,
         base_decimals: int,
         quote_decimals: int,
-    ) -> Decimal:
-        ratio = Decimal("1.0001") ** tick
-        scale = Decimal(10) ** (base_decimals - quote_decimals)
-        if token0.lower() == self.pool.base_token.lower():
-            return ratio * scale
-        elif token1.lower() == self.pool.base_token.lower():
-            return (Decimal(1) / ratio) * scale
-        raise ValueError("Base token does not match pool tokens")  # pragma: no cover
+        *,
+        key: Optional[Hashable] = None,
+        baseline: Optional[FixedPrice] = None,
+    ) -> None:
+        key = key if key is not None else self._address.lower()
+        seconds = self._twap_seconds()
+        base_is_token0 = self._is_base_token0(snapshot)
+        windows, variance = self._sample_tick(snapshot) if seconds else ({}, None)
+        if seconds:
+            self._note_spot_fallback(seconds not in windows)
+        if seconds in windows:
+            tick_delta, elapsed = windows[seconds]
+            batch.add_twap(
+                key,
+                tick_delta,
+                elapsed,
+                base_decimals,
+                quote_decimals,
+                base_is_token0=base_is_token0,
+                baseline=baseline,
+                window=seconds,
+            )
+        else:
+            batch.add_sqrt_price(
+                key,
+                snapshot.sqrt_price_x96,
+                base_decimals,
+                quote_decimals,
+                base_is_token0=base_is_token0,
+                tick=snapshot.tick,
+                baseline=baseline,
+            )
+        for window, (tick_delta, elapsed) in windows.items():
+            if window != seconds:
+                batch.add_twap(
+                    key,
+                    tick_delta,
+                    elapsed,
+                    base_decimals,
+                    quote_decimals,
+                    base_is_token0=base_is_token0,
+                    window=window,
+                    attach=True,
+                )
+        if variance is not None:
+            batch.set_tick_variance(key, variance)
+
+    def _sample_tick(self, snapshot: PoolSnapshot) -> Tuple[Dict[int, Sample], Optional[float]]:
+        seconds_agos = self._observe_seconds()
+        cumulatives = snapshot.tick_cumulatives
+        if cumulatives is not None and len(cumulatives) != len(seconds_agos):
+            cumulatives = None  # windows changed since the read was queued
+        if self.twap is None or snapshot.timestamp is None:
+            if not cumulatives:
+                return {}, None
+            points = [(-seconds_ago, cumulative) for seconds_ago, cumulative in zip(seconds_agos, cumulatives)]
+            windows = {
+                seconds_ago: (cumulatives[-1] - cumulative, seconds_ago)
+                for seconds_ago, cumulative in zip(seconds_agos, cumulatives)
+                if seconds_ago
+            }
+            return windows, tick_variance(points)
+        series = self._twap_key("tick")
+        if cumulatives:
+            self.twap.seed_ticks(series, snapshot.timestamp, seconds_agos, cumulatives, snapshot.tick)
+        elif snapshot.tick is not None:
+            self.twap.record_tick(series, snapshot.timestamp, snapshot.tick)
+        return self._stored_windows("tick"), tick_variance(self.twap.points(series, seconds_agos[0]))
 
 
-def build_price_source(pool: PoolConfig) -> BasePriceSource:
+def build_price_source(
+    pool: PoolConfig,
+    metadata: Optional[ChainMetadata] = None,
+    twap: Optional[TwapStore] = None,
+    *,
+    use_twap: bool = True,
+) -> BasePriceSource:
     pool_type = pool.type.lower()
     if pool_type in {"uniswap_v2", "univ2", "sushiswap"}:
-        return UniswapV2PriceSource(pool)
+        return UniswapV2PriceSource(pool, metadata, twap, use_twap=use_twap)
     if pool_type in {"uniswap_v3", "univ3"}:
-        return UniswapV3PriceSource(pool)
+        return UniswapV3PriceSource(pool, metadata, twap, use_twap=use_twap)
     raise ValueError(f"Unsupported pool type: {pool.type}")
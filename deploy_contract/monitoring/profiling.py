@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import pstats
+import signal
+import sys
+import threading
+import time
+from collections import Counter as StackCounter
+from pathlib import Path
+from types import FrameType
+from typing import Any, Awaitable, Callable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{Path(code.co_filename).name}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """Wall-clock sampler that records collapsed stacks of one thread.
+
+    A daemon thread snapshots the target thread's stack every ``interval``
+    seconds via ``sys._current_frames()``. Output is the collapsed format
+    (``root;child;leaf count``) read by flamegraph.pl and speedscope. With
+    ``all_threads`` every other thread is sampled too, each stack rooted at
+    its thread name (e.g. one ``monitor-<chain>`` root per chain).
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.005,
+        thread_id: Optional[int] = None,
+        *,
+        all_threads: bool = False,
+    ) -> None:
+        self._interval = interval
+        self._thread_id = thread_id if thread_id is not None else threading.main_thread().ident
+        self._all_threads = all_threads
+        self._stacks: StackCounter[str] = StackCounter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.samples = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stacks.clear()
+        self.samples = 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="monitor-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def collapsed(self) -> List[str]:
+        return [f"{stack} {count}" for stack, count in self._stacks.most_common()]
+
+    def write_collapsed(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n".join(self.collapsed()) + "\n")
+        return path
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self._interval):
+            frames = sys._current_frames()
+            if self._all_threads:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in frames.items():
+                    if ident != own:
+                        self._record(frame, names.get(ident, str(ident)))
+            else:
+                frame = frames.get(self._thread_id)
+                if frame is None:
+                    continue
+                self._record(frame)
+            self.samples += 1
+
+    def _record(self, frame: Optional[FrameType], root: Optional[str] = None) -> None:
+        labels: List[str] = []
+        while frame is not None:
+            labels.append(_frame_label(frame))
+            frame = frame.f_back
+        if root is not None:
+            labels.append(root)
+        self._stacks[";".join(reversed(labels))] += 1
+
+
+async def profile_cycle(
+    run: Callable[[], Awaitable[T]],
+    output_dir: Path,
+    *,
+    name: str = "cycle",
+    interval: float = 0.001,
+) -> T:
+    """Await ``run()`` under cProfile and the sampling profiler.
+
+    Writes ``<name>.prof`` (pstats, for snakeviz/gprof2dot) and
+    ``<name>.collapsed`` (flamegraph input) to ``output_dir`` and prints the
+    top functions by cumulative time.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    sampler = SamplingProfiler(interval=interval, thread_id=threading.get_ident())
+    profiler = cProfile.Profile()
+    sampler.start()
+    profiler.enable()
+    try:
+        return await run()
+    finally:
+        profiler.disable()
+        sampler.stop()
+        profiler.dump_stats(str(output_dir / f"{name}.prof"))
+        sampler.write_collapsed(output_dir / f"{name}.collapsed")
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(25)
+        print(report.getvalue())
+        print(
+            f"[monitor] profile written to {output_dir / (name + '.prof')} and "
+            f"{output_dir / (name + '.collapsed')} ({sampler.samples} samples)"
+        )
+
+
+class SignalProfiler:
+    """Starts the sampler on SIGUSR1 and stops it on SIGUSR2.
+
+    Each stop writes ``sample-<unix time>.collapsed`` to ``output_dir``, so a
+    long-running monitor can be profiled in place without a restart. Signal
+    handlers must be installed from the main thread; on platforms without
+    SIGUSR1/SIGUSR2 ``install`` is a no-op. Pass ``all_threads`` when the
+    work runs off the main thread (multi-chain monitors).
+    """
+
+    def __init__(self, output_dir: Path, interval: float = 0.005, *, all_threads: bool = False) -> None:
+        self._output_dir = Path(output_dir)
+        self._sampler = SamplingProfiler(interval=interval, all_threads=all_threads)
+
+    def install(self) -> bool:
+        if not hasattr(signal, "SIGUSR1") or not hasattr(signal, "SIGUSR2"):
+            return False
+        signal.signal(signal.SIGUSR1, self._on_start)
+        signal.signal(signal.SIGUSR2, self._on_stop)
+        return True
+
+    def _on_start(self, signum: int, frame: Any) -> None:
+        if self._sampler.running:
+            return
+        self._sampler.start()
+        print("[monitor] sampling profiler started (SIGUSR2 to stop)")
+
+    def _on_stop(self, signum: int, frame: Any) -> None:
+        if not self._sampler.running:
+            return
+        self._sampler.stop()
+        path = self._sampler.write_collapsed(self._output_dir / f"sample-{int(time.time())}.collapsed")
+        print(f"[monitor] sampling profile written to {path} ({self._sampler.samples} samples)")
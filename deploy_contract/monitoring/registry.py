@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from .config import TokenConfig
+from .metrics import MetricsRegistry
+
+
+@dataclass
+class RegistryDiff:
+    added: List[TokenConfig] = field(default_factory=list)
+    removed: List[TokenConfig] = field(default_factory=list)
+
+    @property
+    def empty(self) -> bool:
+        return not self.added and not self.removed
+
+
+class TokenRegistry:
+    """In-memory set of tracked tokens and their pools.
+
+    The registry owns the ``tokens`` list of the service config and mutates it
+    in place, so the strategy engine and executor keep seeing the same config
+    object. Changes are expressed as :class:`RegistryDiff` values; a token whose
+    pools changed shows up as removed and re-added.
+    """
+
+    def __init__(self, tokens: List[TokenConfig]) -> None:
+        self._tokens = tokens
+        self._index: Dict[str, TokenConfig] = {token.address.lower(): token for token in tokens}
+
+    @property
+    def tokens(self) -> List[TokenConfig]:
+        return self._tokens
+
+    def get(self, address: str) -> Optional[TokenConfig]:
+        return self._index.get(address.lower())
+
+    def known_addresses(self) -> Set[str]:
+        addresses = set(self._index)
+        for token in self._tokens:
+            addresses.update(pool.address.lower() for pool in token.pools)
+        return addresses
+
+    def diff(self, tokens: List[TokenConfig]) -> RegistryDiff:
+        """Compute the changes needed to turn the registry into ``tokens``."""
+        incoming = {token.address.lower(): token for token in tokens}
+        diff = RegistryDiff()
+        for address, token in self._index.items():
+            replacement = incoming.get(address)
+            if replacement is None or replacement != token:
+                diff.removed.append(token)
+        for address, token in incoming.items():
+            current = self._index.get(address)
+            if current is None or current != token:
+                diff.added.append(token)
+        return diff
+
+    def apply(self, diff: RegistryDiff) -> None:
+        for token in diff.removed:
+            current = self._index.pop(token.address.lower(), None)
+            if current is not None:
+                self._tokens.remove(current)
+        for token in diff.added:
+            address = token.address.lower()
+            current = self._index.get(address)
+            if current is not None:
+                self._tokens.remove(current)
+            self._index[address] = token
+            self._tokens.append(token)
+
+
+class ConfigWriter:
+    """Appends discovered token entries to the JSON config on a background thread.
+
+    Entries are queued by :meth:`append` and written by a daemon thread that
+    re-reads the file, skips entries whose address placeholder is already
+    present and replaces the file atomically, so the monitor loop never waits
+    on config I/O. ``written_mtime`` lets the caller ignore its own writes when
+    watching the file for external edits. A failed write is counted as
+    ``errors{stage="config_write"}`` and its entries are retried with the
+    next write.
+    """
+
+    def __init__(self, path: Path, metrics: Optional[MetricsRegistry] = None) -> None:
+        self._path = Path(path)
+        self._metrics = metrics
+        self._pending: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._written_mtime: Optional[float] = None
+
+    @property
+    def written_mtime(self) -> Optional[float]:
+        with self._lock:
+            return self._written_mtime
+
+    def append(self, entries: List[Dict[str, Any]]) -> None:
+        if not entries:
+            return
+        with self._lock:
+            self._pending.extend(entries)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="monitor-config-writer", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def flush(self) -> None:
+        with self._lock:
+            entries, self._pending = self._pending, []
+        if entries:
+            self._write(entries)
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            self.flush()
+
+    def _write(self, entries: List[Dict[str, Any]]) -> None:
+        with self._write_lock:
+            try:
+                config_data = json.loads(self._path.read_text())
+                tokens = config_data.setdefault("tokens", [])
+                existing = {token.get("address") for token in tokens}
+                for entry in entries:
+                    if entry.get("address") not in existing:
+                        tokens.append(entry)
+                        existing.add(entry.get("address"))
+                tmp_path = self._path.with_name(self._path.name + ".tmp")
+                tmp_path.write_text(json.dumps(config_data, indent=2))
+                os.replace(tmp_path, self._path)
+                written_mtime = self._path.stat().st_mtime
+            except Exception as exc:
+                if self._metrics is not None:
+                    self._metrics.errors.inc(stage="config_write")
+                print(f"[monitor] failed to persist discovered tokens: {exc}")
+                with self._lock:
+                    self._pending[:0] = entries
+                return
+            with self._lock:
+                self._written_mtime = written_mtime
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from typing import List, Optional, Sequence, Tuple
+
+from web3.types import BlockIdentifier
+
+from .config import PoolConfig
+from .executor import SwapExecution, SwapExecutor
+from .fixed_point import Q192
+from .price_sources import PoolSnapshot
+from .strategy import StrategyDecision
+
+
+@dataclass
+class RouteCandidate:
+    """A pool the token can be sold through, with this cycle's decision and state."""
+
+    pool: PoolConfig
+    decision: StrategyDecision
+    snapshot: Optional[PoolSnapshot]
+
+
+@dataclass
+class RouteLeg:
+    """Share of a split sell; ``expected_out`` is the quote at the grid size."""
+
+    candidate: RouteCandidate
+    amount_in: int
+    expected_out: int
+
+
+class SplitRouter:
+    """Splits one sell across a token's pools to maximize total output.
+
+    Each pool's output curve is quoted at ``chunks`` evenly spaced sizes
+    through :meth:`SwapExecutor.quote_sizes` (constant product for V2, the
+    local swap simulation for V3) and valued in base units at the pool's own
+    spot price, so pools quoted in different tokens can be compared. Chunks
+    then go one at a time to the pool with the largest marginal value, which
+    is optimal on the grid because every curve is concave.
+    """
+
+    def __init__(self, executor: SwapExecutor, *, chunks: int = 32) -> None:
+        self._executor = executor
+        self._chunks = max(1, chunks)
+
+    def split(
+        self,
+        amount: int,
+        candidates: Sequence[RouteCandidate],
+        block_identifier: BlockIdentifier = "latest",
+    ) -> List[RouteLeg]:
+        if amount <= 0:
+            return []
+        sizes = [amount * step // self._chunks for step in range(self._chunks + 1)]
+        curves = []
+        for candidate in candidates:
+            spot = self._spot(candidate)
+            if spot is None:
+                continue
+            outputs = self._executor.quote_sizes(
+                candidate.decision, candidate.pool, candidate.snapshot, sizes, block_identifier
+            )
+            if outputs is None:
+                continue
+            numerator, denominator = spot
+            values = [output * denominator // numerator for output in outputs]
+            curves.append((candidate, outputs, values))
+        if not curves:
+            return []
+
+        allocation = [0] * len(curves)
+        for _ in range(self._chunks):
+            best = max(
+                range(len(curves)),
+                key=lambda index: curves[index][2][allocation[index] + 1] - curves[index][2][allocation[index]],
+            )
+            allocation[best] += 1
+
+        legs = [
+            RouteLeg(candidate=candidate, amount_in=sizes[steps], expected_out=outputs[steps])
+            for (candidate, outputs, _), steps in zip(curves, allocation)
+            if steps
+        ]
+        largest = max(legs, key=lambda leg: leg.amount_in)
+        largest.amount_in += amount - sum(leg.amount_in for leg in legs)
+        return legs
+
+    def route(
+        self,
+        amount: int,
+        candidates: Sequence[RouteCandidate],
+        block_identifier: BlockIdentifier = "latest",
+        timestamp: Optional[int] = None,
+    ) -> List[Tuple[RouteCandidate, SwapExecution]]:
+        """Split ``amount`` and build one :class:`SwapExecution` per leg.
+
+        Returns ``(RouteCandidate, SwapExecution)`` pairs. When no pool can be
+        quoted the whole amount goes through the first candidate. Legs the
+        executor cannot size are left out.
+        """
+        legs = self.split(amount, candidates, block_identifier)
+        if not legs and candidates:
+            legs = [RouteLeg(candidate=candidates[0], amount_in=amount, expected_out=0)]
+        routed = []
+        for leg in legs:
+            candidate = leg.candidate
+            decision = replace(candidate.decision, should_swap=True, sell_amount=leg.amount_in)
+            execution = self._executor.build_execution(
+                decision,
+                candidate.pool,
+                decision.price,
+                timestamp,
+                snapshot=candidate.snapshot,
+                block_identifier=block_identifier,
+            )
+            if execution is not None:
+                routed.append((candidate, execution))
+        return routed
+
+    @staticmethod
+    def _spot(candidate: RouteCandidate) -> Optional[Tuple[int, int]]:
+        """Raw quote per raw base as ``(numerator, denominator)``."""
+        snapshot = candidate.snapshot
+        if snapshot is None:
+            return None
+        base_is_token0 = snapshot.token0.lower() == candidate.decision.token_inventory.config.address.lower()
+        if snapshot.reserve0 and snapshot.reserve1:
+            if base_is_token0:
+                return snapshot.reserve1, snapshot.reserve0
+            return snapshot.reserve0, snapshot.reserve1
+        if snapshot.sqrt_price_x96:
+            ratio = snapshot.sqrt_price_x96 * snapshot.sqrt_price_x96
+            return (ratio, Q192) if base_is_token0 else (Q192, ratio)
+        return None
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import requests
+from web3._utils.encoding import FriendlyJsonSerde, Web3JsonEncoder
+from web3.providers.base import JSONBaseProvider
+
+from .metrics import MetricsRegistry
+
+try:  # pragma: no cover - optional dependency
+    import aiohttp
+    from web3.providers.async_base import AsyncJSONBaseProvider
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None  # type: ignore
+    AsyncJSONBaseProvider = None  # type: ignore
+
+RpcRequest = Tuple[str, Any]
+
+
+def _missing_response(request_id: int) -> Dict[str, Any]:
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {"code": -32603, "message": "no response for request in JSON-RPC batch"},
+    }
+
+
+class _BatchCodec:
+    """Builds JSON-RPC batch payloads and maps responses back by id."""
+
+    def __init__(self, metrics: Optional[MetricsRegistry]) -> None:
+        self._ids = itertools.count(1)
+        self._serde = FriendlyJsonSerde()
+        self._metrics = metrics
+        self._http_requests = self._batch_sizes = None
+        if metrics is not None:
+            self._http_requests = metrics.counter(
+                "monitor_rpc_http_requests_total", "HTTP round trips made by the batching transport."
+            )
+            self._batch_sizes = metrics.histogram(
+                "monitor_rpc_batch_size",
+                "JSON-RPC requests per HTTP round trip.",
+                buckets=(1, 2, 5, 10, 20, 50, 100, 200),
+            )
+
+    def encode(self, requests_: Sequence[RpcRequest]) -> Tuple[List[int], bytes]:
+        ids = [next(self._ids) for _ in requests_]
+        payload = [
+            {"jsonrpc": "2.0", "method": str(method), "params": params, "id": request_id}
+            for request_id, (method, params) in zip(ids, requests_)
+        ]
+        if self._metrics is not None:
+            for method, _ in requests_:
+                self._metrics.rpc_requests.inc(method=str(method))
+            self._http_requests.inc()
+            self._batch_sizes.observe(len(requests_))
+        return ids, self._serde.json_encode(payload, cls=Web3JsonEncoder).encode()
+
+    def decode(self, ids: List[int], requests_: Sequence[RpcRequest], raw: bytes) -> List[Dict[str, Any]]:
+        decoded = json.loads(raw)
+        if isinstance(decoded, dict):
+            # Providers answer a rejected batch with a single error object.
+            decoded = [dict(decoded, id=request_id) for request_id in ids]
+        by_id = {item.get("id"): item for item in decoded if isinstance(item, dict)}
+        responses = [by_id.get(request_id) or _missing_response(request_id) for request_id in ids]
+        if self._metrics is not None:
+            for (method, _), response in zip(requests_, responses):
+                if response.get("error"):
+                    self._metrics.rpc_errors.inc(method=str(method))
+        return responses
+
+    def failed(self, requests_: Sequence[RpcRequest]) -> None:
+        if self._metrics is not None:
+            for method, _ in requests_:
+                self._metrics.rpc_errors.inc(method=str(method))
+
+
+class _Pending:
+    __slots__ = ("request", "done", "response", "error")
+
+    def __init__(self, request: RpcRequest) -> None:
+        self.request = request
+        self.done = threading.Event()
+        self.response: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+
+
+class BatchingHTTPProvider(JSONBaseProvider):
+    """HTTP provider that coalesces concurrent requests into JSON-RPC batches.
+
+    The first caller in a ``window`` becomes the leader: it waits for the
+    window to close, then posts every queued request in arrays of at most
+    ``max_batch_size`` and hands each caller its own response. Requests made
+    from a single thread therefore still go out one per round trip;
+    ``make_batch_request`` sends an explicit list in one go.
+    """
+
+    def __init__(
+        self,
+        endpoint_uri: str,
+        *,
+        metrics: Optional[MetricsRegistry] = None,
+        window: float = 0.002,
+        max_batch_size: int = 50,
+        timeout: float = 30.0,
+    ) -> None:
+        super().__init__()
+        self.endpoint_uri = endpoint_uri
+        self._window = window
+        self._max_batch_size = max(1, max_batch_size)
+        self._timeout = timeout
+        self._codec = _BatchCodec(metrics)
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+        self._queue: List[_Pending] = []
+        self._flushing = False
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        try:
+            response = self.make_request("web3_clientVersion", [])
+        except Exception:
+            if show_traceback:
+                raise
+            return False
+        return "error" not in response
+
+    def make_request(self, method, params):
+        pending = _Pending((str(method), params))
+        with self._lock:
+            self._queue.append(pending)
+            leader = not self._flushing
+            self._flushing = True
+        if leader:
+            self._lead()
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.response
+
+    def make_batch_request(self, requests_: Sequence[RpcRequest]) -> List[Dict[str, Any]]:
+        responses: List[Dict[str, Any]] = []
+        for start in range(0, len(requests_), self._max_batch_size):
+            responses.extend(self._post(requests_[start : start + self._max_batch_size]))
+        return responses
+
+    def _lead(self) -> None:
+        if self._window > 0:
+            time.sleep(self._window)
+        while True:
+            with self._lock:
+                batch = self._queue[: self._max_batch_size]
+                del self._queue[: self._max_batch_size]
+                if not batch:
+                    self._flushing = False
+                    return
+            try:
+                responses = self._post([pending.request for pending in batch])
+            except Exception as exc:
+                for pending in batch:
+                    pending.error = exc
+                    pending.done.set()
+                continue
+            for pending, response in zip(batch, responses):
+                pending.response = response
+                pending.done.set()
+
+    def _post(self, requests_: Sequence[RpcRequest]) -> List[Dict[str, Any]]:
+        ids, payload = self._codec.encode(requests_)
+        try:
+            response = self._session.post(
+                self.endpoint_uri,
+                data=payload,
+                headers={"Content-Type": "application/json"},
+                timeout=self._timeout,
+            )
+            response.raise_for_status()
+        except Exception:
+            self._codec.failed(requests_)
+            raise
+        return self._codec.decode(ids, requests_, response.content)
+
+
+if AsyncJSONBaseProvider is not None and aiohttp is not None:
+
+    class BatchingAsyncHTTPProvider(AsyncJSONBaseProvider):  # type: ignore[misc, valid-type]
+        """Async provider that coalesces requests made within ``window`` seconds.
+
+        Concurrent coroutines (for example ``BatchReader.execute_async``) end
+        up in the same batch; a batch is sent early once it reaches
+        ``max_batch_size``.
+        """
+
+        def __init__(
+            self,
+            endpoint_uri: str,
+            *,
+            metrics: Optional[MetricsRegistry] = None,
+            window: float = 0.002,
+            max_batch_size: int = 50,
+            timeout: float = 30.0,
+        ) -> None:
+            super().__init__()
+            self.endpoint_uri = endpoint_uri
+            self._window = window
+            self._max_batch_size = max(1, max_batch_size)
+            self._timeout = timeout
+            self._codec = _BatchCodec(metrics)
+            self._session: Optional["aiohttp.ClientSession"] = None
+            self._queue: List[Tuple[RpcRequest, "asyncio.Future[Dict[str, Any]]"]] = []
+            self._flush_handle: Optional[asyncio.TimerHandle] = None
+            # The loop only keeps weak references to tasks; hold in-flight sends here.
+            self._sends: Set["asyncio.Task[None]"] = set()
+
+        async def is_connected(self, show_traceback: bool = False) -> bool:
+            try:
+                response = await self.make_request("web3_clientVersion", [])
+            except Exception:
+                if show_traceback:
+                    raise
+                return False
+            return "error" not in response
+
+        async def make_request(self, method, params):
+            loop = asyncio.get_running_loop()
+            future: "asyncio.Future[Dict[str, Any]]" = loop.create_future()
+            self._queue.append(((str(method), params), future))
+            if len(self._queue) >= self._max_batch_size:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self._window, self._flush)
+            return await future
+
+        async def make_batch_request(self, requests_: Sequence[RpcRequest]) -> List[Dict[str, Any]]:
+            responses: List[Dict[str, Any]] = []
+            for start in range(0, len(requests_), self._max_batch_size):
+                responses.extend(await self._post(requests_[start : start + self._max_batch_size]))
+            return responses
+
+        def _flush(self) -> None:
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            batch, self._queue = self._queue, []
+            if batch:
+                task = asyncio.ensure_future(self._send(batch))
+                self._sends.add(task)
+                task.add_done_callback(self._sends.discard)
+
+        async def _send(self, batch: List[Tuple[RpcRequest, "asyncio.Future[Dict[str, Any]]"]]) -> None:
+            try:
+                responses = await self._post([request for request, _ in batch])
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                return
+            for (_, future), response in zip(batch, responses):
+                if not future.done():
+                    future.set_result(response)
+
+        async def _post(self, requests_: Sequence[RpcRequest]) -> List[Dict[str, Any]]:
+            ids, payload = self._codec.encode(requests_)
+            if self._session is None or self._session.closed:
+                self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self._timeout))
+            try:
+                async with self._session.post(
+                    self.endpoint_uri,
+                    data=payload,
+                    headers={"Content-Type": "application/json"},
+                ) as response:
+                    response.raise_for_status()
+                    raw = await response.read()
+            except Exception:
+                self._codec.failed(requests_)
+                raise
+            return self._codec.decode(ids, requests_, raw)
+
+else:  # pragma: no cover - optional dependency
+    BatchingAsyncHTTPProvider = None  # type: ignore
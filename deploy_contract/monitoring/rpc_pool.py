@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, List, Optional, Sequence
+from urllib.parse import urlparse
+
+from .config import RpcEndpointConfig
+from .metrics import MetricsRegistry
+
+# Methods that never change chain state; safe to retry elsewhere or hedge.
+READ_METHODS = frozenset(
+    {
+        "eth_blockNumber",
+        "eth_call",
+        "eth_chainId",
+        "eth_estimateGas",
+        "eth_feeHistory",
+        "eth_gasPrice",
+        "eth_getBalance",
+        "eth_getBlockByHash",
+        "eth_getBlockByNumber",
+        "eth_getCode",
+        "eth_getLogs",
+        "eth_getStorageAt",
+        "eth_getTransactionCount",
+        "eth_getTransactionReceipt",
+        "eth_maxPriorityFeePerGas",
+        "net_version",
+    }
+)
+
+# JSON-RPC error codes providers use for throttling.
+RATE_LIMIT_CODES = frozenset({-32005, -32029, 429})
+
+
+def endpoint_label(url: str) -> str:
+    """Host and port of ``url``; paths often embed API keys and are dropped."""
+    parsed = urlparse(url)
+    if not parsed.hostname:
+        return url
+    return f"{parsed.hostname}:{parsed.port}" if parsed.port else parsed.hostname
+
+
+def is_endpoint_failure(response: Any) -> bool:
+    """True for responses that say more about the provider than the request."""
+    if isinstance(response, list):
+        return any(is_endpoint_failure(item) for item in response)
+    if not isinstance(response, dict):
+        return False
+    error = response.get("error")
+    if not error:
+        return False
+    if not isinstance(error, dict):
+        return False
+    if error.get("code") in RATE_LIMIT_CODES:
+        return True
+    message = str(error.get("message", "")).lower()
+    return "rate limit" in message or "too many requests" in message
+
+
+class EndpointHealth:
+    def __init__(self, config: RpcEndpointConfig) -> None:
+        self.config = config
+        self.url = config.http
+        self.label = endpoint_label(config.http)
+        self.weight = max(config.weight, 1e-6)
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.consecutive_errors = 0
+        self.ejected_until: Optional[float] = None
+
+    @property
+    def score(self) -> float:
+        if self.latency is None:
+            return 0.0
+        return self.latency / self.weight * (1.0 + 4.0 * self.error_rate)
+
+
+class EndpointPool:
+    """Rolling latency/error statistics for a set of RPC endpoints.
+
+    ``ranked()`` orders healthy endpoints by EWMA latency divided by weight,
+    penalised by the recent error rate. An endpoint is ejected after
+    ``eject_after_errors`` consecutive failures and re-admitted after
+    ``eject_seconds`` with its latency reset, so the next request probes it;
+    a failed probe ejects it again straight away.
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[RpcEndpointConfig],
+        *,
+        eject_after_errors: int = 3,
+        eject_seconds: float = 30.0,
+        alpha: float = 0.2,
+        metrics: Optional[MetricsRegistry] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not endpoints:
+            raise ValueError("EndpointPool needs at least one endpoint")
+        self._endpoints = [EndpointHealth(endpoint) for endpoint in endpoints]
+        self._eject_after = max(1, eject_after_errors)
+        self._eject_seconds = eject_seconds
+        self._alpha = alpha
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._latency = self._ejections = None
+        if metrics is not None:
+            self._latency = metrics.histogram(
+                "monitor_rpc_endpoint_seconds", "JSON-RPC latency by endpoint in seconds."
+            )
+            self._ejections = metrics.counter(
+                "monitor_rpc_endpoint_ejections_total", "RPC endpoints ejected after repeated failures."
+            )
+
+    @property
+    def endpoints(self) -> List[EndpointHealth]:
+        return list(self._endpoints)
+
+    def ranked(self) -> List[EndpointHealth]:
+        now = self._clock()
+        with self._lock:
+            healthy: List[EndpointHealth] = []
+            for endpoint in self._endpoints:
+                if endpoint.ejected_until is not None and endpoint.ejected_until <= now:
+                    endpoint.ejected_until = None
+                    endpoint.latency = None
+                    print(f"[monitor] re-admitting RPC endpoint {endpoint.label}")
+                if endpoint.ejected_until is None:
+                    healthy.append(endpoint)
+            if not healthy:
+                # Everything is ejected: fall back to whichever comes back first.
+                return sorted(self._endpoints, key=lambda endpoint: endpoint.ejected_until or 0.0)
+            return sorted(healthy, key=lambda endpoint: endpoint.score)
+
+    def record(self, endpoint: EndpointHealth, latency: float, ok: bool) -> None:
+        if self._latency is not None:
+            self._latency.observe(latency, endpoint=endpoint.label)
+        with self._lock:
+            if endpoint.latency is None:
+                endpoint.latency = latency
+            else:
+                endpoint.latency = self._alpha * latency + (1 - self._alpha) * endpoint.latency
+            endpoint.error_rate = self._alpha * (0.0 if ok else 1.0) + (1 - self._alpha) * endpoint.error_rate
+            if ok:
+                endpoint.consecutive_errors = 0
+                return
+            endpoint.consecutive_errors += 1
+            if endpoint.consecutive_errors < self._eject_after or endpoint.ejected_until is not None:
+                return
+            endpoint.ejected_until = self._clock() + self._eject_seconds
+        if self._ejections is not None:
+            self._ejections.inc(endpoint=endpoint.label)
+        print(
+            f"[monitor] ejecting RPC endpoint {endpoint.label} for {self._eject_seconds:g}s "
+            f"after {endpoint.consecutive_errors} consecutive failures"
+        )
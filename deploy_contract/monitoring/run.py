@@ -1,27 +1,153 @@
 from __future__ import annotations
 
+import argparse
 import asyncio
 from pathlib import Path
 
-from .service import load_service_from_file
+from .config import is_multichain_config, load_config
+from .coordinator import ShardCoordinator, rebalance_state
+from .multichain import load_multichain_monitor
+from .profiling import SignalProfiler, profile_cycle
+from .service import READ_MODES, load_service_from_file
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the Airship vault monitor.")
+    parser.add_argument("--interval", type=int, default=None, help="seconds between cycles (default 120)")
+    parser.add_argument(
+        "--blocks-per-cycle",
+        type=int,
+        default=None,
+        help="evaluate once per N new blocks instead of on a fixed interval",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="partition tokens across N worker processes",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="serve Prometheus metrics on this port",
+    )
+    parser.add_argument(
+        "--read-mode",
+        choices=READ_MODES,
+        default="multicall",
+        help="how pool and inventory state is read each cycle",
+    )
+    parser.add_argument(
+        "--track-events",
+        action="store_true",
+        help="with --read-mode multicall or async, re-read only pools with new Sync/Swap logs",
+    )
+    parser.add_argument(
+        "--adaptive-polling",
+        action="store_true",
+        help="re-price volatile or near-threshold pools every block and back off quiet ones",
+    )
+    parser.add_argument(
+        "--poll-budget",
+        type=int,
+        default=None,
+        help="with --adaptive-polling, price at most N pools per cycle",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="profile a single cycle (cProfile + collapsed stacks) and exit",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        type=Path,
+        default=Path("profiles"),
+        help="where --profile and SIGUSR1/SIGUSR2 sampling profiles are written",
+    )
+    args = parser.parse_args()
+    if args.track_events and args.read_mode == "sequential":
+        parser.error("--track-events needs --read-mode multicall or async")
+
     config_path = Path(__file__).with_name("config.json")
     if not config_path.exists():
         example = Path(__file__).with_name("config.example.json")
         raise FileNotFoundError(
             f"{config_path} not found. Copy {example.name} and adjust it before running."
         )
+    if is_multichain_config(config_path):
+        if args.workers > 1:
+            parser.error("--workers is not supported with a multi-chain config")
+        if args.interval is not None:
+            parser.error(
+                "--interval is not supported with a multi-chain config; chains run every "
+                "blocks_per_cycle blocks (set per chain or with --blocks-per-cycle)"
+            )
+        try:
+            monitor = load_multichain_monitor(
+                config_path,
+                metrics_port=args.metrics_port,
+                read_mode=args.read_mode,
+                track_events=args.track_events,
+                adaptive_polling=args.adaptive_polling,
+                poll_budget=args.poll_budget,
+                blocks_per_cycle=args.blocks_per_cycle,
+            )
+        except EnvironmentError as exc:
+            raise SystemExit(str(exc)) from exc
+        if args.profile:
+            for name, service in monitor.services.items():
+                asyncio.run(profile_cycle(service.run_once, args.profile_dir, name=f"cycle-{name}"))
+            return
+        SignalProfiler(args.profile_dir, all_threads=True).install()
+        monitor.run()
+        return
+
+    interval = args.interval if args.interval is not None else 120
+    if args.workers > 1:
+        if args.profile:
+            parser.error("--profile runs one in-process cycle and is not supported with --workers")
+        if args.blocks_per_cycle:
+            parser.error("--blocks-per-cycle is not supported with --workers; shards run every --interval seconds")
+        try:
+            load_config(config_path)
+        except EnvironmentError as exc:
+            raise SystemExit(str(exc)) from exc
+        ShardCoordinator(
+            config_path,
+            args.workers,
+            interval_seconds=interval,
+            profile_dir=args.profile_dir,
+            read_mode=args.read_mode,
+            track_events=args.track_events,
+            adaptive_polling=args.adaptive_polling,
+            poll_budget=args.poll_budget,
+        ).run()
+        return
+
     try:
+        rebalance_state(load_config(config_path), None)
         monitor = load_service_from_file(
             str(config_path),
             auto_discover=True,
             discovery_lookback=10_000,
+            metrics_port=args.metrics_port,
+            watch_config=True,
+            read_mode=args.read_mode,
+            track_events=args.track_events,
+            adaptive_polling=args.adaptive_polling,
+            poll_budget=args.poll_budget,
         )
     except EnvironmentError as exc:
         raise SystemExit(str(exc)) from exc
-    asyncio.run(monitor.run_forever(interval_seconds=120))
+    if args.profile:
+        asyncio.run(profile_cycle(monitor.run_once, args.profile_dir))
+        return
+    SignalProfiler(args.profile_dir).install()
+    if args.blocks_per_cycle:
+        asyncio.run(monitor.run_on_blocks(blocks_per_cycle=args.blocks_per_cycle))
+    else:
+        asyncio.run(monitor.run_forever(interval_seconds=interval))
 
 
 if __name__ == "__main__":
@@ -1,10 +1,22 @@
 from __future__ import annotations
-import asyncio, traceback
+import argparse, asyncio, traceback
+from pathlib import Path
 
 # from monitoring.service import load_service_from_file
+from .profiling import profile_cycle
 from .service import load_service_from_file
 
 
+parser = argparse.ArgumentParser(description="Run a single monitor cycle.")
+parser.add_argument(
+    "--profile",
+    type=Path,
+    default=None,
+    metavar="DIR",
+    help="record cProfile and collapsed-stack profiles of the cycle into DIR",
+)
+args = parser.parse_args()
+
 monitor = load_service_from_file(
     "deploy_contract/monitoring/config.json",
     auto_discover=True,
@@ -14,7 +26,10 @@ monitor = load_service_from_file(
 
 async def main():
     try:
-        await monitor.run_once()
+        if args.profile:
+            await profile_cycle(monitor.run_once, args.profile)
+        else:
+            await monitor.run_once()
     except Exception:
         traceback.print_exc()
 
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import json
+import math
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from web3 import Web3
+
+from .fixed_point import FixedPrice
+
+try:  # pragma: no cover - optional dependency
+    import websockets
+except ImportError:  # pragma: no cover - optional dependency
+    websockets = None  # type: ignore
+
+PollKey = Tuple[str, str]
+
+
+class BlockScheduler:
+    """Tracks the chain head and hands out one evaluation slot per N blocks.
+
+    Heads arrive from a ``newHeads`` websocket subscription when available and
+    from ``eth_blockNumber`` polling otherwise. Heads that land while a cycle is
+    still running are coalesced, so the next cycle always targets the latest
+    head instead of replaying every block it missed.
+    """
+
+    def __init__(
+        self,
+        w3: Web3,
+        *,
+        websocket_url: Optional[str] = None,
+        blocks_per_cycle: int = 1,
+        poll_interval: float = 2.0,
+        resubscribe_after: float = 60.0,
+    ) -> None:
+        self._w3 = w3
+        self._websocket_url = websocket_url
+        self._blocks_per_cycle = max(1, blocks_per_cycle)
+        self._poll_interval = poll_interval
+        self._resubscribe_after = resubscribe_after
+        self._head: Optional[int] = None
+        self._last_scheduled: Optional[int] = None
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def head(self) -> Optional[int]:
+        return self._head
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._follow_heads())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def next_block(self) -> int:
+        """Wait until a new evaluation is due and return the head to evaluate."""
+        self.start()
+        while True:
+            head = self._head
+            if head is not None and (
+                self._last_scheduled is None
+                or head - self._last_scheduled >= self._blocks_per_cycle
+            ):
+                if self._last_scheduled is not None:
+                    skipped = head - self._last_scheduled - self._blocks_per_cycle
+                    if skipped > 0:
+                        print(f"[monitor] coalesced {skipped} block(s); evaluating head {head}")
+                self._last_scheduled = head
+                return head
+            self._changed.clear()
+            await self._changed.wait()
+
+    def _publish(self, block_number: int) -> None:
+        if self._head is None or block_number > self._head:
+            self._head = block_number
+            self._changed.set()
+
+    async def _follow_heads(self) -> None:
+        while True:
+            if self._websocket_url and websockets is not None:
+                try:
+                    await self._subscribe()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    print(f"[monitor] newHeads subscription failed ({exc}); polling eth_blockNumber")
+                await self._poll(self._resubscribe_after)
+            else:
+                await self._poll(None)
+
+    async def _subscribe(self) -> None:
+        async with websockets.connect(self._websocket_url) as ws:
+            await ws.send(
+                json.dumps(
+                    {"jsonrpc": "2.0", "id": 1, "method": "eth_subscribe", "params": ["newHeads"]}
+                )
+            )
+            ack = json.loads(await ws.recv())
+            if "error" in ack:
+                raise ConnectionError(ack["error"])
+            async for message in ws:
+                payload = json.loads(message)
+                header = payload.get("params", {}).get("result") or {}
+                number = header.get("number")
+                if number is not None:
+                    self._publish(int(number, 16))
+
+    async def _poll(self, duration: Optional[float]) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = None if duration is None else loop.time() + duration
+        while deadline is None or loop.time() < deadline:
+            try:
+                block_number = await asyncio.to_thread(lambda: self._w3.eth.block_number)
+                self._publish(int(block_number))
+            except Exception as exc:
+                print(f"[monitor] eth_blockNumber failed: {exc}")
+            await asyncio.sleep(self._poll_interval)
+
+
+@dataclass
+class PoolPollState:
+    interval: int = 1
+    next_due: int = 0
+    volatility_bps: float = 0.0
+    distance_bps: Optional[float] = None
+    last_price: Optional[FixedPrice] = None
+    version: int = 0
+
+
+class PoolPollScheduler:
+    """Decides which ``(token, pool)`` pairs to re-price on a given block.
+
+    Each pair keeps an EWMA of its absolute per-observation price move and its
+    latest distance to the sell threshold. Pairs whose expected blocks-to-
+    trigger (distance / volatility) is short are polled every block; quiet
+    pairs double their interval up to ``max_interval_blocks``. Due pairs are
+    served from a heap ordered by due block and urgency, capped at ``budget``
+    per cycle; anything over budget stays due for the next cycle.
+    """
+
+    def __init__(
+        self,
+        *,
+        alpha: float = 0.3,
+        hot_distance_bps: int = 200,
+        max_interval_blocks: int = 64,
+        budget: Optional[int] = None,
+    ) -> None:
+        self._alpha = alpha
+        self._hot_distance_bps = hot_distance_bps
+        self._max_interval = max(1, max_interval_blocks)
+        self._budget = budget
+        self._states: Dict[PollKey, PoolPollState] = {}
+        self._heap: List[Tuple[int, float, int, PollKey]] = []
+
+    def state(self, key: PollKey) -> Optional[PoolPollState]:
+        return self._states.get(key)
+
+    def sync(self, keys: Iterable[PollKey], block_number: int) -> None:
+        """Track exactly ``keys``; new pairs are due immediately."""
+        wanted = set(keys)
+        for key in list(self._states):
+            if key not in wanted:
+                del self._states[key]
+        for key in wanted:
+            if key not in self._states:
+                self._states[key] = PoolPollState(next_due=block_number)
+                self._push(key)
+
+    def due(self, block_number: int) -> Set[PollKey]:
+        selected: Set[PollKey] = set()
+        deferred: List[PollKey] = []
+        while self._heap and self._heap[0][0] <= block_number:
+            _, _, version, key = heapq.heappop(self._heap)
+            state = self._states.get(key)
+            if state is None or state.version != version:
+                continue
+            if self._budget is not None and len(selected) >= self._budget:
+                deferred.append(key)
+                continue
+            selected.add(key)
+            # Provisionally due again next block; observe() pushes the real slot.
+            state.next_due = block_number + 1
+            self._push(key)
+        for key in deferred:
+            self._push(key)
+        return selected
+
+    def observe(
+        self,
+        key: PollKey,
+        block_number: int,
+        price: FixedPrice,
+        change_bps: int,
+        threshold_bps: int,
+    ) -> int:
+        """Record a fresh price for ``key`` and schedule its next poll; returns the interval."""
+        state = self._states.setdefault(key, PoolPollState())
+        if state.last_price is not None and state.last_price.is_positive() and price.is_positive():
+            move_bps = abs(price.change_bps(state.last_price))
+            state.volatility_bps = self._alpha * move_bps + (1 - self._alpha) * state.volatility_bps
+        state.last_price = price
+        state.distance_bps = max(0.0, float(threshold_bps - change_bps))
+
+        if state.distance_bps <= self._hot_distance_bps:
+            interval = 1
+        else:
+            # Moves are measured over ``interval`` blocks; scale back to one block
+            # as a random walk would, which errs towards polling more often.
+            per_block_bps = state.volatility_bps / math.sqrt(state.interval)
+            expected_blocks = state.distance_bps / max(per_block_bps, 1e-9)
+            # Poll at least twice before the pair could plausibly cross its threshold.
+            interval = max(1, min(state.interval * 2, self._max_interval, int(expected_blocks / 2)))
+        state.interval = interval
+        state.next_due = block_number + interval
+        self._push(key)
+        return interval
+
+    def _push(self, key: PollKey) -> None:
+        state = self._states[key]
+        state.version += 1
+        urgency = -(state.volatility_bps / max(state.distance_bps, 1.0)) if state.distance_bps is not None else float("-inf")
+        heapq.heappush(self._heap, (state.next_due, urgency, state.version, key))
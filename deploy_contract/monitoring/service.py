@@ -2,19 +2,36 @@ from __future__ import annotations
 
 import asyncio
 import time
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
 
-from decimal import Decimal
 from web3 import Web3
 
-from .config import MonitorConfig, load_config
+from .batch_pricing import PriceBatch
+from .config import MonitorConfig, PoolConfig, load_config, load_token_config
 from .connections import Web3ConnectionManager
-from .executor import SwapExecution, SwapExecutor
-from .inventory import ERC20_ABI, InventoryFetcher
-from .price_sources import PriceResult, build_price_source
+from .event_tracker import PoolStateTracker
+from .executor import NO_SIZE_REASON, SwapExecution, SwapExecutor
+from .inventory import ERC20_ABI, InventoryFetcher, TokenInventory
+from .metadata_store import ChainMetadata, MetadataStore
+from .metrics import MetricsRegistry, MetricsServer
+from .multicall import MULTICALL3_ADDRESS, BatchReader, Multicall3Client, view_call
+from .price_sources import PoolSnapshot, PriceResult, build_price_source
+from .registry import ConfigWriter, RegistryDiff, TokenRegistry
+from .router import RouteCandidate, SplitRouter
+from .scheduler import BlockScheduler, PollKey, PoolPollScheduler
+from .state_store import HistoryRow
 from .strategy import StrategyDecision, StrategyEngine
-from .token_discovery import discover_new_tokens
+from .token_discovery import scan_new_tokens
+from .twap import TwapStore
+from .v3_simulator import V3StateLoader
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from web3 import AsyncWeb3
+
+READ_MODES = ("multicall", "async", "sequential")
+
+_BLOCK_TIMESTAMP_KEY = ("block", "timestamp")
 
 
 @dataclass
@@ -24,6 +41,21 @@ class EvaluationContext:
     price: PriceResult
     decision: StrategyDecision
     execution: Optional[SwapExecution]
+    block_number: Optional[int] = None
+
+
+def log_contexts(contexts: List[EvaluationContext], prefix: str = "[monitor]") -> None:
+    for context in contexts:
+        token = context.decision.token_inventory.symbol
+        change = context.decision.price_change_bps
+        reason = context.decision.reason
+        price = context.price.price
+        if context.execution:
+            print(
+                f"{prefix} SELL {token}: price={price} change={change}bps reason={reason} amount={context.execution.amount_in}"
+            )
+        else:
+            print(f"{prefix} HOLD {token}: price={price} change={change}bps reason={reason}")
 
 
 class MonitorService:
@@ -33,28 +65,107 @@ class MonitorService:
         *,
         auto_discover: bool = False,
         discovery_lookback: int = 5_000,
+        read_mode: str = "multicall",
+        track_events: bool = False,
+        metrics_port: Optional[int] = None,
+        metadata_store: Optional[MetadataStore] = None,
+        watch_config: bool = False,
+        adaptive_polling: bool = False,
+        poll_budget: Optional[int] = None,
     ) -> None:
+        if read_mode not in READ_MODES:
+            raise ValueError(f"Unsupported read mode: {read_mode}")
         self._config = config
         self._config_path = config.source_path
         self._auto_discover = auto_discover
         self._discovery_lookback = discovery_lookback
         self._last_discovery_block: Optional[int] = None
-        self._connection_manager = Web3ConnectionManager(config.rpc)
-        self._strategy = StrategyEngine(config)
+        self._registry = TokenRegistry(config.tokens)
+        self._metrics = MetricsRegistry()
+        self._config_writer = ConfigWriter(config.source_path, self._metrics) if config.source_path else None
+        self._watch_config = watch_config
+        self._config_mtime = self._read_config_mtime()
+        self._metrics_port = metrics_port
+        self._connection_manager = Web3ConnectionManager(config.rpc, self._metrics)
+        self._pin_pool_views()
+        self._strategy = StrategyEngine(config, metrics=self._metrics)
+        self._metadata_store = metadata_store or MetadataStore(config.metadata_file, self._metrics)
+        self._log_prefix = f"[monitor:{config.chain_name}]" if config.chain_name else "[monitor]"
+        self._metadata: Optional[ChainMetadata] = None
+        self._executor: Optional[SwapExecutor] = None
+        self._twap = TwapStore(config.twap_file)
         self._price_sources = self._prepare_price_sources()
-        self._quote_decimals_cache: Dict[str, int] = {}
+        self._snapshots: Dict[Tuple[str, str], PoolSnapshot] = {}
+        self._block_timestamp: Optional[int] = None
+        self._v3_states = V3StateLoader(
+            multicall_address=config.rpc.multicall_address,
+            max_calls_per_batch=config.rpc.multicall_batch_size,
+        )
+        self._read_mode = read_mode
+        self._inventory_fetcher: Optional[InventoryFetcher] = None
+        self._tracker: Optional[PoolStateTracker] = PoolStateTracker() if track_events else None
+        self._tracker_target: Optional[int] = None
+        self._tracker_hash: Optional[bytes] = None
+        self._use_tracker = False
+        self._last_block: Optional[int] = None
+        self._poll_scheduler: Optional[PoolPollScheduler] = (
+            PoolPollScheduler(budget=poll_budget) if adaptive_polling else None
+        )
+        self._due_pools: Optional[Set[PollKey]] = None
+        self._pool_polls = self._metrics.counter(
+            "monitor_pool_polls_total", "Pools re-priced or skipped by the adaptive poll scheduler."
+        )
+
+    @property
+    def metrics(self) -> MetricsRegistry:
+        return self._metrics
 
     async def run_once(self) -> List[EvaluationContext]:
-        bundle = await self._connection_manager.get_connections()
-        http_w3 = bundle.http
+        start = time.perf_counter()
+        try:
+            return await self._run_cycle()
+        finally:
+            self._metrics.cycle_seconds.observe(time.perf_counter() - start)
+
+    async def _run_cycle(self) -> List[EvaluationContext]:
+        with self._metrics.phase("connection"):
+            bundle = await self._connection_manager.get_connections()
+            http_w3 = bundle.http
+            self._bind_metadata(bundle.chain_id)
+            block_number = int(await asyncio.to_thread(lambda: http_w3.eth.block_number))
 
-        if self._auto_discover and self._config_path:
-            self._maybe_discover_tokens(http_w3)
+        if block_number == self._last_block:
+            return []
 
-        inventory_fetcher = InventoryFetcher(http_w3, self._config.vault_address)
-        inventories = inventory_fetcher.fetch(self._config.tokens)
+        if self._watch_config:
+            self._maybe_reload_config()
 
-        executor = SwapExecutor(http_w3, self._config)
+        if self._read_mode == "async":
+            if bundle.async_client is None:
+                raise RuntimeError(
+                    "read_mode 'async' needs an async web3 client and this web3 install provides none; "
+                    "use read_mode 'multicall' or 'sequential'"
+                )
+            if self._auto_discover and self._config_path:
+                with self._metrics.phase("discovery"):
+                    await asyncio.to_thread(self._maybe_discover_tokens, http_w3, block_number)
+            self._use_tracker = await asyncio.to_thread(self._advance_tracker, http_w3, block_number)
+            self._select_due_pools(block_number)
+            inventories, prices = await self._read_async(http_w3, bundle.async_client, block_number)
+        else:
+            if self._auto_discover and self._config_path:
+                with self._metrics.phase("discovery"):
+                    self._maybe_discover_tokens(http_w3, block_number)
+            if self._read_mode == "multicall":
+                self._use_tracker = self._advance_tracker(http_w3, block_number)
+            self._select_due_pools(block_number)
+            if self._read_mode == "multicall":
+                inventories, prices = self._read_batched(http_w3, block_number)
+            else:
+                inventories, prices = self._read_sequential(http_w3, block_number)
+        self._last_block = block_number
+
+        executor = self._get_executor(http_w3)
         contexts: List[EvaluationContext] = []
 
         for token in self._config.tokens:
@@ -62,76 +173,458 @@ class MonitorService:
             if inventory is None:
                 continue
 
+            token_contexts: List[EvaluationContext] = []
             for pool in token.pools:
-                price_source = self._price_sources[(token.address.lower(), pool.address.lower())]
-                quote_decimals = self._get_token_decimals(http_w3, pool.quote_token)
-                price = price_source.fetch(
-                    http_w3,
-                    inventory.decimals,
-                    quote_decimals,
-                )
-                decision = self._strategy.evaluate(inventory, pool, price)
-                execution: Optional[SwapExecution] = None
-
-                if decision.should_swap:
-                    execution = executor.build_execution(decision, pool, price.price)
-
-                contexts.append(
+                price = prices.get((token.address.lower(), pool.address.lower()))
+                if price is None:
+                    continue
+                with self._metrics.phase("strategy"):
+                    decision = self._strategy.evaluate(inventory, pool, price)
+                if self._poll_scheduler is not None:
+                    self._poll_scheduler.observe(
+                        (token.address.lower(), pool.address.lower()),
+                        block_number,
+                        price.price,
+                        decision.price_change_bps,
+                        self._strategy.resolve_threshold(inventory, pool),
+                    )
+                token_contexts.append(
                     EvaluationContext(
                         token_address=token.address,
                         pool_address=pool.address,
                         price=price,
                         decision=decision,
-                        execution=execution,
+                        execution=None,
+                        block_number=block_number,
                     )
                 )
+
+            with self._metrics.phase("execution"):
+                if self._config.strategy.split_routing:
+                    self._route_token(executor, token_contexts, block_number)
+                else:
+                    self._execute_per_pool(executor, token_contexts, block_number)
+            contexts.extend(token_contexts)
+
+        self._strategy.flush(
+            self._history_rows(contexts, self._block_timestamp) if self._strategy.records_history else ()
+        )
+        self._metadata_store.flush()
+        self._twap.flush()
         return contexts
 
-    async def run_forever(self, interval_seconds: int = 60) -> None:
-        while True:
-            start = time.time()
+    @staticmethod
+    def _history_rows(contexts: List[EvaluationContext], block_timestamp: Optional[int]) -> List[HistoryRow]:
+        timestamp = block_timestamp if block_timestamp is not None else int(time.time())
+        return [
+            HistoryRow(
+                token=context.token_address,
+                pool=context.pool_address,
+                block=context.block_number,
+                timestamp=timestamp,
+                price=float(context.price.price),
+                price_ratio=context.price.price.ratio_string(),
+                change_bps=context.decision.price_change_bps,
+                should_swap=context.execution is not None,
+                reason=context.decision.reason,
+                amount_in=context.execution.amount_in if context.execution else None,
+                min_amount_out=context.execution.min_amount_out if context.execution else None,
+            )
+            for context in contexts
+        ]
+
+    def _execute_per_pool(
+        self,
+        executor: SwapExecutor,
+        contexts: List[EvaluationContext],
+        block_number: int,
+    ) -> None:
+        """Build one swap per triggered pool; pools that cannot be sold are held and their trigger undone."""
+        for context in contexts:
+            decision = context.decision
+            if not decision.should_swap:
+                continue
             try:
-                contexts = await self.run_once()
-                self._log_cycle(contexts)
+                context.execution = executor.build_execution(
+                    decision,
+                    decision.pool,
+                    decision.price,
+                    snapshot=self._snapshots.get((context.token_address.lower(), context.pool_address.lower())),
+                    block_identifier=block_number,
+                )
+                reason = NO_SIZE_REASON
             except Exception as exc:
-                print(f"[monitor] cycle error: {exc}")
-            elapsed = time.time() - start
-            await asyncio.sleep(max(0, interval_seconds - elapsed))
+                print(f"{self._log_prefix} failed to build swap on {context.pool_address}: {exc}")
+                context.execution = None
+                reason = "execution failed"
+            if context.execution is None:
+                self._strategy.cancel(decision)
+                context.decision = replace(decision, should_swap=False, sell_amount=0, reason=reason)
 
-    def _log_cycle(self, contexts: List[EvaluationContext]) -> None:
+    def _route_token(self, executor: SwapExecutor, contexts: List[EvaluationContext], block_number: int) -> None:
+        """Send one sell per token, split across every pool priced this cycle.
+
+        Falls back to :meth:`_execute_per_pool` when quoting or building any
+        leg fails, or when no leg can be built.
+        """
+        triggered = [context for context in contexts if context.decision.should_swap]
+        if not triggered:
+            return
+        lead = max(triggered, key=lambda context: context.decision.sell_amount)
+        ordered = [lead] + [context for context in contexts if context is not lead]
+        candidates = [
+            RouteCandidate(
+                pool=context.decision.pool,
+                decision=context.decision,
+                snapshot=self._snapshots.get((context.token_address.lower(), context.pool_address.lower())),
+            )
+            for context in ordered
+        ]
+        by_candidate = {id(candidate): context for candidate, context in zip(candidates, ordered)}
+        try:
+            routed = SplitRouter(executor).route(lead.decision.sell_amount, candidates, block_identifier=block_number)
+        except Exception as exc:
+            print(f"{self._log_prefix} split route for {lead.token_address} failed: {exc}; selling per pool")
+            routed = []
+        if not routed:
+            self._execute_per_pool(executor, contexts, block_number)
+            return
+        for candidate, execution in routed:
+            by_candidate[id(candidate)].execution = execution
         for context in contexts:
-            token = context.decision.token_inventory.symbol
-            change = context.decision.price_change_bps
-            reason = context.decision.reason
-            price = context.price.price
-            if context.execution:
-                print(
-                    f"[monitor] SELL {token}: price={price} change={change}bps reason={reason} amount={context.execution.amount_in}"
+            decision = context.decision
+            if context.execution is not None:
+                context.decision = replace(
+                    decision,
+                    should_swap=True,
+                    sell_amount=context.execution.amount_in,
+                    reason=decision.reason if decision.should_swap else "split route",
                 )
+            elif decision.should_swap:
+                context.decision = replace(decision, should_swap=False, sell_amount=0, reason="routed to other pools")
+
+    def _read_sequential(
+        self,
+        w3: Web3,
+        block_number: int,
+    ) -> Tuple[Dict[str, TokenInventory], Dict[Tuple[str, str], PriceResult]]:
+        with self._metrics.phase("inventory"):
+            inventories = self._get_inventory_fetcher(w3).fetch(self._config.tokens, block_number)
+        price_batch = PriceBatch()
+        block_timestamp: Optional[int] = None
+        self._snapshots = {}
+
+        for token in self._config.tokens:
+            inventory = inventories.get(Web3.to_checksum_address(token.address).lower())
+            if inventory is None:
+                continue
+            for pool in token.pools:
+                key = (token.address.lower(), pool.address.lower())
+                if not self._is_due(key):
+                    continue
+                with self._metrics.phase("price", pool_type=pool.type.lower()):
+                    quote_decimals = self._get_token_decimals(w3, pool.quote_token)
+                    source = self._price_sources[key]
+                    snapshot = self._snapshots[key] = source.read(w3, block_number)
+                    if source.uses_twap:
+                        if block_timestamp is None:
+                            block_timestamp = int(w3.eth.get_block(block_number)["timestamp"])
+                        snapshot.timestamp = block_timestamp
+                    source.add_to_batch(
+                        price_batch,
+                        snapshot,
+                        inventory.decimals,
+                        quote_decimals,
+                        key=key,
+                        baseline=self._strategy.baseline(token.address, pool.address),
+                    )
+        if block_timestamp is None and self._strategy.records_history:
+            block_timestamp = int(w3.eth.get_block(block_number)["timestamp"])
+        self._block_timestamp = block_timestamp
+        return inventories, self._compute_prices(price_batch)
+
+    def _read_batched(
+        self,
+        w3: Web3,
+        block_number: int,
+    ) -> Tuple[Dict[str, TokenInventory], Dict[Tuple[str, str], PriceResult]]:
+        batch = self._queue_cycle_reads(w3)
+        client = Multicall3Client(
+            w3,
+            address=self._config.rpc.multicall_address or MULTICALL3_ADDRESS,
+            max_calls_per_batch=self._config.rpc.multicall_batch_size,
+        )
+        with self._metrics.phase("read", mode="multicall"):
+            try:
+                batch.execute(client, block_number)
+            except Exception as exc:
+                self._metrics.errors.inc(stage="multicall")
+                if self._config.rpc.batch_window_ms is not None:
+                    print(f"[monitor] multicall failed ({exc}); falling back to JSON-RPC batches")
+                    batch.execute_rpc_batch(w3, block_number, batch_size=self._config.rpc.max_batch_size)
+                else:
+                    print(f"[monitor] multicall failed ({exc}); falling back to sequential reads")
+                    batch.execute_sequential(w3, block_number)
+        return self._collect_cycle_reads(w3, batch)
+
+    async def _read_async(
+        self,
+        w3: Web3,
+        async_w3: "AsyncWeb3",
+        block_number: int,
+    ) -> Tuple[Dict[str, TokenInventory], Dict[Tuple[str, str], PriceResult]]:
+        batch = self._queue_cycle_reads(w3)
+        with self._metrics.phase("read", mode="async"):
+            await batch.execute_async(
+                async_w3,
+                block_number,
+                concurrency=self._config.rpc.max_concurrency,
+            )
+        return self._collect_cycle_reads(w3, batch)
+
+    def _queue_cycle_reads(self, w3: Web3) -> BatchReader:
+        batch = BatchReader()
+        self._get_inventory_fetcher(w3).queue(self._config.tokens, batch)
+        needs_timestamp = self._strategy.records_history
+
+        for token in self._config.tokens:
+            for pool in token.pools:
+                key = (token.address.lower(), pool.address.lower())
+                if not self._is_due(key):
+                    continue
+                source = self._price_sources[key]
+                needs_timestamp = needs_timestamp or source.uses_twap
+                if self._tracked_snapshot(pool.address) is not None:
+                    source.queue_dynamic(batch)
+                else:
+                    source.queue(batch)
+                quote_key = pool.quote_token.lower()
+                if self._metadata.get_decimals(quote_key) is None:
+                    batch.add(
+                        (quote_key, "decimals"),
+                        view_call(pool.quote_token, "decimals()", ["uint8"]),
+                    )
+        if needs_timestamp:
+            batch.add(
+                _BLOCK_TIMESTAMP_KEY,
+                view_call(
+                    self._config.rpc.multicall_address or MULTICALL3_ADDRESS,
+                    "getCurrentBlockTimestamp()",
+                    ["uint256"],
+                ),
+            )
+        return batch
+
+    def _collect_cycle_reads(
+        self,
+        w3: Web3,
+        batch: BatchReader,
+    ) -> Tuple[Dict[str, TokenInventory], Dict[Tuple[str, str], PriceResult]]:
+        with self._metrics.phase("inventory"):
+            inventories = self._get_inventory_fetcher(w3).collect(self._config.tokens, batch)
+        price_batch = PriceBatch()
+        timestamp = batch.get(_BLOCK_TIMESTAMP_KEY)
+        block_timestamp = int(timestamp.value()) if timestamp is not None and timestamp.success else None
+        self._block_timestamp = block_timestamp
+        self._snapshots = {}
+        reseeded: Set[str] = set()
+
+        for token in self._config.tokens:
+            inventory = inventories.get(Web3.to_checksum_address(token.address).lower())
+            if inventory is None:
+                continue
+            for pool in token.pools:
+                key = (token.address.lower(), pool.address.lower())
+                if not self._is_due(key):
+                    continue
+                with self._metrics.phase("price", pool_type=pool.type.lower()):
+                    quote_decimals = self._collect_quote_decimals(batch, pool.quote_token)
+                    source = self._price_sources[key]
+                    tracked = self._tracked_snapshot(pool.address)
+                    if tracked is not None:
+                        snapshot = source.collect_dynamic(batch, tracked)
+                    else:
+                        snapshot = source.collect(batch)
+                        if snapshot is not None and self._tracker is not None:
+                            self._tracker.seed(pool.address, snapshot)
+                            reseeded.add(pool.address.lower())
+                    if quote_decimals is None or snapshot is None:
+                        self._metrics.errors.inc(stage="pool_read")
+                        print(f"[monitor] skipping pool {pool.address}: read failed")
+                        continue
+                    snapshot.timestamp = block_timestamp
+                    self._snapshots[key] = snapshot
+                    source.add_to_batch(
+                        price_batch,
+                        snapshot,
+                        inventory.decimals,
+                        quote_decimals,
+                        key=key,
+                        baseline=self._strategy.baseline(token.address, pool.address),
+                    )
+
+        if self._tracker is not None and self._tracker_target is not None:
+            if self._use_tracker:
+                self._tracker.mark_synced(self._tracker_target)
+            elif self._tracker.pools <= reseeded:
+                self._tracker.mark_synced(self._tracker_target, block_hash=self._tracker_hash, full=True)
             else:
-                print(f"[monitor] HOLD {token}: price={price} change={change}bps reason={reason}")
+                # A pool kept its old snapshot; resync again rather than skip its logs.
+                self._tracker.request_resync()
+                print(
+                    f"{self._log_prefix} pool resync incomplete "
+                    f"({len(self._tracker.pools - reseeded)} pool(s) not re-read); retrying next cycle"
+                )
+        return inventories, self._compute_prices(price_batch)
+
+    def _compute_prices(self, price_batch: PriceBatch) -> Dict[Tuple[str, str], PriceResult]:
+        if not len(price_batch):
+            return {}
+        with self._metrics.phase("price_batch"):
+            return price_batch.compute().results()
+
+    def _select_due_pools(self, block_number: int) -> None:
+        if self._poll_scheduler is None:
+            self._due_pools = None
+            return
+        self._poll_scheduler.sync(self._price_sources.keys(), block_number)
+        if self._tracker_resyncing(block_number):
+            # A resync re-seeds every tracked pool, so every pool is read.
+            self._due_pools = None
+            self._pool_polls.inc(len(self._price_sources), result="polled")
+            return
+        self._due_pools = self._poll_scheduler.due(block_number)
+        self._pool_polls.inc(len(self._due_pools), result="polled")
+        self._pool_polls.inc(len(self._price_sources) - len(self._due_pools), result="skipped")
+
+    def _is_due(self, key: PollKey) -> bool:
+        return self._due_pools is None or key in self._due_pools
+
+    def _tracker_resyncing(self, block_number: int) -> bool:
+        return self._tracker is not None and self._tracker_target == block_number and not self._use_tracker
+
+    def _advance_tracker(self, w3: Web3, block_number: int) -> bool:
+        if self._tracker is None:
+            return False
+        self._tracker_target = block_number
+        if not self._tracker.needs_resync(block_number) and self._tracker.advance(w3, block_number):
+            return True
+        # Taken before the full read, so a reorg during it shows up on the next advance.
+        self._tracker_hash = self._tracker.block_hash(w3, block_number)
+        return False
+
+    def _tracked_snapshot(self, pool_address: str) -> Optional[PoolSnapshot]:
+        if self._tracker is None or not self._use_tracker:
+            return None
+        return self._tracker.snapshot(pool_address)
+
+    def _collect_quote_decimals(self, batch: BatchReader, address: str) -> Optional[int]:
+        decimals = self._metadata.get_decimals(address)
+        if decimals is None:
+            result = batch.get((address.lower(), "decimals"))
+            if result is None or not result.success:
+                return None
+            decimals = int(result.value())
+            self._metadata.set_token(address, decimals=decimals)
+        return decimals
+
+    def _get_inventory_fetcher(self, w3: Web3) -> InventoryFetcher:
+        if self._inventory_fetcher is None:
+            self._inventory_fetcher = InventoryFetcher(w3, self._config.vault_address, self._metadata)
+        return self._inventory_fetcher
+
+    def _get_executor(self, w3: Web3) -> SwapExecutor:
+        if self._executor is None:
+            self._executor = SwapExecutor(w3, self._config, self._metadata, self._v3_states)
+        return self._executor
+
+    def _bind_metadata(self, chain_id: Optional[int]) -> None:
+        if self._metadata is not None:
+            return
+        expected = self._config.chain_id
+        if expected is not None and chain_id is not None and int(expected) != chain_id:
+            raise ValueError(
+                f"RPC for {self._config.chain_name or 'monitor'} reports chain id {chain_id}, expected {expected}"
+            )
+        if chain_id is None:
+            chain_id = expected
+        self._metadata = self._metadata_store.view(chain_id or 0, self._metrics)
+        for source in self._price_sources.values():
+            source.metadata = self._metadata
+
+    async def run_forever(self, interval_seconds: int = 60) -> None:
+        metrics_server = await self._start_metrics_server()
+        try:
+            while True:
+                start = time.time()
+                try:
+                    contexts = await self.run_once()
+                    self._log_cycle(contexts)
+                except Exception as exc:
+                    self._metrics.errors.inc(stage="cycle")
+                    print(f"{self._log_prefix} cycle error: {exc}")
+                elapsed = time.time() - start
+                await asyncio.sleep(max(0, interval_seconds - elapsed))
+        finally:
+            if metrics_server is not None:
+                await metrics_server.stop()
+
+    async def run_on_blocks(self, blocks_per_cycle: int = 1, poll_interval: float = 2.0) -> None:
+        metrics_server = await self._start_metrics_server()
+        bundle = await self._connection_manager.get_connections()
+        scheduler = BlockScheduler(
+            bundle.http,
+            websocket_url=self._config.rpc.websocket,
+            blocks_per_cycle=blocks_per_cycle,
+            poll_interval=poll_interval,
+        )
+        try:
+            while True:
+                await scheduler.next_block()
+                try:
+                    contexts = await self.run_once()
+                    self._log_cycle(contexts)
+                except Exception as exc:
+                    self._metrics.errors.inc(stage="cycle")
+                    print(f"{self._log_prefix} cycle error: {exc}")
+        finally:
+            await scheduler.stop()
+            if metrics_server is not None:
+                await metrics_server.stop()
+
+    async def _start_metrics_server(self) -> Optional[MetricsServer]:
+        if self._metrics_port is None:
+            return None
+        server = MetricsServer(self._metrics, port=self._metrics_port)
+        await server.start()
+        return server
+
+    def _log_cycle(self, contexts: List[EvaluationContext]) -> None:
+        log_contexts(contexts, prefix=self._log_prefix)
 
     def _prepare_price_sources(self):
         sources: Dict[Tuple[str, str], any] = {}
         for token in self._config.tokens:
             for pool in token.pools:
                 key = (token.address.lower(), pool.address.lower())
-                sources[key] = build_price_source(pool)
+                sources[key] = self._build_price_source(pool)
         return sources
 
+    def _build_price_source(self, pool: PoolConfig):
+        return build_price_source(pool, self._metadata, self._twap, use_twap=self._config.strategy.use_twap)
+
     def _get_token_decimals(self, w3: Web3, address: str) -> int:
-        key = address.lower()
-        if key not in self._quote_decimals_cache:
+        decimals = self._metadata.get_decimals(address)
+        if decimals is None:
             contract = w3.eth.contract(address=Web3.to_checksum_address(address), abi=ERC20_ABI)
-            decimals = contract.functions.decimals().call()
-            self._quote_decimals_cache[key] = int(decimals)
-        return self._quote_decimals_cache[key]
+            decimals = int(contract.functions.decimals().call())
+            self._metadata.set_token(address, decimals=decimals)
+        return decimals
 
-    def _maybe_discover_tokens(self, w3: Web3) -> None:
+    def _maybe_discover_tokens(self, w3: Web3, current_block: int) -> None:
         if not self._config_path:
             return
 
-        current_block = w3.eth.block_number
         if self._last_discovery_block is None:
             start_block = max(0, current_block - self._discovery_lookback)
         else:
@@ -139,13 +632,14 @@ class MonitorService:
         if start_block > current_block:
             start_block = current_block
 
-        discovered = discover_new_tokens(
-            self._config_path,
-            rpc_http=self._config.rpc.http,
+        discovered = scan_new_tokens(
+            w3,
             vault_address=self._config.vault_address,
             from_block=start_block,
             to_block=current_block,
-            w3=w3,
+            known_addresses=self._registry.known_addresses(),
+            default_threshold_bps=self._config.strategy.default_threshold_bps,
+            metadata=self._metadata,
         )
 
         self._last_discovery_block = current_block
@@ -155,10 +649,85 @@ class MonitorService:
                 "[monitor] discovered new tokens: "
                 + ", ".join(token.address for token in discovered)
             )
-            self._config = load_config(self._config_path)
-            self._config_path = self._config.source_path
-            self._strategy = StrategyEngine(self._config)
-            self._price_sources = self._prepare_price_sources()
+            added = []
+            for token in discovered:
+                try:
+                    added.append(load_token_config(token.entry))
+                except EnvironmentError as exc:
+                    print(f"[monitor] not tracking {token.address} yet: {exc}")
+            self._apply_registry_diff(RegistryDiff(added=added))
+            if self._config_writer is not None:
+                self._config_writer.append([token.entry for token in discovered])
+
+    def reload_config(self) -> RegistryDiff:
+        """Re-read tokens from the config file and apply only what changed."""
+        if self._config_writer is not None:
+            self._config_writer.flush()
+        self._config_mtime = self._read_config_mtime()
+        config = load_config(self._config_path)
+        diff = self._registry.diff(config.tokens)
+        self._apply_registry_diff(diff)
+        return diff
+
+    def _maybe_reload_config(self) -> None:
+        mtime = self._read_config_mtime()
+        if mtime is None or mtime == self._config_mtime:
+            return
+        if self._config_writer is not None and mtime == self._config_writer.written_mtime:
+            self._config_mtime = mtime
+            return
+        try:
+            diff = self.reload_config()
+        except Exception as exc:
+            self._metrics.errors.inc(stage="config_reload")
+            print(f"[monitor] config reload failed: {exc}")
+            return
+        if not diff.empty:
+            print(
+                f"[monitor] config reloaded: +{len(diff.added)} / -{len(diff.removed)} token(s)"
+            )
+
+    def _read_config_mtime(self) -> Optional[float]:
+        if not self._config_path:
+            return None
+        try:
+            return self._config_path.stat().st_mtime
+        except OSError:
+            return None
+
+    def _pin_pool_views(self) -> None:
+        cache = self._connection_manager.call_cache
+        if cache is not None:
+            cache.set_immutable_targets(pool.address for token in self._config.tokens for pool in token.pools)
+
+    def _apply_registry_diff(self, diff: RegistryDiff) -> None:
+        if diff.empty:
+            return
+        self._registry.apply(diff)
+        self._pin_pool_views()
+        added_keys = {
+            (token.address.lower(), pool.address.lower())
+            for token in diff.added
+            for pool in token.pools
+        }
+        for token in diff.removed:
+            for pool in token.pools:
+                key = (token.address.lower(), pool.address.lower())
+                if key in added_keys:
+                    continue
+                self._price_sources.pop(key, None)
+                self._twap.forget([pool.address])
+                if self._tracker is not None:
+                    self._tracker.forget([pool.address])
+        for token in diff.added:
+            for pool in token.pools:
+                key = (token.address.lower(), pool.address.lower())
+                source = self._price_sources.get(key)
+                if source is not None and source.pool == pool:
+                    continue
+                if source is not None and self._tracker is not None:
+                    self._tracker.forget([pool.address])
+                self._price_sources[key] = self._build_price_source(pool)
 
 
 def load_service_from_file(
@@ -166,10 +735,22 @@ def load_service_from_file(
     *,
     auto_discover: bool = False,
     discovery_lookback: int = 5_000,
+    read_mode: str = "multicall",
+    track_events: bool = False,
+    metrics_port: Optional[int] = None,
+    watch_config: bool = False,
+    adaptive_polling: bool = False,
+    poll_budget: Optional[int] = None,
 ) -> MonitorService:
     config = load_config(path)
     return MonitorService(
         config,
         auto_discover=auto_discover,
         discovery_lookback=discovery_lookback,
+        read_mode=read_mode,
+        track_events=track_events,
+        metrics_port=metrics_port,
+        watch_config=watch_config,
+        adaptive_polling=adaptive_polling,
+        poll_budget=poll_budget,
     )
@@ -0,0 +1,427 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from .config import HistoryConfig
+
+Record = Dict[str, Any]
+
+STATE_BACKENDS = ("json", "journal", "sqlite")
+
+_SQLITE_HEADER = b"SQLite format 3\x00"
+
+
+@dataclass
+class HistoryRow:
+    """One evaluated (token, pool) pair of one cycle."""
+
+    token: str
+    pool: str
+    block: Optional[int]
+    timestamp: int
+    price: float
+    price_ratio: str
+    change_bps: int
+    should_swap: bool
+    reason: str
+    amount_in: Optional[int] = None
+    min_amount_out: Optional[int] = None
+
+
+class StateBackend:
+    """Durable home for :class:`StrategyEngine` entries (``state key -> record``).
+
+    A record is ``{"baseline": str, "baseline_ratio": str, "last_trigger":
+    int | None}``, the same shape the JSON ``state_file`` has always used.
+    The engine calls :meth:`write` once per cycle with the entries that
+    changed since the previous call, plus the cycle's history rows when
+    :attr:`records_history` is set.
+    """
+
+    records_history = False
+    path: Optional[Path] = None
+
+    def load(self) -> Dict[str, Record]:
+        raise NotImplementedError
+
+    def write(self, changes: Dict[str, Record], history: Sequence[HistoryRow] = ()) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release resources; writes are already durable when :meth:`write` returns."""
+
+
+class JsonStateBackend(StateBackend):
+    """The whole state as one indented JSON object, rewritten via atomic rename."""
+
+    def __init__(self, path: Path) -> None:
+        self._path = Path(path)
+        self._records: Dict[str, Record] = {}
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def load(self) -> Dict[str, Record]:
+        self._records = _read_snapshot(self._path)
+        return dict(self._records)
+
+    def write(self, changes: Dict[str, Record], history: Sequence[HistoryRow] = ()) -> None:
+        if not changes:
+            return
+        self._records.update(changes)
+        _write_snapshot(self._path, self._records)
+
+
+class JournalStateBackend(StateBackend):
+    """Append-only journal on top of a JSON snapshot.
+
+    Each :meth:`write` appends one compact JSON line per changed entry to
+    ``<state_file>.journal`` and fsyncs it, so a cycle costs I/O in the
+    number of decisions that changed state rather than the number of keys.
+    Once the journal holds ``compact_records`` lines, the snapshot
+    (``state_file``, same format as :class:`JsonStateBackend`) is rewritten
+    via atomic rename and the journal truncated. Startup loads the snapshot
+    and replays the journal over it. Records are absolute values, so
+    replaying a journal that was already compacted is harmless; a torn
+    last line from a crash is dropped.
+    """
+
+    def __init__(self, path: Path, *, compact_records: int = 10_000) -> None:
+        self._path = Path(path)
+        self._journal_path = self._path.with_name(self._path.name + ".journal")
+        self._compact_records = max(1, compact_records)
+        self._records: Dict[str, Record] = {}
+        self._journal_records = 0
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def journal_path(self) -> Path:
+        return self._journal_path
+
+    def load(self) -> Dict[str, Record]:
+        self._records = _read_snapshot(self._path)
+        self._journal_records = 0
+        if self._journal_path.exists():
+            data = self._journal_path.read_bytes()
+            complete = data.rfind(b"\n") + 1
+            for line in data[:complete].splitlines():
+                try:
+                    entry = json.loads(line)
+                    key = entry.pop("key")
+                except Exception:
+                    continue
+                self._records[key] = entry
+                self._journal_records += 1
+            if complete < len(data):
+                # Drop a torn tail so the next append starts on a fresh line.
+                os.truncate(self._journal_path, complete)
+        if self._journal_records >= self._compact_records:
+            self.compact()
+        return dict(self._records)
+
+    def write(self, changes: Dict[str, Record], history: Sequence[HistoryRow] = ()) -> None:
+        if not changes:
+            return
+        self._records.update(changes)
+        lines = "".join(
+            json.dumps({"key": key, **record}, separators=(",", ":")) + "\n"
+            for key, record in changes.items()
+        )
+        with self._journal_path.open("a") as journal:
+            journal.write(lines)
+            journal.flush()
+            os.fsync(journal.fileno())
+        self._journal_records += len(changes)
+        if self._journal_records >= self._compact_records:
+            self.compact()
+
+    def compact(self) -> None:
+        _write_snapshot(self._path, self._records)
+        with self._journal_path.open("w") as journal:
+            journal.flush()
+            os.fsync(journal.fileno())
+        self._journal_records = 0
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS strategy_state (
+    key TEXT PRIMARY KEY,
+    token TEXT NOT NULL,
+    pool TEXT NOT NULL,
+    baseline TEXT NOT NULL,
+    baseline_ratio TEXT NOT NULL,
+    last_trigger INTEGER
+);
+CREATE TABLE IF NOT EXISTS history (
+    token TEXT NOT NULL,
+    pool TEXT NOT NULL,
+    block INTEGER,
+    timestamp INTEGER NOT NULL,
+    price REAL NOT NULL,
+    price_ratio TEXT NOT NULL,
+    change_bps INTEGER NOT NULL,
+    should_swap INTEGER NOT NULL,
+    reason TEXT NOT NULL,
+    amount_in TEXT,
+    min_amount_out TEXT
+);
+CREATE INDEX IF NOT EXISTS history_token_pool_block ON history (token, pool, block);
+CREATE INDEX IF NOT EXISTS history_timestamp ON history (timestamp);
+"""
+
+
+class SqliteStateBackend(StateBackend):
+    """Strategy state and per-cycle history in one SQLite database (WAL mode).
+
+    Several processes (e.g. coordinator shards) can share the file: WAL lets
+    readers run alongside the single writer, and each :meth:`write` is one
+    ``BEGIN IMMEDIATE`` transaction covering the cycle's state changes and
+    history rows. History is indexed by ``(token, pool, block)``. Retention
+    runs at most once per ``history.bucket_seconds``. Rows younger than
+    ``history.raw_seconds`` are kept as-is. Older HOLD rows are thinned to
+    the last one per pool and bucket, and every row older than
+    ``history.retention_seconds`` is deleted. SELL rows are never thinned.
+
+    The connection may be used from any thread (a multi-chain monitor builds
+    the backend on the main thread and flushes from the chain's thread);
+    a lock serializes access to it.
+
+    If ``path`` still holds a JSON (or journal) ``state_file`` from another
+    backend, its entries are imported into ``strategy_state`` on open. The
+    original files are kept next to the database with a ``.bak`` suffix.
+    """
+
+    records_history = True
+
+    def __init__(self, path: Path, history: Optional[HistoryConfig] = None) -> None:
+        self._path = Path(path)
+        _import_json_state(self._path)
+        self._policy = history or HistoryConfig()
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            str(self._path), timeout=30.0, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SQLITE_SCHEMA)
+        self._last_maintenance: Optional[int] = None
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def load(self) -> Dict[str, Record]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT key, baseline, baseline_ratio, last_trigger FROM strategy_state"
+            ).fetchall()
+        return {
+            key: {"baseline": baseline, "baseline_ratio": ratio, "last_trigger": last_trigger}
+            for key, baseline, ratio, last_trigger in rows
+        }
+
+    def write(self, changes: Dict[str, Record], history: Sequence[HistoryRow] = ()) -> None:
+        if not changes and not history:
+            return
+        with self._lock:
+            self._write(changes, history)
+
+    def _write(self, changes: Dict[str, Record], history: Sequence[HistoryRow]) -> None:
+        connection = self._connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "INSERT INTO strategy_state (key, token, pool, baseline, baseline_ratio, last_trigger) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+                "baseline = excluded.baseline, baseline_ratio = excluded.baseline_ratio, "
+                "last_trigger = excluded.last_trigger",
+                [
+                    (key, *_split_key(key), record["baseline"], record["baseline_ratio"], record["last_trigger"])
+                    for key, record in changes.items()
+                ],
+            )
+            connection.executemany(
+                "INSERT INTO history (token, pool, block, timestamp, price, price_ratio, change_bps, "
+                "should_swap, reason, amount_in, min_amount_out) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        row.token.lower(),
+                        row.pool.lower(),
+                        row.block,
+                        row.timestamp,
+                        row.price,
+                        row.price_ratio,
+                        row.change_bps,
+                        int(row.should_swap),
+                        row.reason,
+                        _text(row.amount_in),
+                        _text(row.min_amount_out),
+                    )
+                    for row in history
+                ],
+            )
+            if history:
+                self._maybe_apply_retention(max(row.timestamp for row in history))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def history(
+        self,
+        token: str,
+        pool: str,
+        *,
+        from_block: Optional[int] = None,
+        to_block: Optional[int] = None,
+    ) -> List[HistoryRow]:
+        query = (
+            "SELECT token, pool, block, timestamp, price, price_ratio, change_bps, should_swap, reason, "
+            "amount_in, min_amount_out FROM history WHERE token = ? AND pool = ?"
+        )
+        params: List[Any] = [token.lower(), pool.lower()]
+        if from_block is not None:
+            query += " AND block >= ?"
+            params.append(from_block)
+        if to_block is not None:
+            query += " AND block <= ?"
+            params.append(to_block)
+        with self._lock:
+            rows = self._connection.execute(query + " ORDER BY block, rowid", params).fetchall()
+        return [
+            HistoryRow(
+                token=row[0],
+                pool=row[1],
+                block=row[2],
+                timestamp=row[3],
+                price=row[4],
+                price_ratio=row[5],
+                change_bps=row[6],
+                should_swap=bool(row[7]),
+                reason=row[8],
+                amount_in=int(row[9]) if row[9] is not None else None,
+                min_amount_out=int(row[10]) if row[10] is not None else None,
+            )
+            for row in rows
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _maybe_apply_retention(self, now: int) -> None:
+        policy = self._policy
+        bucket = max(1, policy.bucket_seconds)
+        if self._last_maintenance is not None and now - self._last_maintenance < bucket:
+            return
+        self._last_maintenance = now
+        self._connection.execute("DELETE FROM history WHERE timestamp < ?", (now - policy.retention_seconds,))
+        raw_cutoff = now - policy.raw_seconds
+        self._connection.execute(
+            "DELETE FROM history WHERE timestamp < ? AND should_swap = 0 AND rowid NOT IN ("
+            "SELECT MAX(rowid) FROM history WHERE timestamp < ? AND should_swap = 0 "
+            "GROUP BY token, pool, timestamp / ?)",
+            (raw_cutoff, raw_cutoff, bucket),
+        )
+
+
+def open_state_backend(
+    path: Optional[Path],
+    backend: str = "json",
+    history: Optional[HistoryConfig] = None,
+) -> Optional[StateBackend]:
+    if backend not in STATE_BACKENDS:
+        raise ValueError(f"Unsupported state backend: {backend}")
+    if not path:
+        return None
+    if backend == "sqlite":
+        return SqliteStateBackend(path, history)
+    if backend == "journal":
+        return JournalStateBackend(path)
+    return JsonStateBackend(path)
+
+
+def _import_json_state(path: Path) -> None:
+    """Replace a JSON/journal state file at ``path`` with an equivalent SQLite database."""
+    journal_path = path.with_name(path.name + ".journal")
+    header = b""
+    if path.exists():
+        with path.open("rb") as handle:
+            header = handle.read(len(_SQLITE_HEADER))
+    if header == _SQLITE_HEADER or (not header and not journal_path.exists()):
+        return
+    if header:
+        try:
+            snapshot = json.loads(path.read_text())
+        except (UnicodeDecodeError, ValueError):
+            snapshot = None
+        if not isinstance(snapshot, dict):
+            raise ValueError(
+                f"state_file {path} is neither a SQLite database nor a JSON state file; "
+                "point the sqlite state backend at a new path"
+            )
+    records = JournalStateBackend(path).load()
+
+    tmp_path = path.with_name(path.name + ".import")
+    tmp_path.unlink(missing_ok=True)
+    connection = sqlite3.connect(str(tmp_path), isolation_level=None)
+    try:
+        connection.executescript(_SQLITE_SCHEMA)
+        connection.execute("BEGIN")
+        connection.executemany(
+            "INSERT INTO strategy_state (key, token, pool, baseline, baseline_ratio, last_trigger) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (key, *_split_key(key), record["baseline"], record["baseline_ratio"], record.get("last_trigger"))
+                for key, record in records.items()
+            ],
+        )
+        connection.execute("COMMIT")
+    finally:
+        connection.close()
+    # Keep the originals, then swap the database in; a crash before the swap
+    # leaves the JSON state in place and the import runs again.
+    for original in (path, journal_path):
+        if original.exists():
+            shutil.copyfile(original, original.with_name(original.name + ".bak"))
+    os.replace(tmp_path, path)
+    journal_path.unlink(missing_ok=True)
+    print(f"[monitor] imported {len(records)} state entries from JSON state file {path} into SQLite")
+
+
+def _split_key(key: str) -> Sequence[str]:
+    token, _, pool = key.partition("::")
+    return token, pool
+
+
+def _text(value: Optional[int]) -> Optional[str]:
+    return str(value) if value is not None else None
+
+
+def _read_snapshot(path: Path) -> Dict[str, Record]:
+    if not path.exists():
+        return {}
+    try:
+        return dict(json.loads(path.read_text()))
+    except Exception:
+        return {}
+
+
+def _write_snapshot(path: Path, records: Dict[str, Record]) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("w") as handle:
+        handle.write(json.dumps(records, indent=2))
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
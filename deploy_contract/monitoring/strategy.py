@@ -1,20 +1,20 @@
 from __future__ import annotations
 
-import json
 import time
 from dataclasses import dataclass
-from decimal import Decimal
-from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Sequence, Set
 
 from .config import MonitorConfig, PoolConfig
+from .fixed_point import FixedPrice
 from .inventory import TokenInventory
+from .metrics import MetricsRegistry
 from .price_sources import PriceResult
+from .state_store import HistoryRow, Record, StateBackend, open_state_backend
 
 
 @dataclass
 class StrategyState:
-    baseline_price: Decimal
+    baseline_price: FixedPrice
     last_trigger_ts: Optional[int]
 
 
@@ -23,7 +23,7 @@ class StrategyDecision:
     should_swap: bool
     token_inventory: TokenInventory
     pool: PoolConfig
-    price: Decimal
+    price: FixedPrice
     price_change_bps: int
     sell_amount: int
     slippage_bps: int
@@ -31,12 +31,31 @@ class StrategyDecision:
 
 
 class StrategyEngine:
-    def __init__(self, config: MonitorConfig) -> None:
+    """Baseline/threshold/cooldown logic with state kept in a :class:`StateBackend`.
+
+    State changes are only buffered by :meth:`evaluate`; call :meth:`flush`
+    once per cycle to persist them. Failed flushes are logged and, with
+    ``metrics``, counted as ``monitor_errors_total{stage="state_flush"}``.
+    """
+
+    def __init__(
+        self,
+        config: MonitorConfig,
+        backend: Optional[StateBackend] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ) -> None:
         self._config = config
+        self._metrics = metrics
+        self._log_prefix = f"[monitor:{config.chain_name}]" if config.chain_name else "[monitor]"
         self._state: Dict[str, StrategyState] = {}
-        self._state_path = config.state_file
-        if self._state_path:
-            self._load_state(self._state_path)
+        self._dirty: Set[str] = set()
+        # State replaced by this cycle's triggers, for cancel().
+        self._superseded: Dict[str, StrategyState] = {}
+        if backend is None:
+            backend = open_state_backend(config.state_file, config.state_backend, config.history)
+        self._backend = backend
+        if self._backend is not None:
+            self._load_state(self._backend.load())
 
     def _state_key(self, token_address: str, pool_address: str) -> str:
         return f"{token_address.lower()}::{pool_address.lower()}"
@@ -55,7 +74,7 @@ class StrategyEngine:
         state_key = self._state_key(token_inventory.config.address, pool.address)
         state = self._state.get(state_key)
 
-        if price.price <= 0:
+        if not price.price.is_positive():
             return StrategyDecision(
                 should_swap=False,
                 token_inventory=token_inventory,
@@ -69,7 +88,7 @@ class StrategyEngine:
 
         if state is None:
             self._state[state_key] = StrategyState(baseline_price=price.price, last_trigger_ts=None)
-            self._persist_state()
+            self._dirty.add(state_key)
             return StrategyDecision(
                 should_swap=False,
                 token_inventory=token_inventory,
@@ -81,9 +100,9 @@ class StrategyEngine:
                 reason="baseline initialized",
             )
 
-        if state.baseline_price <= 0:
+        if not state.baseline_price.is_positive():
             state.baseline_price = price.price
-            self._persist_state()
+            self._dirty.add(state_key)
             return StrategyDecision(
                 should_swap=False,
                 token_inventory=token_inventory,
@@ -95,10 +114,12 @@ class StrategyEngine:
                 reason="baseline reset",
             )
 
-        change_ratio = (price.price / state.baseline_price) - Decimal(1)
-        change_bps = int((change_ratio * Decimal(10_000)).to_integral_value(rounding="ROUND_DOWN"))
+        if price.change_bps is not None and price.baseline is state.baseline_price:
+            change_bps = price.change_bps
+        else:
+            change_bps = price.price.change_bps(state.baseline_price)
 
-        threshold_bps = self._resolve_threshold(token_inventory, pool)
+        threshold_bps = self.resolve_threshold(token_inventory, pool)
         if change_bps < threshold_bps:
             return StrategyDecision(
                 should_swap=False,
@@ -111,7 +132,28 @@ class StrategyEngine:
                 reason="threshold not met",
             )
 
-        cooldown = self._resolve_cooldown(pool)
+        max_divergence_bps = self.resolve_twap_divergence(pool)
+        if max_divergence_bps is not None:
+            windows = {int(seconds) for seconds in (pool.twap_seconds, *pool.twap_windows) if seconds and seconds > 0}
+            if not windows.issubset(price.twaps):
+                reason = "twap windows unavailable"
+            elif any(abs(twap.change_bps(price.price)) > max_divergence_bps for twap in price.twaps.values()):
+                reason = "twap windows disagree"
+            else:
+                reason = None
+            if reason is not None:
+                return StrategyDecision(
+                    should_swap=False,
+                    token_inventory=token_inventory,
+                    pool=pool,
+                    price=price.price,
+                    price_change_bps=change_bps,
+                    sell_amount=0,
+                    slippage_bps=slippage_bps,
+                    reason=reason,
+                )
+
+        cooldown = self.resolve_cooldown(pool)
         if state.last_trigger_ts and timestamp - state.last_trigger_ts < cooldown:
             return StrategyDecision(
                 should_swap=False,
@@ -142,8 +184,9 @@ class StrategyEngine:
                 reason="insufficient balance",
             )
 
+        self._superseded.setdefault(state_key, state)
         self._state[state_key] = StrategyState(baseline_price=price.price, last_trigger_ts=timestamp)
-        self._persist_state()
+        self._dirty.add(state_key)
 
         return StrategyDecision(
             should_swap=True,
@@ -156,7 +199,19 @@ class StrategyEngine:
             reason="price threshold met",
         )
 
-    def _resolve_threshold(self, token: TokenInventory, pool: PoolConfig) -> int:
+    def cancel(self, decision: StrategyDecision) -> None:
+        """Undo the baseline reset and cooldown of a triggered ``decision`` that was not executed."""
+        state_key = self._state_key(decision.token_inventory.config.address, decision.pool.address)
+        previous = self._superseded.pop(state_key, None)
+        if previous is not None:
+            self._state[state_key] = previous
+            self._dirty.add(state_key)
+
+    def baseline(self, token_address: str, pool_address: str) -> Optional[FixedPrice]:
+        state = self._state.get(self._state_key(token_address, pool_address))
+        return state.baseline_price if state is not None else None
+
+    def resolve_threshold(self, token: TokenInventory, pool: PoolConfig) -> int:
         if pool.threshold_bps is not None:
             return pool.threshold_bps
         if token.config.threshold_bps is not None:
@@ -169,35 +224,56 @@ class StrategyEngine:
             return int(metadata_value)
         return self._config.strategy.default_slippage_bps
 
-    def _resolve_cooldown(self, pool: PoolConfig) -> int:
+    def resolve_cooldown(self, pool: PoolConfig) -> int:
         metadata_value = pool.metadata.get("cooldown_seconds") if pool.metadata else None
         if metadata_value is not None:
             return int(metadata_value)
         return self._config.strategy.cooldown_seconds
 
-    def _persist_state(self) -> None:
-        if not self._state_path:
-            return
-        payload = {
-            key: {
-                "baseline": str(value.baseline_price),
-                "last_trigger": value.last_trigger_ts,
-            }
-            for key, value in self._state.items()
-        }
-        try:
-            self._state_path.write_text(json.dumps(payload, indent=2))
-        except Exception:
-            pass
+    def resolve_twap_divergence(self, pool: PoolConfig) -> Optional[int]:
+        metadata_value = pool.metadata.get("max_twap_divergence_bps") if pool.metadata else None
+        if metadata_value is not None:
+            return int(metadata_value)
+        return self._config.strategy.max_twap_divergence_bps
 
-    def _load_state(self, path: Path) -> None:
-        if not path.exists():
+    @property
+    def records_history(self) -> bool:
+        return self._backend is not None and self._backend.records_history
+
+    def flush(self, history: Sequence[HistoryRow] = ()) -> None:
+        """Persist the entries changed since the last flush, and ``history`` if the backend keeps it."""
+        self._superseded.clear()
+        if self._backend is None or not (self._dirty or history):
+            self._dirty.clear()
             return
+        changes = {key: self._record(self._state[key]) for key in self._dirty if key in self._state}
         try:
-            raw = json.loads(path.read_text())
-        except Exception:
+            self._backend.write(changes, history)
+        except Exception as exc:
+            if self._metrics is not None:
+                self._metrics.errors.inc(stage="state_flush")
+            print(
+                f"{self._log_prefix} failed to persist strategy state to "
+                f"{self._config.state_backend} backend {self._backend.path}: {exc}"
+            )
             return
-        for key, entry in raw.items():
-            baseline = Decimal(entry["baseline"])
+        self._dirty.clear()
+
+    def close(self) -> None:
+        self.flush()
+        if self._backend is not None:
+            self._backend.close()
+
+    @staticmethod
+    def _record(state: StrategyState) -> Record:
+        return {
+            "baseline": str(state.baseline_price),
+            "baseline_ratio": state.baseline_price.ratio_string(),
+            "last_trigger": state.last_trigger_ts,
+        }
+
+    def _load_state(self, records: Dict[str, Record]) -> None:
+        for key, entry in records.items():
+            baseline = FixedPrice.parse(entry.get("baseline_ratio") or entry["baseline"])
             last_trigger = entry.get("last_trigger")
             self._state[key] = StrategyState(baseline_price=baseline, last_trigger_ts=last_trigger)
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict
+
+import pytest
+from helpers import raw_config
+
+from deploy_contract.monitoring.config import MonitorConfig, load_config
+
+
+@pytest.fixture
+def make_config(tmp_path):
+    """Load a :class:`MonitorConfig` from ``raw_config`` plus top-level overrides."""
+
+    def build(strategy: Dict[str, Any] = None, **top_level: Any) -> MonitorConfig:
+        raw = raw_config(**(strategy or {}))
+        raw.update(top_level)
+        path = tmp_path / "config.json"
+        path.write_text(json.dumps(raw))
+        return load_config(path)
+
+    return build
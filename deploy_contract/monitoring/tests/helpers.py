@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any, Dict, Tuple
+
+from web3 import Web3
+
+from deploy_contract.monitoring.config import PoolConfig, TokenConfig
+from deploy_contract.monitoring.inventory import TokenInventory
+from deploy_contract.monitoring.multicall import BatchReader, CallResult
+
+VAULT = "0x" + "0" * 39 + "1"
+TOKEN = "0x" + "a" * 40
+USDC = "0x" + "5" * 40
+WETH = "0x" + "f" * 40
+ROUTER = "0x" + "7" * 40
+V2_POOL = "0x" + "21" * 20
+V3_POOL = "0x" + "22" * 20
+
+
+def raw_config(**strategy: Any) -> Dict[str, Any]:
+    return {
+        "vault_address": VAULT,
+        "executor_address": VAULT,
+        "rpc": {"http": "http://127.0.0.1:8545"},
+        "tokens": [
+            {
+                "address": TOKEN,
+                "symbol": "TKN",
+                "decimals": 18,
+                "pools": [
+                    {
+                        "type": "uniswap_v2",
+                        "address": V2_POOL,
+                        "base_token": TOKEN,
+                        "quote_token": USDC,
+                        "metadata": {"router": ROUTER, "path": [TOKEN, USDC]},
+                    },
+                    {
+                        "type": "uniswap_v3",
+                        "address": V3_POOL,
+                        "base_token": TOKEN,
+                        "quote_token": WETH,
+                        "fee": 3000,
+                        "metadata": {"router": ROUTER},
+                    },
+                ],
+            }
+        ],
+        "strategy": {
+            "sell_percentage": 5000,
+            "cooldown_seconds": 600,
+            "default_slippage_bps": 50,
+            "default_threshold_bps": 1000,
+            **strategy,
+        },
+    }
+
+
+def inventory(token: TokenConfig, raw_balance: int) -> TokenInventory:
+    return TokenInventory(
+        config=token,
+        raw_balance=raw_balance,
+        human_balance=Decimal(raw_balance) / Decimal(10) ** 18,
+        decimals=18,
+        symbol=token.symbol or "TKN",
+    )
+
+
+def pool_by_type(token: TokenConfig, pool_type: str) -> PoolConfig:
+    return next(pool for pool in token.pools if pool.type == pool_type)
+
+
+def resolve_batch(batch: BatchReader, answers: Dict[Tuple[str, str], Tuple[Any, ...]]) -> None:
+    """Answer every queued call from ``answers[(target, signature)]``; the rest fail."""
+    selectors = {bytes(Web3.keccak(text=signature)[:4]): signature for _, signature in answers}
+    results = []
+    for request in batch.requests:
+        values = answers.get((request.target.lower(), selectors.get(bytes(request.data[:4]))))
+        results.append(CallResult(success=values is not None, values=values))
+    batch.resolve(results)
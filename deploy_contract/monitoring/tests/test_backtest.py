@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import csv
+import json
+import math
+import random
+import sys
+
+import pytest
+from helpers import TOKEN, USDC, V2_POOL, V3_POOL, WETH, raw_config
+
+from deploy_contract.monitoring import backtest
+from deploy_contract.monitoring.backtest import BacktestRunner, load_archive, save_archive
+
+pytest.importorskip("numpy")
+
+DECIMALS = {USDC: 6, WETH: 18}
+START = 1_700_000_000
+
+
+def _write_archive(path, blocks=600, seed=7):
+    """Random-walk prices: the V2 pool (token0 USDC) and the V3 pool (token0 TKN)."""
+    rng = random.Random(seed)
+    v2_price = v3_price = 1.0
+    rows = []
+    for block in range(blocks):
+        timestamp = START + 12 * block
+        v2_price *= math.exp(rng.gauss(0.0005, 0.01))
+        v3_price *= math.exp(rng.gauss(0.0003, 0.01))
+        if rng.random() < 0.7:
+            reserve = 10**24
+            rows.append(dict(pool=V2_POOL, block=block, log_index=1, timestamp=timestamp,
+                             reserve0=int(reserve * v2_price / 10**12), reserve1=reserve))
+        if rng.random() < 0.5:
+            rows.append(dict(pool=V3_POOL, block=block, log_index=0, timestamp=timestamp,
+                             sqrt_price_x96=int(math.sqrt(v3_price * 1e-3) * 2**96)))
+    with path.open("w", newline="") as handle:
+        writer = csv.DictWriter(
+            handle, fieldnames=["pool", "block", "log_index", "timestamp", "reserve0", "reserve1", "sqrt_price_x96"]
+        )
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+@pytest.fixture
+def runner(make_config, tmp_path):
+    archive = load_archive(_write_archive(tmp_path / "archive.csv"))
+    return BacktestRunner(make_config(), archive, decimals=DECIMALS, balances={TOKEN: 10**24})
+
+
+@pytest.mark.parametrize("threshold", [100, 500, 2000])
+@pytest.mark.parametrize("cooldown", [0, 600, 86_400])
+@pytest.mark.parametrize("percentage", [1000, 5000])
+def test_vectorized_matches_reference(runner, threshold, cooldown, percentage):
+    kwargs = dict(threshold_bps=threshold, cooldown_seconds=cooldown, sell_percentage=percentage)
+    vectorized = runner.run(**kwargs)
+    assert vectorized == runner.run(engine="reference", **kwargs)
+
+
+def test_runner_sells_and_conserves_balance(runner):
+    report = runner.run(threshold_bps=100, cooldown_seconds=0)
+    assert report.sells
+    sold = sum(sell.amount_in for sell in report.sells)
+    assert report.final_balances[TOKEN] == report.initial_balances[TOKEN] - sold
+    assert all(sell.change_bps >= 100 for sell in report.sells)
+    assert all(sell.missed_upside >= 0 for sell in report.sells)
+
+
+def test_archive_npz_round_trip(tmp_path):
+    archive = load_archive(_write_archive(tmp_path / "archive.csv"))
+    save_archive(archive, tmp_path / "archive.npz")
+    loaded = load_archive(tmp_path / "archive.npz")
+    assert sorted(loaded) == sorted(archive) == sorted([V2_POOL, V3_POOL])
+    for pool, series in archive.items():
+        for column in ("blocks", "timestamps", "first", "second"):
+            assert (getattr(loaded[pool], column) == getattr(series, column)).all()
+
+
+def test_csv_keeps_last_state_of_each_block(tmp_path):
+    path = tmp_path / "archive.csv"
+    with path.open("w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["pool", "block", "log_index", "timestamp", "reserve0", "reserve1"])
+        writer.writerow([V2_POOL.upper().replace("0X", "0x"), 5, 2, START, 3, 4])
+        writer.writerow([V2_POOL, 5, 1, START, 1, 2])
+        writer.writerow([V2_POOL, 6, 0, START + 12, 2**130, 7])
+    series = load_archive(path)[V2_POOL]
+    assert list(series.blocks) == [5, 6]
+    assert [series.value(series.first, index) for index in range(2)] == [3, 2**130]
+    assert [series.value(series.second, index) for index in range(2)] == [4, 7]
+
+
+def test_main_verify_checks_both_engines(tmp_path, monkeypatch, capsys):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(raw_config()))
+    archive = _write_archive(tmp_path / "archive.csv")
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "backtest",
+            str(archive),
+            "--config",
+            str(config_path),
+            "--balance",
+            f"{TOKEN}={10**24}",
+            "--decimals",
+            f"{USDC}=6",
+            "--decimals",
+            f"{WETH}=18",
+            "--threshold-bps",
+            "100,1000",
+            "--verify",
+        ],
+    )
+    backtest.main()
+    assert capsys.readouterr().out.count("reference engine agrees") == 2
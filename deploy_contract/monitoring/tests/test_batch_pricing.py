@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import pytest
+
+from deploy_contract.monitoring import batch_pricing
+from deploy_contract.monitoring.batch_pricing import PriceBatch, sqrt_ratios_at_ticks
+from deploy_contract.monitoring.fixed_point import (
+    MAX_TICK,
+    MIN_TICK,
+    Q96,
+    FixedPrice,
+    get_sqrt_ratio_at_tick,
+)
+
+np = pytest.importorskip("numpy")
+
+
+def _batch() -> PriceBatch:
+    batch = PriceBatch()
+    batch.add_reserves("v2", 5 * 10**24, 3 * 10**12, 18, 6, baseline=FixedPrice(59, 100))
+    batch.add_reserves("v2-up", 10**18, 2 * 10**30, 6, 18, baseline=FixedPrice(1, 1))
+    batch.add_reserves("drained", 0, 10**18, 18, 18, baseline=FixedPrice(1, 1))
+    batch.add_sqrt_price("v3", 3 * Q96 // 2, 18, 18, base_is_token0=True, tick=4054, baseline=FixedPrice(2, 1))
+    batch.add_sqrt_price("v3-token1", 3 * Q96 // 2, 18, 6, base_is_token0=False, tick=4054)
+    batch.add_sqrt_price("v3-empty", 0, 18, 18, base_is_token0=True)
+    batch.add_twap("twap", -7 * 1800 - 1, 1800, 18, 18, base_is_token0=True, baseline=FixedPrice(1, 1), window=1800)
+    batch.add_twap("v3", 4000 * 600, 600, 18, 18, base_is_token0=True, window=600, attach=True)
+    batch.add_cumulative_twap("v2", (3 << 112) * 60, 60, 18, 18, window=60, attach=True)
+    batch.set_tick_variance("v3", 12.5)
+    return batch
+
+
+def _rows(result):
+    return [
+        (
+            key,
+            result.price(index),
+            result.ticks[index],
+            bool(result.has_baseline[index]),
+            int(result.change_bps[index]),
+            int(result.exact_change_bps[index]),
+        )
+        for index, key in enumerate(result.keys)
+    ]
+
+
+def test_numpy_and_python_paths_agree(monkeypatch):
+    fast = _batch().compute()
+    monkeypatch.setattr(batch_pricing, "np", None)
+    slow = _batch().compute()
+    assert _rows(fast) == _rows(slow)
+    assert list(np.asarray(fast.prices, dtype=float)) == pytest.approx(list(slow.prices))
+    assert fast.results() == slow.results()
+
+
+def test_python_path_matches_fixed_price(monkeypatch):
+    monkeypatch.setattr(batch_pricing, "np", None)
+    results = _batch().compute().results()
+    assert results["v2"].price == FixedPrice.from_raw(3 * 10**12, 5 * 10**24, 18, 6)
+    assert results["v2"].twaps == {60: FixedPrice(3, 1)}
+    assert results["drained"].price == 0
+    assert results["drained"].change_bps == -10_000
+    assert results["v3"].change_bps == FixedPrice(9, 4).change_bps(FixedPrice(2, 1))
+    assert results["v3"].twaps[600] == FixedPrice.from_tick(4000, 18, 18)
+    assert results["v3"].tick_variance == 12.5
+    assert results["v3-empty"].price == 0
+    assert results["twap"].tick == -8
+    assert results["twap"].price == FixedPrice.from_tick(-8, 18, 18)
+
+
+def test_sqrt_ratios_at_ticks_matches_scalar():
+    ticks = [MIN_TICK, -887271, -100_000, -50, -1, 0, 1, 50, 100_000, 887271, MAX_TICK]
+    assert list(sqrt_ratios_at_ticks(ticks)) == [get_sqrt_ratio_at_tick(tick) for tick in ticks]
+    with pytest.raises(ValueError):
+        sqrt_ratios_at_ticks([MAX_TICK + 1])
+
+
+def test_empty_batch():
+    result = PriceBatch().compute()
+    assert len(result) == 0
+    assert result.results() == {}
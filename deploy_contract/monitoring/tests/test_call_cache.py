@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+from helpers import TOKEN, V2_POOL
+from web3.providers.base import BaseProvider
+
+from deploy_contract.monitoring.call_cache import AsyncCachingProvider, CachingProvider, CallCache
+from deploy_contract.monitoring.metrics import MetricsRegistry
+from deploy_contract.monitoring.multicall import function_selector
+
+TOKEN0 = "0x" + function_selector("token0()").hex()
+RESERVES = "0x" + function_selector("getReserves()").hex()
+
+
+def _call(to, data, block="latest"):
+    return ("eth_call", [{"to": to, "data": data}, block])
+
+
+def _ok(result="0x01"):
+    return {"jsonrpc": "2.0", "id": 1, "result": result}
+
+
+def test_block_pinned_calls_are_cached_per_block():
+    cache = CallCache()
+    key = cache.key(*_call(V2_POOL, RESERVES, "0x10"))
+    assert key == cache.key(*_call(V2_POOL, RESERVES, 16))
+    assert key != cache.key(*_call(V2_POOL, RESERVES, 17))
+    assert cache.key(*_call(V2_POOL, RESERVES)) is None
+    assert cache.key("eth_getBalance", [V2_POOL, 16]) is None
+
+    cache.put(key, {"error": {"code": -32000}})
+    assert cache.get(key) is None
+    cache.put(key, _ok())
+    assert cache.get(key) == _ok()
+
+
+def test_block_tier_evicts_least_recently_used():
+    cache = CallCache(max_entries=2)
+    keys = [cache.key(*_call(V2_POOL, RESERVES, block)) for block in (1, 2, 3)]
+    cache.put(keys[0], _ok())
+    cache.put(keys[1], _ok())
+    cache.get(keys[0])
+    cache.put(keys[2], _ok())
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+
+
+def test_immutable_views_only_for_known_pools():
+    cache = CallCache()
+    assert cache.key(*_call(V2_POOL, TOKEN0)) is None
+    cache.set_immutable_targets([V2_POOL.upper().replace("0X", "0x")])
+    key = cache.key(*_call(V2_POOL, TOKEN0))
+    assert key == cache.key(*_call(V2_POOL, TOKEN0, 5)) and key[0] == "immutable"
+    # Views on any other contract fall back to the per-block tier.
+    assert cache.key(*_call(TOKEN, TOKEN0)) is None
+    assert cache.key(*_call(TOKEN, TOKEN0, 5))[0] == 5
+
+
+def test_immutable_tier_skips_empty_results_and_is_bounded():
+    cache = CallCache(max_entries=1)
+    other = "0x" + "23" * 20
+    cache.set_immutable_targets([V2_POOL, other])
+    key = cache.key(*_call(V2_POOL, TOKEN0))
+    cache.put(key, _ok("0x"))
+    assert cache.get(key) is None
+    cache.put(key, _ok())
+    cache.put(cache.key(*_call(other, TOKEN0)), _ok())
+    assert cache.get(key) is None
+    assert len(cache) == 1
+
+
+def test_forgotten_pools_drop_their_immutable_entries():
+    cache = CallCache()
+    cache.set_immutable_targets([V2_POOL])
+    key = cache.key(*_call(V2_POOL, TOKEN0))
+    cache.put(key, _ok())
+    cache.set_immutable_targets([])
+    assert len(cache) == 0
+    cache.put(key, _ok())
+    assert len(cache) == 0
+
+
+class SlowProvider(BaseProvider):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+        self.release = threading.Event()
+
+    def make_request(self, method, params):
+        self.calls += 1
+        self.release.wait(5)
+        return _ok()
+
+    def make_batch_request(self, requests):
+        self.calls += len(requests)
+        return [_ok() for _ in requests]
+
+
+def test_concurrent_identical_calls_share_one_request():
+    metrics = MetricsRegistry()
+    upstream = SlowProvider()
+    provider = CachingProvider(upstream, CallCache(metrics=metrics))
+    method, params = _call(V2_POOL, RESERVES, 16)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(provider.make_request(method, params))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while metrics.cache_requests.value(cache="eth_call", result="miss") < 4 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    # Give the followers time to find the leader's flight before it lands.
+    time.sleep(0.05)
+    upstream.release.set()
+    for thread in threads:
+        thread.join()
+    assert upstream.calls == 1
+    assert results == [_ok()] * 4
+    assert metrics.cache_requests.value(cache="eth_call", result="coalesced") == 3
+    assert provider.make_request(method, params) == _ok() and upstream.calls == 1
+
+
+def test_batch_requests_only_fetch_misses():
+    upstream = SlowProvider()
+    upstream.release.set()
+    provider = CachingProvider(upstream, CallCache())
+    provider.make_request(*_call(V2_POOL, RESERVES, 16))
+    responses = provider.make_batch_request([_call(V2_POOL, RESERVES, 16), _call(V2_POOL, RESERVES, 17)])
+    assert responses == [_ok(), _ok()]
+    assert upstream.calls == 2
+
+
+class AsyncProvider:
+    def __init__(self, fail: bool = False) -> None:
+        self.calls = 0
+        self.fail = fail
+        self.release = asyncio.Event()
+
+    async def make_request(self, method, params):
+        self.calls += 1
+        await self.release.wait()
+        if self.fail:
+            raise ConnectionError("boom")
+        return _ok()
+
+
+@pytest.mark.skipif(AsyncCachingProvider is None, reason="web3 without AsyncBaseProvider")
+def test_async_concurrent_identical_calls_share_one_request():
+    async def scenario():
+        upstream = AsyncProvider()
+        provider = AsyncCachingProvider(upstream, CallCache())
+        method, params = _call(V2_POOL, RESERVES, 16)
+        tasks = [asyncio.create_task(provider.make_request(method, params)) for _ in range(3)]
+        await asyncio.sleep(0)
+        upstream.release.set()
+        assert await asyncio.gather(*tasks) == [_ok()] * 3
+        assert upstream.calls == 1
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.skipif(AsyncCachingProvider is None, reason="web3 without AsyncBaseProvider")
+def test_async_leader_failure_reaches_every_waiter():
+    async def scenario():
+        upstream = AsyncProvider(fail=True)
+        provider = AsyncCachingProvider(upstream, CallCache())
+        method, params = _call(V2_POOL, RESERVES, 16)
+        tasks = [asyncio.create_task(provider.make_request(method, params)) for _ in range(2)]
+        await asyncio.sleep(0)
+        upstream.release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(result, ConnectionError) for result in results)
+        assert upstream.calls == 1 and not provider._inflight
+
+    asyncio.run(scenario())
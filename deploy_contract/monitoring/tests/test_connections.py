@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import pytest
+
+from deploy_contract.monitoring import connections
+from deploy_contract.monitoring.connections import Web3ConnectionManager
+from deploy_contract.monitoring.metrics import MetricsRegistry
+from deploy_contract.monitoring.rpc_batch import BatchingAsyncHTTPProvider
+
+RPC = "http://127.0.0.1:8545"
+
+
+def test_async_client_is_built(make_config):
+    config = make_config(rpc={"http": RPC})
+    _, async_client = Web3ConnectionManager(config.rpc, MetricsRegistry())._create_default_clients()
+    assert isinstance(async_client, connections.AsyncWeb3)
+    assert isinstance(async_client.provider, connections.InstrumentedAsyncHTTPProvider)
+
+
+def test_batching_async_client_is_built(make_config):
+    config = make_config(rpc={"http": RPC, "batch_window_ms": 5})
+    _, async_client = Web3ConnectionManager(config.rpc)._create_batching_clients()
+    assert isinstance(async_client.provider, BatchingAsyncHTTPProvider)
+
+
+@pytest.mark.skipif(connections.WebSocketProvider is None, reason="web3 without WebSocketProvider")
+def test_websocket_async_client_is_built(make_config):
+    config = make_config(rpc={"http": RPC, "websocket": "ws://127.0.0.1:8546"})
+    _, async_client = Web3ConnectionManager(config.rpc)._create_default_clients()
+    assert isinstance(async_client.provider, connections.WebSocketProvider)
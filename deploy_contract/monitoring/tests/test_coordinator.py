@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from helpers import TOKEN
+
+from deploy_contract.monitoring.coordinator import HashRing, partition_config, rebalance_state
+from deploy_contract.monitoring.state_store import open_state_backend
+
+ADDRESSES = [f"0x{index:040x}" for index in range(2000)]
+
+
+def test_ring_is_deterministic_and_case_insensitive():
+    first, second = HashRing(4), HashRing(4)
+    assert [first.shard_for(address) for address in ADDRESSES] == [
+        second.shard_for(address) for address in ADDRESSES
+    ]
+    assert first.shard_for(TOKEN.upper().replace("0X", "0x")) == first.shard_for(TOKEN)
+
+
+def test_ring_spreads_tokens_over_every_shard():
+    ring = HashRing(4)
+    counts = [0] * 4
+    for address in ADDRESSES:
+        counts[ring.shard_for(address)] += 1
+    assert min(counts) > len(ADDRESSES) / 4 * 0.6
+
+
+@pytest.mark.parametrize("shards", [1, 3, 8])
+def test_adding_a_shard_moves_about_one_share(shards):
+    before, after = HashRing(shards), HashRing(shards + 1)
+    moved = [address for address in ADDRESSES if before.shard_for(address) != after.shard_for(address)]
+    # Only the new shard takes tokens; nothing moves between existing shards.
+    assert all(after.shard_for(address) == shards for address in moved)
+    assert len(moved) < len(ADDRESSES) / (shards + 1) * 1.5
+
+
+def test_ring_needs_a_shard():
+    with pytest.raises(ValueError):
+        HashRing(0)
+
+
+def test_partition_config_gives_each_token_one_shard(make_config, tmp_path):
+    config = make_config(state_file=str(tmp_path / "state.json"))
+    ring = HashRing(3)
+    owners = [shard for shard in range(3) if partition_config(config, ring, shard).tokens]
+    assert owners == [ring.shard_for(TOKEN)]
+    shard = partition_config(config, ring, owners[0])
+    assert shard.state_file == Path(tmp_path / f"state.shard{owners[0]}.json")
+
+
+def test_partition_config_shares_sqlite_database(make_config, tmp_path):
+    config = make_config(state_file=str(tmp_path / "state.db"), state_backend="sqlite")
+    assert partition_config(config, HashRing(2), 1).state_file == config.state_file
+
+
+def _record(last_trigger):
+    return {"baseline": "1.5", "baseline_ratio": "3/2", "last_trigger": last_trigger}
+
+
+def _shard_states(config, workers):
+    ring = HashRing(workers)
+    states = {}
+    for shard in range(workers):
+        path = partition_config(config, ring, shard).state_file
+        states[shard] = open_state_backend(path, config.state_backend).load()
+        assert all(ring.shard_for(key.partition("::")[0]) == shard for key in states[shard])
+    return states
+
+
+@pytest.mark.parametrize("backend", ["json", "journal"])
+def test_changing_worker_count_keeps_state(make_config, tmp_path, backend):
+    config = make_config(state_file=str(tmp_path / "state.json"), state_backend=backend)
+    keys = [f"{address}::0xpool" for address in ADDRESSES[:40]]
+    open_state_backend(config.state_file, backend).write({key: _record(None) for key in keys})
+
+    rebalance_state(config, HashRing(2))
+    states = _shard_states(config, 2)
+    assert sorted(key for state in states.values() for key in state) == sorted(keys)
+
+    # Each shard's worker triggers on one of its keys.
+    triggered = {}
+    for shard, state in states.items():
+        key = sorted(state)[0]
+        triggered[key] = _record(1_700_000_000 + shard)
+        writer = open_state_backend(partition_config(config, HashRing(2), shard).state_file, backend)
+        writer.load()
+        writer.write({key: triggered[key]})
+
+    expected = {key: triggered.get(key, _record(None)) for key in keys}
+    for workers in (3, 1, 2):
+        rebalance_state(config, HashRing(workers))
+        merged = {}
+        for state in _shard_states(config, workers).values():
+            merged.update(state)
+        assert merged == expected
+        assert open_state_backend(config.state_file, backend).load() == expected
+        assert not (tmp_path / f"state.shard{workers}.json").exists()
+
+    rebalance_state(config, None)
+    assert open_state_backend(config.state_file, backend).load() == expected
+    assert sorted(tmp_path.glob("state.shard*")) == []
+
+
+def test_rebalance_leaves_sqlite_alone(make_config, tmp_path):
+    config = make_config(state_file=str(tmp_path / "state.db"), state_backend="sqlite")
+    rebalance_state(config, HashRing(2))
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["config.json"]
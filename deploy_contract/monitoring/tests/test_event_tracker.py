@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from eth_abi import encode as abi_encode
+from helpers import TOKEN, USDC, V2_POOL, V3_POOL, WETH
+
+from deploy_contract.monitoring.event_tracker import SWAP_V3_TOPIC, SYNC_TOPIC, PoolStateTracker
+from deploy_contract.monitoring.price_sources import PoolSnapshot
+
+
+def _sync(block, index, reserve0, reserve1):
+    return {
+        "address": V2_POOL,
+        "blockNumber": block,
+        "logIndex": index,
+        "topics": [SYNC_TOPIC],
+        "data": abi_encode(["uint112", "uint112"], [reserve0, reserve1]),
+    }
+
+
+def _swap(block, index, sqrt_price_x96, tick):
+    return {
+        "address": V3_POOL,
+        "blockNumber": block,
+        "logIndex": index,
+        "topics": [SWAP_V3_TOPIC],
+        "data": abi_encode(["int256", "int256", "uint160", "uint128", "int24"], [1, -1, sqrt_price_x96, 10**18, tick]),
+    }
+
+
+def _hash(block, fork=0):
+    return bytes([fork]) + block.to_bytes(31, "big")
+
+
+class Chain:
+    """Serves logs and block hashes; ``fork`` bumps the hash of every block from a height on."""
+
+    def __init__(self, logs, on_get_logs=None):
+        self.logs = logs
+        self.requests = []
+        self.forks = {}
+        self.on_get_logs = on_get_logs
+        self.eth = SimpleNamespace(get_logs=self.get_logs, get_block=self.get_block)
+
+    def fork(self, from_block):
+        self.forks[from_block] = len(self.forks) + 1
+
+    def get_block(self, number):
+        fork = max((fork for height, fork in self.forks.items() if number >= height), default=0)
+        return {"hash": _hash(number, fork)}
+
+    def get_logs(self, params):
+        self.requests.append(params)
+        if self.on_get_logs is not None:
+            self.on_get_logs(self)
+        return [log for log in self.logs if params["fromBlock"] <= log["blockNumber"] <= params["toBlock"]]
+
+
+def _w3(logs):
+    chain = Chain(logs)
+    return chain, chain.requests
+
+
+def _tracker(**kwargs):
+    tracker = PoolStateTracker(**kwargs)
+    tracker.seed(V2_POOL, PoolSnapshot(token0=USDC, token1=TOKEN, reserve0=1, reserve1=2, timestamp=5))
+    tracker.seed(V3_POOL, PoolSnapshot(token0=TOKEN, token1=WETH, sqrt_price_x96=3, tick=4))
+    tracker.mark_synced(100, block_hash=_hash(100), full=True)
+    return tracker
+
+
+def test_advance_applies_logs_in_order():
+    w3, _ = _w3([_sync(102, 1, 30, 40), _sync(101, 0, 10, 20), _swap(102, 0, 2**96, 0)])
+    tracker = _tracker()
+    assert tracker.advance(w3, 102)
+    assert tracker.synced_block == 102
+    v2 = tracker.snapshot(V2_POOL)
+    assert (v2.reserve0, v2.reserve1, v2.timestamp) == (30, 40, None)
+    v3 = tracker.snapshot(V3_POOL)
+    assert (v3.sqrt_price_x96, v3.tick) == (2**96, 0)
+
+
+def test_advance_splits_log_ranges():
+    w3, requests = _w3([_sync(105, 0, 10, 20)])
+    tracker = _tracker(max_log_range=2)
+    assert tracker.advance(w3, 105)
+    assert [(request["fromBlock"], request["toBlock"]) for request in requests] == [(101, 102), (103, 104), (105, 105)]
+
+
+def test_reorg_of_synced_block_requests_resync():
+    chain = Chain([_sync(101, 0, 10, 20)])
+    chain.fork(100)
+    tracker = _tracker()
+    assert not tracker.advance(chain, 101)
+    assert chain.requests == []
+    assert tracker.needs_resync(101)
+    assert tracker.snapshot(V2_POOL).reserve0 == 1
+
+
+def test_reorg_during_log_fetch_requests_resync():
+    chain = Chain([_sync(101, 0, 10, 20)], on_get_logs=lambda chain: chain.fork(101))
+    tracker = _tracker()
+    assert not tracker.advance(chain, 102)
+    assert tracker.needs_resync(102)
+    assert tracker.snapshot(V2_POOL).reserve0 == 1
+
+
+def test_synced_hash_follows_the_tracker():
+    chain = Chain([_sync(101, 0, 10, 20)])
+    tracker = _tracker()
+    assert tracker.advance(chain, 101)
+    tracker.mark_synced(101)
+    chain.fork(102)
+    assert tracker.advance(chain, 102)
+    # Block 102 was read on the fork; a reorg back off it is caught next time.
+    chain.forks.clear()
+    assert not tracker.advance(chain, 103)
+
+
+def test_synced_block_without_hash_requests_resync():
+    chain = Chain([])
+    tracker = _tracker()
+    tracker.mark_synced(100, full=True)
+    tracker.mark_synced(101)
+    assert not tracker.advance(chain, 102)
+    assert tracker.needs_resync(102)
+
+
+def test_failed_fetch_requests_resync():
+    def get_logs(params):
+        raise ConnectionError("boom")
+
+    tracker = _tracker()
+    chain = Chain([])
+    chain.eth.get_logs = get_logs
+    assert not tracker.advance(chain, 101)
+    assert tracker.needs_resync(101)
+
+
+def test_long_gap_requests_resync():
+    w3, requests = _w3([])
+    tracker = _tracker(resync_blocks=10)
+    assert not tracker.advance(w3, 111)
+    assert requests == []
+    assert tracker.needs_resync(110)
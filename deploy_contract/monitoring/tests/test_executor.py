@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+import pytest
+from helpers import TOKEN, USDC, WETH, inventory, pool_by_type
+from web3 import Web3
+
+from deploy_contract.monitoring.executor import SwapExecutor
+from deploy_contract.monitoring.fixed_point import FixedPrice, get_sqrt_ratio_at_tick
+from deploy_contract.monitoring.metadata_store import MetadataStore
+from deploy_contract.monitoring.price_sources import PoolSnapshot
+from deploy_contract.monitoring.strategy import StrategyDecision
+from deploy_contract.monitoring.v2_sizing import get_amount_out
+from deploy_contract.monitoring.v3_simulator import V3PoolState, simulate_exact_input
+
+# Building router calldata uses the web3 v6 ``Contract.encodeABI`` API.
+needs_encode_abi = pytest.mark.skipif(
+    not hasattr(Web3().eth.contract(abi=[]), "encodeABI"), reason="web3 without Contract.encodeABI"
+)
+
+
+def _executor(config):
+    metadata = MetadataStore().view(0)
+    metadata.set_token(Web3.to_checksum_address(USDC), decimals=6)
+    return SwapExecutor(Web3(), config, metadata)
+
+
+def _decision(config, sell_amount=10**18):
+    token = config.tokens[0]
+    return StrategyDecision(
+        should_swap=True,
+        token_inventory=inventory(token, 2 * sell_amount),
+        pool=pool_by_type(token, "uniswap_v2"),
+        price=FixedPrice(3, 10**12),
+        price_change_bps=5000,
+        sell_amount=sell_amount,
+        slippage_bps=50,
+        reason="price threshold met",
+    )
+
+
+def _snapshot(reserve_token, reserve_usdc):
+    # USDC (0x55..) sorts before TOKEN (0xaa..), so it is token0.
+    return PoolSnapshot(token0=USDC, token1=TOKEN, reserve0=reserve_usdc, reserve1=reserve_token)
+
+
+@needs_encode_abi
+def test_v2_min_out_comes_from_get_amount_out(make_config):
+    config = make_config()
+    decision = _decision(config)
+    execution = _executor(config).build_execution(
+        decision, decision.pool, decision.price, 0, snapshot=_snapshot(10**24, 3 * 10**12)
+    )
+    expected = get_amount_out(10**18, 10**24, 3 * 10**12)
+    assert execution.amount_in == 10**18
+    assert execution.expected_amount_out == expected
+    assert execution.min_amount_out == expected * 9950 // 10_000
+
+
+def test_zero_impact_budget_holds(make_config):
+    config = make_config({"max_price_impact_bps": 0})
+    decision = _decision(config)
+    execution = _executor(config).build_execution(
+        decision, decision.pool, decision.price, 0, snapshot=_snapshot(10**24, 3 * 10**12)
+    )
+    assert execution is None
+
+
+@pytest.mark.parametrize("reserves", [(10**24, 0), (0, 3 * 10**12), (0, 0)])
+def test_drained_pair_holds(make_config, reserves):
+    config = make_config({"max_price_impact_bps": 100})
+    decision = _decision(config)
+    execution = _executor(config).build_execution(
+        decision, decision.pool, decision.price, 0, snapshot=_snapshot(*reserves)
+    )
+    assert execution is None
+
+
+@needs_encode_abi
+def test_impact_budget_cuts_sell(make_config):
+    config = make_config({"max_price_impact_bps": 100})
+    decision = _decision(config, sell_amount=10**23)
+    execution = _executor(config).build_execution(
+        decision, decision.pool, decision.price, 0, snapshot=_snapshot(10**24, 3 * 10**12)
+    )
+    assert 0 < execution.amount_in < 10**23
+    assert execution.expected_amount_out == get_amount_out(execution.amount_in, 10**24, 3 * 10**12)
+
+
+def test_unexecuted_trigger_can_be_cancelled(make_config):
+    from deploy_contract.monitoring.batch_pricing import PriceResult
+    from deploy_contract.monitoring.strategy import StrategyEngine
+
+    config = make_config()
+    engine = StrategyEngine(config)
+    token = config.tokens[0]
+    pool = pool_by_type(token, "uniswap_v2")
+    holdings = inventory(token, 10**18)
+    engine.evaluate(holdings, pool, PriceResult(price=FixedPrice(1, 1), tick=None), timestamp=1_000)
+    decision = engine.evaluate(holdings, pool, PriceResult(price=FixedPrice(2, 1), tick=None), timestamp=2_000)
+    assert decision.should_swap
+
+    engine.cancel(decision)
+    assert engine.baseline(TOKEN, pool.address) == FixedPrice(1, 1)
+    retry = engine.evaluate(holdings, pool, PriceResult(price=FixedPrice(2, 1), tick=None), timestamp=2_012)
+    assert retry.should_swap and retry.price_change_bps == 10_000
+    assert replace(retry, reason="") == replace(decision, reason="")
+
+
+class FakeV3States:
+    def __init__(self, state):
+        self.state = state
+
+    def load(self, w3, pool, block_identifier="latest"):
+        return self.state
+
+
+def _v3_setup(config, bitmap, sell_amount):
+    token = config.tokens[0]
+    pool = pool_by_type(token, "uniswap_v3")
+    state = V3PoolState(
+        sqrt_price_x96=get_sqrt_ratio_at_tick(100),
+        tick=100,
+        liquidity=10**18,
+        fee=3000,
+        tick_spacing=1,
+        bitmap=bitmap,
+    )
+    metadata = MetadataStore().view(0)
+    metadata.set_token(Web3.to_checksum_address(WETH), decimals=18)
+    executor = SwapExecutor(Web3(), config, metadata, FakeV3States(state))
+    decision = replace(_decision(config, sell_amount), pool=pool)
+    # TOKEN (0xaa..) sorts before WETH (0xff..): selling it is zero-for-one.
+    snapshot = PoolSnapshot(token0=TOKEN, token1=WETH, sqrt_price_x96=state.sqrt_price_x96, tick=100)
+    return executor, decision, pool, snapshot, state
+
+
+@needs_encode_abi
+def test_v3_sell_cut_to_loaded_ticks(make_config):
+    config = make_config()
+    executor, decision, pool, snapshot, state = _v3_setup(config, {0: 0}, 10**22)
+    simulation = simulate_exact_input(state, 10**22, True)
+    assert not simulation.complete and 0 < simulation.amount_in_used < 10**22
+
+    execution = executor.build_execution(decision, pool, decision.price, 0, snapshot=snapshot)
+    assert execution.amount_in == simulation.amount_in_used
+    assert execution.expected_amount_out == simulation.amount_out
+    assert execution.expected_amount_out == simulate_exact_input(state, execution.amount_in, True).amount_out
+    assert execution.min_amount_out == simulation.amount_out * 9950 // 10_000
+
+
+def test_v3_sell_outside_loaded_ticks_holds(make_config):
+    config = make_config()
+    executor, decision, pool, snapshot, _ = _v3_setup(config, {}, 10**22)
+    assert executor.build_execution(decision, pool, decision.price, 0, snapshot=snapshot) is None
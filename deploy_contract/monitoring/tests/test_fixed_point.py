@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+import pytest
+
+from deploy_contract.monitoring.fixed_point import (
+    MAX_SQRT_RATIO,
+    MAX_TICK,
+    MIN_SQRT_RATIO,
+    MIN_TICK,
+    Q96,
+    FixedPrice,
+    get_sqrt_ratio_at_tick,
+    mean_tick,
+)
+
+
+def test_sqrt_ratio_at_tick_bounds():
+    assert get_sqrt_ratio_at_tick(MIN_TICK) == MIN_SQRT_RATIO
+    assert get_sqrt_ratio_at_tick(MAX_TICK) == MAX_SQRT_RATIO
+    assert get_sqrt_ratio_at_tick(0) == Q96
+    for tick in (MIN_TICK - 1, MAX_TICK + 1):
+        with pytest.raises(ValueError):
+            get_sqrt_ratio_at_tick(tick)
+
+
+@pytest.mark.parametrize(
+    "tick, expected",
+    [
+        (50, 79426470787362580746886972461),
+        (-50, 79030349367926598376800521322),
+        (100, 79625275426524748796330556128),
+        (-100, 78833030112140176575862854579),
+        (1000, 83290069058676223003182343270),
+    ],
+)
+def test_sqrt_ratio_at_tick_matches_tick_math(tick, expected):
+    assert get_sqrt_ratio_at_tick(tick) == expected
+
+
+def test_mean_tick_rounds_towards_negative_infinity():
+    assert mean_tick(7, 2) == 3
+    assert mean_tick(-7, 2) == -4
+    assert mean_tick(-6, 2) == -3
+
+
+def test_fixed_price_reduces_and_normalises_sign():
+    price = FixedPrice(6, -4)
+    assert (price.numerator, price.denominator) == (-3, 2)
+    assert FixedPrice(2, 4) == FixedPrice(1, 2)
+    assert hash(FixedPrice(2, 4)) == hash(FixedPrice(1, 2))
+    with pytest.raises(ZeroDivisionError):
+        FixedPrice(1, 0)
+
+
+def test_fixed_price_parse_round_trips():
+    price = FixedPrice(123456789, 1000)
+    assert FixedPrice.parse(price.ratio_string()) == price
+    assert FixedPrice.parse("1.5") == FixedPrice(3, 2)
+    assert FixedPrice.from_decimal(Decimal("0.125")) == FixedPrice(1, 8)
+
+
+def test_from_raw_scales_decimals():
+    # 2000 USDC (6 decimals) for 1 WETH (18 decimals).
+    assert FixedPrice.from_raw(2000 * 10**6, 10**18, 18, 6) == 2000
+    assert FixedPrice.from_raw(10**18, 2000 * 10**6, 6, 18) == FixedPrice(1, 2000)
+
+
+def test_from_sqrt_price_orientation():
+    sqrt_price = 2 * Q96
+    assert FixedPrice.from_sqrt_price_x96(sqrt_price, 18, 18) == 4
+    assert FixedPrice.from_sqrt_price_x96(sqrt_price, 18, 18, base_is_token0=False) == FixedPrice(1, 4)
+    assert FixedPrice.from_tick(0, 18, 6) == 10**12
+
+
+@pytest.mark.parametrize(
+    "price, baseline, expected",
+    [
+        (FixedPrice(11, 10), FixedPrice(1, 1), 1000),
+        (FixedPrice(9, 10), FixedPrice(1, 1), -1000),
+        # 1/3 bp either way truncates towards zero.
+        (FixedPrice(30001, 30000), FixedPrice(1, 1), 0),
+        (FixedPrice(29999, 30000), FixedPrice(1, 1), 0),
+        (FixedPrice(10_003, 10_000), FixedPrice(1, 1), 3),
+        (FixedPrice(9_997, 10_000), FixedPrice(1, 1), -3),
+    ],
+)
+def test_change_bps_truncates_towards_zero(price, baseline, expected):
+    assert price.change_bps(baseline) == expected
+
+
+def test_quote_amount_floors():
+    price = FixedPrice(2000, 3)
+    assert price.quote_amount(10**18, 18, 6) == 666666666
+    assert FixedPrice(0, 1).quote_amount(10**18, 18, 6) == 0
+
+
+def test_ordering_and_int_comparison():
+    assert FixedPrice(1, 3) < FixedPrice(1, 2)
+    assert FixedPrice(3, 2) > 1
+    assert FixedPrice(4, 2) == 2
+    assert float(FixedPrice(1, 4)) == 0.25
+    assert FixedPrice(3, 2).x128 == 3 << 127
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from helpers import USDC, raw_config
+
+from deploy_contract.monitoring.config import load_multichain_config
+from deploy_contract.monitoring.multichain import MultiChainMonitor
+
+
+def _configs(tmp_path):
+    raw = raw_config()
+    chain = {key: value for key, value in raw.items() if key != "strategy"}
+    path = tmp_path / "config.json"
+    path.write_text(
+        json.dumps(
+            {
+                "strategy": raw["strategy"],
+                "metadata_file": str(tmp_path / "metadata.json"),
+                "chains": [dict(chain, name="mainnet", chain_id=1), dict(chain, name="base", chain_id=8453)],
+            }
+        )
+    )
+    return load_multichain_config(path)
+
+
+def test_chain_configs_are_not_written_back(tmp_path):
+    configs = _configs(tmp_path)
+    assert [config.source_path for config in configs] == [None, None]
+    monitor = MultiChainMonitor(configs)
+    assert all(service._config_writer is None for service in monitor.services.values())
+    with pytest.raises(ValueError, match="watch_config"):
+        MultiChainMonitor(configs, watch_config=True)
+
+
+def test_shared_metadata_counts_per_chain(tmp_path):
+    monitor = MultiChainMonitor(_configs(tmp_path))
+    mainnet, base = monitor.services["mainnet"], monitor.services["base"]
+    mainnet._bind_metadata(1)
+    base._bind_metadata(8453)
+    assert mainnet._metadata.store is base._metadata.store
+
+    mainnet._metadata.set_token(USDC, decimals=6)
+    assert mainnet._metadata.get_decimals(USDC) == 6
+    assert base._metadata.get_decimals(USDC) is None
+    assert mainnet.metrics.cache_requests.value(cache="metadata", result="hit") == 1
+    assert mainnet.metrics.cache_requests.value(cache="metadata", result="miss") == 0
+    assert base.metrics.cache_requests.value(cache="metadata", result="miss") == 1
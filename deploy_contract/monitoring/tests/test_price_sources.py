@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+import pytest
+from helpers import TOKEN, WETH, pool_by_type
+
+from deploy_contract.monitoring.fixed_point import FixedPrice, get_sqrt_ratio_at_tick
+from deploy_contract.monitoring.multicall import BatchReader, encode_call
+from deploy_contract.monitoring.price_sources import PoolSnapshot, UniswapV3PriceSource
+from deploy_contract.monitoring.twap import TwapStore
+
+# observe([1800, 600, 0]): mean tick 25 over the first 1200s, then 100 over the last 600s.
+CUMULATIVES = [910_000, 940_000, 1_000_000]
+
+
+def _source(make_config, twap=None):
+    pool = replace(pool_by_type(make_config().tokens[0], "uniswap_v3"), twap_windows=[600, 1_800])
+    return UniswapV3PriceSource(pool, twap=twap)
+
+
+def _snapshot(tick=120, cumulatives=None, timestamp=None):
+    # TOKEN (0xaa..) sorts before WETH (0xff..), so the base token is token0.
+    return PoolSnapshot(
+        token0=TOKEN,
+        token1=WETH,
+        sqrt_price_x96=get_sqrt_ratio_at_tick(tick),
+        tick=tick,
+        tick_cumulatives=cumulatives,
+        timestamp=timestamp,
+    )
+
+
+def test_one_observe_call_covers_every_window(make_config):
+    source = _source(make_config)
+    batch = BatchReader()
+    source.queue_dynamic(batch)
+    assert len(batch) == 1
+    assert batch.requests[0].data == encode_call("observe(uint32[])", ["uint32[]"], [[1_800, 600, 0]])
+
+
+def test_observe_prices_every_window(make_config):
+    result = _source(make_config).price(_snapshot(cumulatives=CUMULATIVES), 18, 18)
+    # The shortest window prices the pool: (1_000_000 - 940_000) / 600 = 100.
+    assert result.tick == 100
+    assert result.price == FixedPrice.from_tick(100, 18, 18)
+    # 1800s: (1_000_000 - 910_000) / 1800 = 50.
+    assert result.twaps == {600: FixedPrice.from_tick(100, 18, 18), 1_800: FixedPrice.from_tick(50, 18, 18)}
+    # Interval means 25 (1200s) and 100 (600s) around a mean of 50.
+    assert result.tick_variance == pytest.approx((1_200 * 25**2 + 600 * 50**2) / 1_800) == 1_250
+
+
+def test_stored_history_replaces_observe(make_config):
+    twap = TwapStore()
+    source = _source(make_config, twap)
+    seeded = source.price(_snapshot(cumulatives=CUMULATIVES, timestamp=10_000), 18, 18)
+    assert seeded.twaps[1_800] == FixedPrice.from_tick(50, 18, 18)
+
+    batch = BatchReader()
+    source.queue_dynamic(batch)
+    assert len(batch) == 0
+
+    # Tick 120 held for 60s: cumulative 1_007_200 at 10_060.
+    result = source.price(_snapshot(tick=130, timestamp=10_060), 18, 18)
+    # 600s window: newest sample at least 600s old is 9_400 (940_000); 67_200 / 660 floors to 101.
+    assert result.tick == 101
+    assert result.twaps[600] == FixedPrice.from_tick(101, 18, 18)
+    # 1800s window: from 8_200 (910_000); 97_200 / 1_860 floors to 52.
+    assert result.twaps[1_800] == FixedPrice.from_tick(52, 18, 18)
+    mean = 97_200 / 1_860
+    expected = (1_200 * (25 - mean) ** 2 + 600 * (100 - mean) ** 2 + 60 * (120 - mean) ** 2) / 1_860
+    assert result.tick_variance == pytest.approx(expected)
+
+
+def test_observe_for_stale_windows_is_ignored(make_config):
+    # A read queued for two windows no longer matches three seconds_agos.
+    result = _source(make_config).price(_snapshot(tick=7, cumulatives=[0, 6_000]), 18, 18)
+    assert result.twaps == {} and result.tick_variance is None
+    assert result.price == FixedPrice.from_sqrt_price_x96(get_sqrt_ratio_at_tick(7), 18, 18)
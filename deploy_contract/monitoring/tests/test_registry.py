@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import replace
+
+import pytest
+from helpers import TOKEN
+
+from deploy_contract.monitoring.metrics import MetricsRegistry
+from deploy_contract.monitoring.registry import ConfigWriter, TokenRegistry
+
+OTHER = "0x" + "b" * 40
+
+
+def test_diff_reports_added_removed_and_changed_tokens(make_config):
+    config = make_config()
+    token = config.tokens[0]
+    registry = TokenRegistry(config.tokens)
+    assert registry.diff([replace(token)]).empty
+
+    trimmed = replace(token, pools=token.pools[:1])
+    new = replace(token, address=OTHER, pools=[])
+    diff = registry.diff([trimmed, new])
+    # A token whose pools changed is removed and re-added.
+    assert diff.removed == [token]
+    assert diff.added == [trimmed, new]
+
+    diff = registry.diff([])
+    assert diff.removed == [token] and diff.added == []
+
+
+def test_apply_mutates_the_config_list_in_place(make_config):
+    config = make_config()
+    token = config.tokens[0]
+    tokens = config.tokens
+    registry = TokenRegistry(tokens)
+    trimmed = replace(token, pools=token.pools[:1])
+    new = replace(token, address=OTHER, pools=[])
+
+    registry.apply(registry.diff([trimmed, new]))
+    assert config.tokens is tokens is registry.tokens
+    assert tokens == [trimmed, new]
+    assert registry.get(TOKEN.upper().replace("0X", "0x")) is trimmed
+    assert registry.known_addresses() == {TOKEN, OTHER, token.pools[0].address.lower()}
+
+    registry.apply(registry.diff([new]))
+    assert tokens == [new] and registry.get(TOKEN) is None
+
+
+def _writer(tmp_path, tokens, metrics=None):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"vault_address": "0x1", "tokens": tokens}))
+    return path, ConfigWriter(path, metrics)
+
+
+def test_writer_appends_each_address_once(tmp_path):
+    path, writer = _writer(tmp_path, [{"address": TOKEN}])
+    # Queued directly so the background thread does not race the flush.
+    writer._pending.extend([{"address": TOKEN, "symbol": "dup"}, {"address": OTHER}, {"address": OTHER, "symbol": "dup"}])
+    writer.flush()
+    data = json.loads(path.read_text())
+    assert data["vault_address"] == "0x1"
+    assert data["tokens"] == [{"address": TOKEN}, {"address": OTHER}]
+    assert writer.written_mtime == path.stat().st_mtime
+    assert not path.with_name("config.json.tmp").exists()
+
+
+def test_writer_thread_writes_in_the_background(tmp_path):
+    path, writer = _writer(tmp_path, [])
+    written = threading.Event()
+    original = writer._write
+
+    def write(entries):
+        original(entries)
+        written.set()
+
+    writer._write = write
+    writer.append([{"address": OTHER}])
+    assert written.wait(5)
+    assert json.loads(path.read_text())["tokens"] == [{"address": OTHER}]
+
+
+def test_failed_write_keeps_the_file_counts_and_retries(tmp_path, monkeypatch, capsys):
+    metrics = MetricsRegistry()
+    path, writer = _writer(tmp_path, [{"address": TOKEN}], metrics)
+    before = path.read_text()
+
+    def fail(src, dst):
+        raise OSError("read-only file system")
+
+    monkeypatch.setattr(os, "replace", fail)
+    writer._pending.append({"address": OTHER})
+    writer.flush()
+    assert path.read_text() == before
+    assert writer.written_mtime is None
+    assert metrics.errors.value(stage="config_write") == 1
+    assert "failed to persist discovered tokens" in capsys.readouterr().out
+
+    monkeypatch.undo()
+    writer.flush()
+    assert json.loads(path.read_text())["tokens"] == [{"address": TOKEN}, {"address": OTHER}]
+    assert writer.written_mtime == pytest.approx(path.stat().st_mtime)
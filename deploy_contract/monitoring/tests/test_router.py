@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+from helpers import TOKEN, USDC, inventory
+
+from deploy_contract.monitoring.batch_pricing import PriceResult
+from deploy_contract.monitoring.executor import SwapExecution
+from deploy_contract.monitoring.fixed_point import FixedPrice
+from deploy_contract.monitoring.price_sources import PoolSnapshot
+from deploy_contract.monitoring.router import RouteCandidate, SplitRouter
+from deploy_contract.monitoring.service import EvaluationContext, MonitorService
+from deploy_contract.monitoring.strategy import StrategyEngine
+from deploy_contract.monitoring.v2_sizing import get_amount_out
+
+
+class FakeExecutor:
+    """Constant-product quotes from snapshot reserves; optionally fails on some pools."""
+
+    def __init__(self, failing=()):
+        self.failing = {address.lower() for address in failing}
+
+    def quote_sizes(self, decision, pool, snapshot, amounts, block_identifier="latest"):
+        return [get_amount_out(amount, snapshot.reserve1, snapshot.reserve0) for amount in amounts]
+
+    def build_execution(self, decision, pool, price, timestamp=None, *, snapshot=None, block_identifier="latest"):
+        if pool.address.lower() in self.failing:
+            raise ValueError("encoding failed")
+        return SwapExecution(
+            dex=pool.address,
+            token_in=TOKEN,
+            token_out=USDC,
+            amount_in=decision.sell_amount,
+            min_amount_out=1,
+            recipient=TOKEN,
+            payload=b"",
+        )
+
+
+def _candidates(config, reserves):
+    token = config.tokens[0]
+    pools = [replace(token.pools[0], address="0x" + f"{index + 1:02x}" * 20) for index in range(len(reserves))]
+    candidates = []
+    for pool, (reserve_token, reserve_usdc) in zip(pools, reserves):
+        decision = StrategyEngine(config).evaluate(
+            inventory(token, 10**21), pool, PriceResult(price=FixedPrice(1, 1), tick=None)
+        )
+        snapshot = PoolSnapshot(token0=USDC, token1=TOKEN, reserve0=reserve_usdc, reserve1=reserve_token)
+        candidates.append(RouteCandidate(pool=pool, decision=decision, snapshot=snapshot))
+    return candidates
+
+
+def test_equal_pools_split_evenly(make_config):
+    candidates = _candidates(make_config(), [(10**24, 10**24), (10**24, 10**24)])
+    legs = SplitRouter(FakeExecutor()).split(10**22, candidates)
+    assert [leg.amount_in for leg in legs] == [5 * 10**21, 5 * 10**21]
+
+
+def test_split_favours_deep_pool_and_sums_to_amount(make_config):
+    candidates = _candidates(make_config(), [(10**21, 10**21), (10**24, 10**24)])
+    legs = SplitRouter(FakeExecutor()).split(10**22, candidates)
+    amounts = {leg.candidate.pool.address: leg.amount_in for leg in legs}
+    assert sum(amounts.values()) == 10**22
+    assert amounts[candidates[1].pool.address] > 9 * 10**21
+
+
+def test_split_beats_single_pool(make_config):
+    candidates = _candidates(make_config(), [(10**22, 10**22), (10**22, 10**22)])
+    legs = SplitRouter(FakeExecutor()).split(10**22, candidates)
+    split_out = sum(get_amount_out(leg.amount_in, 10**22, 10**22) for leg in legs)
+    assert split_out > get_amount_out(10**22, 10**22, 10**22)
+
+
+def test_failed_leg_falls_back_to_per_pool(make_config):
+    config = make_config({"split_routing": True})
+    candidates = _candidates(config, [(10**24, 10**24), (10**24, 10**24)])
+    engine = StrategyEngine(config)
+    token = config.tokens[0]
+    contexts = []
+    for candidate in candidates:
+        engine.evaluate(inventory(token, 10**21), candidate.pool, PriceResult(price=FixedPrice(1, 1), tick=None))
+        decision = engine.evaluate(
+            inventory(token, 10**21), candidate.pool, PriceResult(price=FixedPrice(2, 1), tick=None), timestamp=10
+        )
+        assert decision.should_swap
+        contexts.append(EvaluationContext(TOKEN, candidate.pool.address, None, decision, None, 1))
+
+    service = MonitorService.__new__(MonitorService)
+    service._config = config
+    service._strategy = engine
+    service._snapshots = {(TOKEN, candidate.pool.address): candidate.snapshot for candidate in candidates}
+    service._log_prefix = "[monitor]"
+    failing = candidates[1].pool.address
+    service._route_token(FakeExecutor(failing=[failing]), contexts, 1)
+
+    sold, failed = contexts
+    assert sold.execution is not None and sold.decision.should_swap
+    assert sold.execution.amount_in == sold.decision.sell_amount == 5 * 10**20
+    assert failed.execution is None and failed.decision.reason == "execution failed"
+    assert engine.baseline(TOKEN, failing) == FixedPrice(1, 1)
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+from deploy_contract.monitoring.metrics import MetricsRegistry
+from deploy_contract.monitoring.rpc_batch import BatchingAsyncHTTPProvider, BatchingHTTPProvider
+
+URL = "http://127.0.0.1:8545"
+
+
+def _answer(payload, drop=()):
+    # Answer in reverse order: responses must be matched by id, not position.
+    return [
+        {"jsonrpc": "2.0", "id": request["id"], "result": f"{request['method']}:{request['params'][0]}"}
+        for request in reversed(payload)
+        if request["params"][0] not in drop
+    ]
+
+
+class FakeResponse:
+    def __init__(self, body, status=200):
+        self.content = json.dumps(body).encode()
+        self.status = status
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise ConnectionError(f"HTTP {self.status}")
+
+
+class FakeSession:
+    def __init__(self, reply=_answer):
+        self.posts = []
+        self.reply = reply
+        self.closed = False
+
+    def post(self, url, data, headers, timeout=None):
+        payload = json.loads(data)
+        self.posts.append(payload)
+        return FakeResponse(self.reply(payload))
+
+
+def _provider(**kwargs):
+    provider = BatchingHTTPProvider(URL, **kwargs)
+    provider._session = FakeSession()
+    return provider
+
+
+def test_concurrent_requests_share_one_post():
+    provider = _provider(window=0.05)
+    results = {}
+
+    def call(index):
+        results[index] = provider.make_request("eth_call", [index])
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(provider._session.posts) == 1
+    assert {index: response["result"] for index, response in results.items()} == {
+        index: f"eth_call:{index}" for index in range(5)
+    }
+
+
+def test_explicit_batches_are_split_by_size():
+    metrics = MetricsRegistry()
+    provider = _provider(metrics=metrics, max_batch_size=2)
+    responses = provider.make_batch_request([("eth_call", [index]) for index in range(5)])
+    assert [response["result"] for response in responses] == [f"eth_call:{index}" for index in range(5)]
+    assert [len(post) for post in provider._session.posts] == [2, 2, 1]
+    assert metrics.rpc_requests.value(method="eth_call") == 5
+
+
+def test_missing_and_rejected_responses_become_errors():
+    metrics = MetricsRegistry()
+    provider = _provider(metrics=metrics)
+    provider._session.reply = lambda payload: _answer(payload, drop=(1,))
+    responses = provider.make_batch_request([("eth_call", [0]), ("eth_call", [1])])
+    assert "result" in responses[0] and responses[1]["error"]["code"] == -32603
+
+    provider._session.reply = lambda payload: {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "no"}}
+    responses = provider.make_batch_request([("eth_call", [0]), ("eth_call", [1])])
+    assert [response["error"]["code"] for response in responses] == [-32600, -32600]
+    assert metrics.rpc_errors.value(method="eth_call") == 3
+
+
+def test_transport_failure_reaches_every_caller():
+    provider = _provider(window=0.05)
+    provider._session.post = lambda *args, **kwargs: FakeResponse({}, status=502)
+    errors = []
+
+    def call(index):
+        try:
+            provider.make_request("eth_call", [index])
+        except ConnectionError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 3
+    assert not provider._flushing
+
+
+class FakeAsyncResponse:
+    def __init__(self, body, status=200):
+        self._body = json.dumps(body).encode()
+        self.status = status
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise ConnectionError(f"HTTP {self.status}")
+
+    async def read(self):
+        return self._body
+
+
+class FakeAsyncSession(FakeSession):
+    def post(self, url, data, headers, timeout=None):
+        payload = json.loads(data)
+        self.posts.append(payload)
+        if self.reply is None:
+            return FakeAsyncResponse({}, status=502)
+        return FakeAsyncResponse(self.reply(payload))
+
+
+needs_async = pytest.mark.skipif(BatchingAsyncHTTPProvider is None, reason="aiohttp not installed")
+
+
+def _async_provider(**kwargs):
+    provider = BatchingAsyncHTTPProvider(URL, **kwargs)
+    provider._session = FakeAsyncSession()
+    return provider
+
+
+@needs_async
+def test_async_requests_in_one_window_share_one_post():
+    async def scenario():
+        provider = _async_provider(window=0.01, max_batch_size=2)
+        calls = [provider.make_request("eth_call", [index]) for index in range(5)]
+        responses = await asyncio.gather(*calls)
+        assert [response["result"] for response in responses] == [f"eth_call:{index}" for index in range(5)]
+        # Full batches go out at once; the remainder waits for the window.
+        assert [len(post) for post in provider._session.posts] == [2, 2, 1]
+        assert not provider._sends
+
+    asyncio.run(scenario())
+
+
+@needs_async
+def test_async_sends_are_held_until_done():
+    async def scenario():
+        provider = _async_provider(window=0)
+        request = asyncio.ensure_future(provider.make_request("eth_call", [0]))
+        await asyncio.sleep(0)
+        provider._flush()
+        assert len(provider._sends) == 1
+        assert (await request)["result"] == "eth_call:0"
+        await asyncio.sleep(0)
+        assert not provider._sends
+
+    asyncio.run(scenario())
+
+
+@needs_async
+def test_async_transport_failure_reaches_every_caller():
+    async def scenario():
+        provider = _async_provider(window=0.01)
+        provider._session.reply = None
+        results = await asyncio.gather(
+            *(provider.make_request("eth_call", [index]) for index in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(result, ConnectionError) for result in results)
+        assert len(provider._session.posts) == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import pytest
+
+from deploy_contract.monitoring.config import RpcEndpointConfig
+from deploy_contract.monitoring.metrics import MetricsRegistry
+from deploy_contract.monitoring.rpc_pool import EndpointPool, endpoint_label, is_endpoint_failure
+
+FAST = RpcEndpointConfig(http="https://fast.example:8545/v1/secret-key")
+SLOW = RpcEndpointConfig(http="https://slow.example/v1/secret-key", weight=2.0)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_endpoint_label_drops_path():
+    assert endpoint_label(FAST.http) == "fast.example:8545"
+    assert endpoint_label(SLOW.http) == "slow.example"
+
+
+@pytest.mark.parametrize(
+    "response, failure",
+    [
+        ({"result": "0x1"}, False),
+        ({"error": {"code": -32000, "message": "execution reverted"}}, False),
+        ({"error": {"code": -32005, "message": "limit exceeded"}}, True),
+        ({"error": {"code": -32000, "message": "Too Many Requests"}}, True),
+        ([{"result": "0x1"}, {"error": {"code": 429}}], True),
+    ],
+)
+def test_is_endpoint_failure(response, failure):
+    assert is_endpoint_failure(response) is failure
+
+
+def test_ranking_prefers_low_latency_per_weight():
+    pool = EndpointPool([FAST, SLOW])
+    fast, slow = pool.endpoints
+    pool.record(fast, 0.10, True)
+    pool.record(slow, 0.15, True)
+    assert pool.ranked() == [slow, fast]
+    pool.record(slow, 0.50, False)
+    assert pool.ranked() == [fast, slow]
+
+
+def test_eject_and_readmit():
+    clock = Clock()
+    metrics = MetricsRegistry()
+    pool = EndpointPool([FAST, SLOW], eject_after_errors=2, eject_seconds=30, clock=clock, metrics=metrics)
+    fast, slow = pool.endpoints
+    pool.record(fast, 0.1, False)
+    assert fast in pool.ranked()
+    pool.record(fast, 0.1, False)
+    assert pool.ranked() == [slow]
+    clock.now += 30
+    assert fast in pool.ranked()
+    assert fast.latency is None
+    # A failed probe ejects it again straight away.
+    pool.record(fast, 0.1, False)
+    assert pool.ranked() == [slow]
+
+
+def test_all_ejected_falls_back_to_first_back():
+    clock = Clock()
+    pool = EndpointPool([FAST, SLOW], eject_after_errors=1, eject_seconds=30, clock=clock)
+    fast, slow = pool.endpoints
+    pool.record(slow, 0.1, False)
+    clock.now += 5
+    pool.record(fast, 0.1, False)
+    assert pool.ranked() == [slow, fast]
+
+
+def test_pool_needs_an_endpoint():
+    with pytest.raises(ValueError):
+        EndpointPool([])
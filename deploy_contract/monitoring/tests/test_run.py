@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import sys
+
+import pytest
+
+from deploy_contract.monitoring import run
+
+
+@pytest.fixture
+def main(monkeypatch):
+    def call(*argv: str, multichain: bool = False) -> None:
+        monkeypatch.setattr(run, "is_multichain_config", lambda path: multichain)
+        monkeypatch.setattr(sys, "argv", ["run", *argv])
+        run.main()
+
+    return call
+
+
+@pytest.mark.parametrize("argv", [["--workers", "2"], ["--interval", "30"]])
+def test_multichain_rejects_single_chain_options(main, argv, capsys):
+    with pytest.raises(SystemExit) as exc:
+        main(*argv, multichain=True)
+    assert exc.value.code == 2
+    assert "multi-chain config" in capsys.readouterr().err
+
+
+def test_multichain_passes_options_through(main, monkeypatch):
+    calls = {}
+
+    class Monitor:
+        services = {}
+
+        def run(self):
+            calls["run"] = True
+
+    def load(path, **kwargs):
+        calls.update(kwargs)
+        return Monitor()
+
+    monkeypatch.setattr(run, "load_multichain_monitor", load)
+    monkeypatch.setattr(run.SignalProfiler, "install", lambda self: True)
+    main("--adaptive-polling", "--poll-budget", "5", "--blocks-per-cycle", "3", multichain=True)
+    assert calls == {
+        "metrics_port": None,
+        "read_mode": "multicall",
+        "track_events": False,
+        "adaptive_polling": True,
+        "poll_budget": 5,
+        "blocks_per_cycle": 3,
+        "run": True,
+    }
+
+
+@pytest.mark.parametrize("argv", [["--profile"], ["--blocks-per-cycle", "2"]])
+def test_workers_reject_in_process_options(main, argv, capsys):
+    with pytest.raises(SystemExit) as exc:
+        main("--workers", "2", *argv)
+    assert exc.value.code == 2
+    assert "--workers" in capsys.readouterr().err
+
+
+def test_workers_pass_polling_options(main, monkeypatch):
+    calls = {}
+
+    class Coordinator:
+        def __init__(self, path, workers, **kwargs):
+            calls.update(kwargs, workers=workers)
+
+        def run(self):
+            calls["run"] = True
+
+    monkeypatch.setattr(run, "load_config", lambda path: None)
+    monkeypatch.setattr(run, "ShardCoordinator", Coordinator)
+    main("--workers", "3", "--adaptive-polling", "--poll-budget", "7", "--read-mode", "async", "--track-events")
+    assert calls["workers"] == 3
+    assert calls["read_mode"] == "async"
+    assert calls["track_events"] is True
+    assert calls["interval_seconds"] == 120
+    assert calls["adaptive_polling"] is True
+    assert calls["poll_budget"] == 7
+    assert calls["run"] is True
+
+
+def test_track_events_needs_a_tracking_read_mode(main, capsys):
+    with pytest.raises(SystemExit) as exc:
+        main("--read-mode", "sequential", "--track-events")
+    assert exc.value.code == 2
+    assert "--track-events" in capsys.readouterr().err
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import math
+
+import pytest
+
+from deploy_contract.monitoring.fixed_point import FixedPrice
+from deploy_contract.monitoring.scheduler import PoolPollScheduler
+
+QUIET = ("0xaa", "0x01")
+HOT = ("0xaa", "0x02")
+OTHER = ("0xaa", "0x03")
+
+
+def test_ewma_tracks_absolute_moves():
+    scheduler = PoolPollScheduler(alpha=0.3)
+    scheduler.observe(QUIET, 1, FixedPrice(100, 1), 0, 5_000)
+    assert scheduler.state(QUIET).volatility_bps == 0.0
+    scheduler.observe(QUIET, 2, FixedPrice(110, 1), 0, 5_000)
+    assert scheduler.state(QUIET).volatility_bps == pytest.approx(300.0)
+    scheduler.observe(QUIET, 3, FixedPrice(99, 1), 0, 5_000)
+    # 110 -> 99 is -1000 bps; the EWMA uses its magnitude.
+    assert scheduler.state(QUIET).volatility_bps == pytest.approx(0.3 * 1_000 + 0.7 * 300)
+
+
+def test_quiet_pair_doubles_up_to_the_cap():
+    scheduler = PoolPollScheduler(max_interval_blocks=64)
+    block = 0
+    intervals = []
+    for _ in range(8):
+        interval = scheduler.observe(QUIET, block, FixedPrice(1, 1), 0, 5_000)
+        intervals.append(interval)
+        block += interval
+    assert intervals == [2, 4, 8, 16, 32, 64, 64, 64]
+    assert scheduler.state(QUIET).next_due == block
+
+
+def test_pair_near_threshold_is_polled_every_block():
+    scheduler = PoolPollScheduler(hot_distance_bps=200)
+    for block in range(3):
+        assert scheduler.observe(HOT, block, FixedPrice(1, 1), 4_800, 5_000) == 1
+    assert scheduler.state(HOT).distance_bps == 200.0
+
+
+def test_volatility_pulls_the_interval_back_in():
+    scheduler = PoolPollScheduler()
+    assert scheduler.observe(QUIET, 0, FixedPrice(100, 1), 0, 2_000) == 2
+    # 1000 bps over 2 blocks: EWMA 300, ~212 bps/block, ~9.4 blocks to trigger.
+    expected = int(2_000 / (300 / math.sqrt(2)) / 2)
+    assert scheduler.observe(QUIET, 2, FixedPrice(110, 1), 0, 2_000) == min(4, expected) == 4
+    # Another 1000 bps over 4 blocks: EWMA 510, 255 bps/block, ~7.8 blocks.
+    assert scheduler.observe(QUIET, 6, FixedPrice(121, 1), 0, 2_000) == 3
+
+
+def test_new_pairs_are_due_at_once_and_removed_pairs_never():
+    scheduler = PoolPollScheduler()
+    scheduler.sync([QUIET, HOT], 10)
+    assert scheduler.due(10) == {QUIET, HOT}
+    scheduler.sync([QUIET], 11)
+    assert scheduler.due(11) == {QUIET}
+    assert scheduler.state(HOT) is None
+
+
+def test_budget_defers_the_least_urgent_pairs():
+    scheduler = PoolPollScheduler(budget=1)
+    # Same volatility, but HOT sits closer to its threshold; both are due at block 6.
+    scheduler.observe(QUIET, 0, FixedPrice(100, 1), 0, 5_000)
+    scheduler.observe(HOT, 0, FixedPrice(100, 1), 0, 5_000)
+    scheduler.observe(QUIET, 2, FixedPrice(101, 1), 0, 5_000)
+    scheduler.observe(HOT, 2, FixedPrice(101, 1), 4_000, 5_000)
+    assert scheduler.state(QUIET).next_due == scheduler.state(HOT).next_due == 6
+
+    assert scheduler.due(5) == set()
+    assert scheduler.due(6) == {HOT}
+    # The deferred pair stays due and goes first on the next cycle.
+    assert scheduler.due(7) == {QUIET}
+
+
+def test_unobserved_pair_stays_due_every_block():
+    scheduler = PoolPollScheduler()
+    scheduler.sync([OTHER], 0)
+    for block in range(3):
+        assert scheduler.due(block) == {OTHER}
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from eth_abi import encode as abi_encode
+from helpers import TOKEN, USDC, V2_POOL, V3_POOL, WETH, inventory, resolve_batch
+
+from deploy_contract.monitoring.batch_pricing import PriceResult
+from deploy_contract.monitoring.connections import ConnectionBundle
+from deploy_contract.monitoring.event_tracker import SYNC_TOPIC
+from deploy_contract.monitoring.fixed_point import Q96, FixedPrice
+from deploy_contract.monitoring.service import EvaluationContext, MonitorService
+from deploy_contract.monitoring.strategy import StrategyEngine
+
+
+def _contexts(config):
+    token = config.tokens[0]
+    engine = StrategyEngine(config)
+    contexts = []
+    for pool in token.pools:
+        price = PriceResult(price=FixedPrice(3, 2), tick=None)
+        contexts.append(
+            EvaluationContext(
+                token_address=token.address,
+                pool_address=pool.address,
+                price=price,
+                decision=engine.evaluate(inventory(token, 10**21), pool, price),
+                execution=None,
+                block_number=19_000_000,
+            )
+        )
+    return contexts
+
+
+def test_history_rows_use_block_timestamp(make_config):
+    rows = MonitorService._history_rows(_contexts(make_config()), 1_700_000_123)
+    assert [row.timestamp for row in rows] == [1_700_000_123, 1_700_000_123]
+    assert all(row.block == 19_000_000 and row.price_ratio == "3/2" for row in rows)
+    assert not any(row.should_swap for row in rows)
+
+
+def test_history_rows_fall_back_to_wall_clock(make_config):
+    before = int(time.time())
+    rows = MonitorService._history_rows(_contexts(make_config()), None)
+    assert all(before <= row.timestamp <= int(time.time()) for row in rows)
+
+
+def _answers(v3_ok=True):
+    answers = {
+        (TOKEN, "balanceOf(address)"): (10**21,),
+        (USDC, "decimals()"): (6,),
+        (WETH, "decimals()"): (18,),
+        (V2_POOL, "token0()"): (USDC,),
+        (V2_POOL, "token1()"): (TOKEN,),
+        (V2_POOL, "getReserves()"): (3 * 10**12, 10**24, 0),
+        (V3_POOL, "token0()"): (TOKEN,),
+        (V3_POOL, "token1()"): (WETH,),
+    }
+    if v3_ok:
+        answers[(V3_POOL, "slot0()")] = (Q96, 0, 0, 0, 0, 0, True)
+    return answers
+
+
+def _service(config, **kwargs):
+    service = MonitorService(config, **kwargs)
+    service._bind_metadata(1)
+    return service
+
+
+def _resync(service, block, answers):
+    service._tracker_target = block
+    service._tracker_hash = block.to_bytes(32, "big")
+    service._use_tracker = False
+    service._select_due_pools(block)
+    batch = service._queue_cycle_reads(None)
+    resolve_batch(batch, answers)
+    return service._collect_cycle_reads(None, batch)
+
+
+def test_resync_marks_tracker_synced_only_when_every_pool_is_reseeded(make_config):
+    service = _service(make_config(), track_events=True)
+    _resync(service, 100, _answers())
+    assert service._tracker.pools == {V2_POOL, V3_POOL}
+
+    _resync(service, 200, _answers(v3_ok=False))
+    assert service._tracker.synced_block == 100
+    assert service._tracker.needs_resync(201)
+
+    _resync(service, 201, _answers())
+    assert service._tracker.synced_block == 201
+    assert not service._tracker.needs_resync(202)
+
+
+def test_reorged_synced_block_falls_back_to_a_full_read(make_config):
+    service = _service(make_config(), track_events=True)
+    _resync(service, 100, _answers())
+    hashes = {number: number.to_bytes(32, "big") for number in (100, 101, 102)}
+
+    def get_block(number):
+        return {"hash": hashes[number]}
+
+    w3 = SimpleNamespace(eth=SimpleNamespace(get_block=get_block, get_logs=lambda params: []))
+    assert service._advance_tracker(w3, 101)
+
+    hashes[101] = b"\x01" * 32
+    assert not service._advance_tracker(w3, 102)
+    assert service._tracker.needs_resync(102)
+    assert service._tracker_hash == hashes[102]
+
+
+def test_resync_reads_pools_the_scheduler_would_skip(make_config):
+    service = _service(make_config(), track_events=True, adaptive_polling=True)
+    _resync(service, 100, _answers())
+    for key in service._price_sources:
+        service._poll_scheduler.observe(key, 100, 1.0, 0, 5_000)
+    service._use_tracker = True
+    service._select_due_pools(101)
+    assert service._due_pools == set()
+
+    _, prices = _resync(service, 101, _answers())
+    assert service._due_pools is None
+    assert len(prices) == 2
+    assert service._tracker.synced_block == 101
+
+
+def test_async_read_mode_without_async_client_fails_loudly(make_config):
+    service = _service(make_config(), read_mode="async")
+    http = SimpleNamespace(eth=SimpleNamespace(block_number=19_000_000))
+    bundle = ConnectionBundle(http=http, async_client=None, chain_id=1)
+
+    async def get_connections():
+        return bundle
+
+    service._connection_manager = SimpleNamespace(get_connections=get_connections)
+    with pytest.raises(RuntimeError, match="read_mode 'async'"):
+        asyncio.run(service.run_once())
+
+
+def test_tracked_pools_skipped_by_the_scheduler_keep_following_logs(make_config):
+    service = _service(make_config(), track_events=True, adaptive_polling=True)
+    _resync(service, 100, _answers())
+    v2_key = (TOKEN, V2_POOL)
+    v3_key = (TOKEN, V3_POOL)
+    service._poll_scheduler.observe(v2_key, 100, FixedPrice(3, 1), 0, 5_000)
+    service._poll_scheduler.observe(v3_key, 100, FixedPrice(1, 1), 5_000, 5_000)
+    # The V2 pair reports 6 USDC per token; the pool reads would still say 3.
+    sync = {
+        "address": V2_POOL,
+        "blockNumber": 101,
+        "logIndex": 0,
+        "topics": [SYNC_TOPIC],
+        "data": abi_encode(["uint112", "uint112"], [6 * 10**12, 10**24]),
+    }
+    w3 = SimpleNamespace(
+        eth=SimpleNamespace(
+            get_block=lambda number: {"hash": number.to_bytes(32, "big")},
+            get_logs=lambda params: [sync] if params["fromBlock"] <= 101 <= params["toBlock"] else [],
+        )
+    )
+
+    def tracked_cycle(block):
+        service._use_tracker = service._advance_tracker(w3, block)
+        assert service._use_tracker
+        service._select_due_pools(block)
+        batch = service._queue_cycle_reads(None)
+        resolve_batch(batch, _answers())
+        return service._collect_cycle_reads(None, batch)[1]
+
+    assert set(tracked_cycle(101)) == {v3_key}
+    assert service._tracker.synced_block == 101
+    assert service._tracker.snapshot(V2_POOL).reserve0 == 6 * 10**12
+
+    prices = tracked_cycle(102)
+    assert v2_key in prices
+    assert prices[v2_key].price.change_bps(FixedPrice(6, 1)) == 0
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import json
+from dataclasses import replace
+import threading
+
+import pytest
+
+from deploy_contract.monitoring.state_store import (
+    HistoryRow,
+    JournalStateBackend,
+    JsonStateBackend,
+    open_state_backend,
+)
+
+RECORD = {"baseline": "1.5", "baseline_ratio": "3/2", "last_trigger": 1_700_000_000}
+OTHER = {"baseline": "2", "baseline_ratio": "2/1", "last_trigger": None}
+
+
+def _row(block, timestamp, should_swap=False):
+    return HistoryRow(
+        token="0xAA",
+        pool="0xBB",
+        block=block,
+        timestamp=timestamp,
+        price=1.5,
+        price_ratio="3/2",
+        change_bps=0,
+        should_swap=should_swap,
+        reason="price threshold met" if should_swap else "threshold not met",
+        amount_in=10**30 if should_swap else None,
+        min_amount_out=10**29 if should_swap else None,
+    )
+
+
+def test_sqlite_writes_from_another_thread(tmp_path):
+    backend = open_state_backend(tmp_path / "state.db", "sqlite")
+    errors = []
+
+    def flush():
+        try:
+            backend.write({"0xaa::0xbb": RECORD}, [_row(1, 100)])
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    worker = threading.Thread(target=flush)
+    worker.start()
+    worker.join()
+    assert errors == []
+    assert backend.load() == {"0xaa::0xbb": RECORD}
+    assert [row.block for row in backend.history("0xaa", "0xbb")] == [1]
+    backend.close()
+
+
+@pytest.mark.parametrize("backend", ["json", "journal", "sqlite"])
+def test_round_trip(tmp_path, backend):
+    path = tmp_path / "state"
+    writer = open_state_backend(path, backend)
+    writer.load()
+    writer.write({"0xaa::0xbb": RECORD})
+    writer.write({"0xaa::0xcc": OTHER, "0xaa::0xbb": OTHER})
+    writer.write({})
+    writer.close()
+    reader = open_state_backend(path, backend)
+    assert reader.load() == {"0xaa::0xbb": OTHER, "0xaa::0xcc": OTHER}
+    reader.close()
+    assert open_state_backend(None, backend) is None
+
+
+def test_json_backend_writes_one_object(tmp_path):
+    path = tmp_path / "state.json"
+    JsonStateBackend(path).write({"0xaa::0xbb": RECORD})
+    assert json.loads(path.read_text()) == {"0xaa::0xbb": RECORD}
+    assert not path.with_name("state.json.tmp").exists()
+
+
+def test_journal_replays_over_snapshot(tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text(json.dumps({"0xaa::0xbb": RECORD, "0xaa::0xcc": RECORD}))
+    backend = JournalStateBackend(path)
+    backend.load()
+    backend.write({"0xaa::0xcc": OTHER})
+    assert json.loads(path.read_text())["0xaa::0xcc"] == RECORD
+    assert JournalStateBackend(path).load() == {"0xaa::0xbb": RECORD, "0xaa::0xcc": OTHER}
+
+
+def test_journal_drops_torn_tail(tmp_path):
+    path = tmp_path / "state.json"
+    backend = JournalStateBackend(path)
+    backend.load()
+    backend.write({"0xaa::0xbb": RECORD})
+    with backend.journal_path.open("a") as journal:
+        journal.write('{"key":"0xaa::0xcc","base')
+    replayed = JournalStateBackend(path)
+    assert replayed.load() == {"0xaa::0xbb": RECORD}
+    assert replayed.journal_path.read_text().endswith("\n")
+    replayed.write({"0xaa::0xcc": OTHER})
+    assert JournalStateBackend(path).load() == {"0xaa::0xbb": RECORD, "0xaa::0xcc": OTHER}
+
+
+def test_journal_compacts_into_snapshot(tmp_path):
+    path = tmp_path / "state.json"
+    backend = JournalStateBackend(path, compact_records=3)
+    backend.load()
+    backend.write({"0xaa::0xbb": RECORD})
+    backend.write({"0xaa::0xcc": RECORD})
+    assert not path.exists()
+    backend.write({"0xaa::0xbb": OTHER})
+    assert backend.journal_path.read_text() == ""
+    assert json.loads(path.read_text()) == {"0xaa::0xbb": OTHER, "0xaa::0xcc": RECORD}
+    backend.write({"0xaa::0xdd": OTHER})
+    assert JournalStateBackend(path, compact_records=3).load() == {
+        "0xaa::0xbb": OTHER,
+        "0xaa::0xcc": RECORD,
+        "0xaa::0xdd": OTHER,
+    }
+
+
+def test_journal_compacts_long_journal_on_load(tmp_path):
+    path = tmp_path / "state.json"
+    writer = JournalStateBackend(path)
+    writer.load()
+    for block in range(5):
+        writer.write({"0xaa::0xbb": {**RECORD, "last_trigger": block}})
+    reader = JournalStateBackend(path, compact_records=5)
+    assert reader.load() == {"0xaa::0xbb": {**RECORD, "last_trigger": 4}}
+    assert reader.journal_path.read_text() == ""
+    assert json.loads(path.read_text()) == {"0xaa::0xbb": {**RECORD, "last_trigger": 4}}
+
+
+def test_sqlite_history_filters_by_block(tmp_path):
+    backend = open_state_backend(tmp_path / "state.db", "sqlite")
+    backend.write({}, [_row(block, 100 + block, should_swap=block == 2) for block in range(1, 5)])
+    rows = backend.history("0xAA", "0xBB", from_block=2, to_block=3)
+    assert [row.block for row in rows] == [2, 3]
+    assert rows[0] == replace(_row(2, 102, should_swap=True), token="0xaa", pool="0xbb")
+    backend.close()
+
+
+@pytest.mark.parametrize("previous", ["json", "journal"])
+def test_sqlite_imports_existing_json_state(tmp_path, previous):
+    path = tmp_path / "state.json"
+    old = open_state_backend(path, previous)
+    old.load()
+    old.write({"0xaa::0xbb": RECORD})
+    old.write({"0xaa::0xcc": OTHER})
+
+    backend = open_state_backend(path, "sqlite")
+    assert backend.load() == {"0xaa::0xbb": RECORD, "0xaa::0xcc": OTHER}
+    backend.write({"0xaa::0xbb": OTHER})
+    backend.close()
+    backup = "state.json.bak" if previous == "json" else "state.json.journal.bak"
+    assert path.with_name(backup).exists()
+    assert not path.with_name("state.json.journal").exists()
+
+    reopened = open_state_backend(path, "sqlite")
+    assert reopened.load() == {"0xaa::0xbb": OTHER, "0xaa::0xcc": OTHER}
+    reopened.close()
+
+
+def test_sqlite_rejects_unknown_state_file(tmp_path):
+    path = tmp_path / "state.db"
+    path.write_text("not state")
+    with pytest.raises(ValueError, match="neither a SQLite database nor a JSON state file"):
+        open_state_backend(path, "sqlite")
+    assert path.read_text() == "not state"
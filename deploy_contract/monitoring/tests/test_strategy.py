@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+import pytest
+from helpers import inventory, pool_by_type
+
+from deploy_contract.monitoring.batch_pricing import PriceResult
+from deploy_contract.monitoring.fixed_point import FixedPrice
+from deploy_contract.monitoring.metrics import MetricsRegistry
+from deploy_contract.monitoring.state_store import JournalStateBackend
+from deploy_contract.monitoring.strategy import StrategyEngine
+
+
+class FlakyBackend(JournalStateBackend):
+    def __init__(self, path):
+        super().__init__(path)
+        self.failures = 1
+
+    def write(self, changes, history=()):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        super().write(changes, history)
+
+
+def test_failed_flush_is_labelled_counted_and_retried(make_config, tmp_path, capsys):
+    config = replace(make_config(state_backend="journal"), chain_name="base")
+    backend = FlakyBackend(tmp_path / "state.json")
+    metrics = MetricsRegistry()
+    engine = StrategyEngine(config, backend, metrics=metrics)
+    token = config.tokens[0]
+    engine.evaluate(inventory(token, 10**21), token.pools[0], PriceResult(price=FixedPrice(3, 2), tick=None))
+
+    engine.flush()
+    assert metrics.errors.value(stage="state_flush") == 1
+    message = capsys.readouterr().out
+    assert message.startswith("[monitor:base] failed to persist strategy state to journal backend ")
+    assert str(tmp_path / "state.json") in message and "disk full" in message
+
+    engine.flush()
+    assert metrics.errors.value(stage="state_flush") == 1
+    assert len(JournalStateBackend(tmp_path / "state.json").load()) == 1
+
+
+@pytest.mark.parametrize(
+    "twaps, reason",
+    [
+        ({600: FixedPrice(2, 1)}, "twap windows unavailable"),
+        # The 1800s TWAP sits 2500 bps below spot.
+        ({600: FixedPrice(2, 1), 1_800: FixedPrice(3, 2)}, "twap windows disagree"),
+        # 199/100 is 50 bps below spot, inside the 100 bps budget.
+        ({600: FixedPrice(2, 1), 1_800: FixedPrice(199, 100)}, "price threshold met"),
+    ],
+)
+def test_twap_windows_gate_the_trigger(make_config, twaps, reason):
+    config = make_config({"max_twap_divergence_bps": 100})
+    token = config.tokens[0]
+    pool = replace(pool_by_type(token, "uniswap_v3"), twap_windows=[600, 1_800])
+    engine = StrategyEngine(config)
+    holdings = inventory(token, 10**21)
+    engine.evaluate(holdings, pool, PriceResult(price=FixedPrice(1, 1), tick=None), timestamp=1_000)
+
+    decision = engine.evaluate(
+        holdings, pool, PriceResult(price=FixedPrice(2, 1), tick=None, twaps=twaps), timestamp=2_000
+    )
+    assert decision.reason == reason
+    assert decision.should_swap is (reason == "price threshold met")
+    assert decision.price_change_bps == 10_000
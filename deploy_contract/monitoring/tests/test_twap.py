@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from deploy_contract.monitoring.twap import ObservationRing, TwapStore, tick_variance
+
+KEY = "0x22:tick"
+
+
+def test_ring_windows_use_the_newest_sample_old_enough():
+    ring = ObservationRing(resolution=10)
+    for timestamp, cumulative in [(0, 0), (60, 600), (120, 1800)]:
+        ring.append(timestamp, cumulative)
+    assert ring.window(60) == (1200, 60)
+    assert ring.window(61) == (1800, 120)
+    assert ring.window(121) is None
+    assert ring.points(60) == [(60, 600), (120, 1800)]
+    assert ring.points(1_000) == [(0, 0), (60, 600), (120, 1800)]
+    assert ring.span == 120
+
+
+def test_ring_keeps_resolution_and_the_newest_sample():
+    ring = ObservationRing(resolution=10)
+    for timestamp, cumulative in [(0, 0), (5, 50), (8, 80), (20, 200), (25, 250)]:
+        ring.append(timestamp, cumulative)
+    # 5 and 8 arrived within 10s of the sample before them and were replaced.
+    assert ring.samples() == [(0, 0), (20, 200), (25, 250)]
+    ring.append(25, 260)
+    ring.append(24, 0)
+    assert ring.latest == (25, 260) and len(ring) == 3
+
+
+def test_ring_trims_to_capacity():
+    ring = ObservationRing(capacity=2, resolution=0)
+    for timestamp in range(1, 5):
+        ring.append(timestamp, timestamp * 10)
+    assert ring.samples() == [(3, 30), (4, 40)]
+    assert ring.window(1) == (10, 1)
+
+
+def test_store_integrates_ticks_into_a_cumulative():
+    store = TwapStore()
+    store.record_tick(KEY, 100, 10)
+    store.record_tick(KEY, 160, 20)
+    store.record_tick(KEY, 220, -5)
+    # Each tick holds until the next read: 10 * 60 + 20 * 60.
+    assert store.window(KEY, 120) == (1800, 120)
+    assert store.window(KEY, 60) == (1200, 60)
+    store.record_tick(KEY, 280, 0)
+    assert store.window(KEY, 60) == (-300, 60)
+    assert store.covers(KEY, 180) and not store.covers(KEY, 181)
+
+
+def test_store_restarts_a_ring_after_a_gap():
+    store = TwapStore(max_gap_seconds=900)
+    store.record_tick(KEY, 0, 10)
+    store.record_tick(KEY, 900, 20)
+    assert store.window(KEY, 900) == (9_000, 900)
+    # 901s without a read: the stale tick is not integrated across the gap.
+    store.record_tick(KEY, 1_801, 30)
+    assert store.points(KEY, 10_000) == [(1_801, 0)]
+    assert store.window(KEY, 60) is None
+    store.record_tick(KEY, 1_861, 30)
+    assert store.window(KEY, 60) == (1_800, 60)
+
+
+def test_seeded_ring_continues_from_the_onchain_cumulative():
+    store = TwapStore()
+    store.seed_ticks(KEY, 10_000, [1_800, 600, 0], [1_000_000, 1_012_000, 1_018_000], 12)
+    assert store.window(KEY, 600) == (6_000, 600)
+    assert store.window(KEY, 1_800) == (18_000, 1_800)
+    store.record_tick(KEY, 10_060, 7)
+    assert store.points(KEY, 60) == [(10_000, 1_018_000), (10_060, 1_018_720)]
+
+
+def test_store_spills_and_restores(tmp_path):
+    path = tmp_path / "twap.json"
+    store = TwapStore(path, spill_seconds=3_600)
+    store.record_tick(KEY, 100, 10)
+    store.record_tick(KEY, 160, 20)
+    store.record_cumulative("0x21:price0", 160, 5 << 112)
+    store.flush(force=True)
+    store.record_tick(KEY, 220, 30)
+    # Throttled: the second flush inside spill_seconds does not write.
+    store.flush()
+    assert json.loads(path.read_text())[KEY] == {"tick": 20, "samples": [[100, 0], [160, 600]]}
+
+    restored = TwapStore(path)
+    assert restored.window(KEY, 60) == (600, 60)
+    assert restored.window("0x21:price0", 0) == (0, 0)
+    # The restored tick (20) keeps integrating over the next minute.
+    restored.record_tick(KEY, 220, 30)
+    assert restored.window(KEY, 60) == (1_200, 60)
+
+
+def test_failed_spill_is_retried(tmp_path, capsys):
+    path = tmp_path / "missing" / "twap.json"
+    store = TwapStore(path, spill_seconds=0)
+    store.record_tick(KEY, 100, 10)
+    store.flush()
+    assert "failed to spill TWAP history" in capsys.readouterr().out
+    path.parent.mkdir()
+    store.flush()
+    assert KEY in json.loads(path.read_text())
+
+
+def test_forget_drops_every_series_of_a_pool():
+    store = TwapStore()
+    store.record_tick("0x22:tick", 100, 1)
+    store.record_cumulative("0x22:price0", 100, 1)
+    store.record_cumulative("0x21:price0", 100, 1)
+    store.forget(["0x22"])
+    assert store.points("0x22:tick", 100) == [] and store.points("0x22:price0", 100) == []
+    assert store.points("0x21:price0", 100) == [(100, 1)]
+
+
+def test_tick_variance_is_time_weighted():
+    # Mean ticks 10 over 10s and 20 over 20s; overall mean 50/3.
+    assert tick_variance([(0, 0), (10, 100), (30, 500)]) == pytest.approx(200 / 9)
+    # A constant tick has no variance, however the intervals are cut.
+    assert tick_variance([(0, 0), (5, 35), (60, 420)]) == 0
+
+
+def test_tick_variance_needs_two_intervals():
+    assert tick_variance([(0, 0), (10, 100)]) is None
+    # Samples sharing a timestamp do not form an interval.
+    assert tick_variance([(0, 0), (10, 100), (10, 100)]) is None
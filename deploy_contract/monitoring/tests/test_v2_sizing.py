@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import pytest
+
+from deploy_contract.monitoring import v2_sizing
+from deploy_contract.monitoring.v2_sizing import (
+    get_amount_out,
+    max_input_for_impact,
+    price_impact_bps,
+    quote_candidates,
+    size_sell,
+)
+
+E18 = 10**18
+
+
+def test_get_amount_out_matches_uniswap_v2_pair_spec():
+    # UniswapV2Pair.spec "swap:token0": 1 in against 5/10 reserves.
+    assert get_amount_out(E18, 5 * E18, 10 * E18) == 1662497915624478906
+    assert get_amount_out(0, 5 * E18, 10 * E18) == 0
+    assert get_amount_out(E18, 5 * E18, 0) == 0
+
+
+def test_price_impact_ignores_fee():
+    reserve = 10**30
+    amount_in = 10**20
+    assert price_impact_bps(amount_in, get_amount_out(amount_in, reserve, reserve), reserve, reserve) <= 1
+    big = reserve // 10
+    impact = price_impact_bps(big, get_amount_out(big, reserve, reserve), reserve, reserve)
+    assert 900 <= impact <= 910
+
+
+@pytest.mark.parametrize("budget", [1, 50, 100, 1000])
+def test_max_input_for_impact_is_within_one_bp(budget):
+    reserve_in, reserve_out = 7 * 10**24, 3 * 10**12
+    amount = max_input_for_impact(reserve_in, budget)
+    impact = price_impact_bps(amount, get_amount_out(amount, reserve_in, reserve_out), reserve_in, reserve_out)
+    assert budget - 1 <= impact <= budget + 1
+
+
+def test_quote_candidates_are_exact():
+    amounts = [0, 1, 10**6, 10**18, 10**24, 3 * 10**25, 2**200]
+    quotes = quote_candidates(amounts, 7 * 10**24, 3 * 10**12, 25)
+    assert quotes.amounts_out == [get_amount_out(amount, 7 * 10**24, 3 * 10**12, 25) for amount in amounts]
+    assert quotes.impacts_bps[1:] == [
+        price_impact_bps(amount, out, 7 * 10**24, 3 * 10**12, 25)
+        for amount, out in zip(amounts[1:], quotes.amounts_out[1:])
+    ]
+
+
+@pytest.mark.parametrize("budget", [None, 0, 1, 10, 100, 500, 9_999])
+@pytest.mark.parametrize("reserves", [(10**24, 10**24), (7 * 10**24, 3 * 10**12), (10**6, 10**30)])
+def test_float_screen_matches_exact_search(monkeypatch, budget, reserves):
+    max_amount = 10**25
+    screened = size_sell(max_amount, *reserves, max_impact_bps=budget)
+    monkeypatch.setattr(v2_sizing, "np", None)
+    assert screened == size_sell(max_amount, *reserves, max_impact_bps=budget)
+    steps = [max_amount * step // 32 for step in range(1, 33)]
+    if budget is not None:
+        bound = min(max_amount, max_input_for_impact(reserves[0], budget))
+        steps.extend(bound * (10_000 - shave) // 10_000 for shave in (0, 1, 10, 100))
+    assert screened == quote_candidates(steps, *reserves).best(budget)
+
+
+@pytest.mark.parametrize("budget", [10, 100, 500])
+def test_size_sell_respects_budget(budget):
+    reserve_in, reserve_out = 10**24, 10**24
+    size = size_sell(10**24, reserve_in, reserve_out, max_impact_bps=budget)
+    assert size.impact_bps <= budget
+    assert size.amount_out == get_amount_out(size.amount_in, reserve_in, reserve_out)
+    larger = size.amount_in * 10_001 // 10_000
+    assert price_impact_bps(larger, get_amount_out(larger, reserve_in, reserve_out), reserve_in, reserve_out) >= (
+        budget - 1
+    )
+
+
+def test_size_sell_keeps_full_amount_when_within_budget():
+    size = size_sell(10**18, 10**24, 10**24, max_impact_bps=100)
+    assert size.amount_in == 10**18
+
+
+@pytest.mark.parametrize("reserves", [(0, 10**24), (10**24, 0)])
+def test_size_sell_drained_pair(reserves):
+    assert size_sell(10**18, *reserves, max_impact_bps=100) is None
+    assert size_sell(10**18, *reserves) is None
+
+
+def test_size_sell_zero_budget():
+    assert size_sell(10**18, 10**24, 10**24, max_impact_bps=0) is None
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from math import isqrt
+
+import pytest
+
+from deploy_contract.monitoring.fixed_point import (
+    MAX_SQRT_RATIO,
+    MAX_TICK,
+    MIN_SQRT_RATIO,
+    MIN_TICK,
+    get_sqrt_ratio_at_tick,
+)
+from deploy_contract.monitoring.v3_simulator import (
+    V3PoolState,
+    compute_swap_step,
+    get_amount0_delta,
+    get_amount1_delta,
+    get_next_sqrt_price_from_input,
+    get_tick_at_sqrt_ratio,
+    simulate_exact_input,
+)
+
+E18 = 10**18
+
+# Vectors below are from the Uniswap v3-core SqrtPriceMath and SwapMath specs.
+
+
+def encode_price_sqrt(reserve1: int, reserve0: int) -> int:
+    return isqrt((reserve1 << 192) // reserve0)
+
+
+def test_tick_math_bounds():
+    assert get_sqrt_ratio_at_tick(MIN_TICK) == MIN_SQRT_RATIO
+    assert get_sqrt_ratio_at_tick(MAX_TICK) == MAX_SQRT_RATIO
+    assert get_tick_at_sqrt_ratio(MIN_SQRT_RATIO) == MIN_TICK
+    assert get_tick_at_sqrt_ratio(MAX_SQRT_RATIO - 1) == MAX_TICK - 1
+    with pytest.raises(ValueError):
+        get_tick_at_sqrt_ratio(MAX_SQRT_RATIO)
+
+
+@pytest.mark.parametrize("tick", [-887271, -200_000, -1, 0, 1, 50, 200_000, 887271])
+def test_tick_at_sqrt_ratio_inverts(tick):
+    ratio = get_sqrt_ratio_at_tick(tick)
+    assert get_tick_at_sqrt_ratio(ratio) == tick
+    assert get_tick_at_sqrt_ratio(ratio - 1) == tick - 1
+
+
+def test_amount_deltas():
+    low, high = encode_price_sqrt(1, 1), encode_price_sqrt(121, 100)
+    assert get_amount0_delta(low, high, E18, True) == 90909090909090910
+    assert get_amount0_delta(low, high, E18, False) == 90909090909090909
+    assert get_amount1_delta(low, high, E18, True) == 100000000000000000
+    assert get_amount1_delta(low, high, E18, False) == 99999999999999999
+    assert get_amount0_delta(low, high, 0, True) == 0
+
+
+def test_next_sqrt_price_from_input():
+    price = encode_price_sqrt(1, 1)
+    assert get_next_sqrt_price_from_input(price, E18, E18 // 10, False) == 87150978765690771352898345369
+    assert get_next_sqrt_price_from_input(price, E18, E18 // 10, True) == 72025602285694852357767227579
+
+
+def test_swap_step_capped_at_target():
+    price, target = encode_price_sqrt(1, 1), encode_price_sqrt(101, 100)
+    sqrt_next, amount_in, amount_out, fee = compute_swap_step(price, target, 2 * E18, E18, 600)
+    assert sqrt_next == target
+    assert amount_in == 9975124224178055
+    assert fee == 5988667735148
+    assert amount_out == 9925619580021728
+
+
+def test_swap_step_fully_spent():
+    price, target = encode_price_sqrt(1, 1), encode_price_sqrt(1000, 100)
+    sqrt_next, amount_in, amount_out, fee = compute_swap_step(price, target, 2 * E18, E18, 600)
+    assert sqrt_next < target
+    assert amount_in == 999400000000000000
+    assert fee == 600000000000000
+    assert amount_out == 666399946655997866
+
+
+def _pool(liquidity_net=None, bitmap=None):
+    return V3PoolState(
+        sqrt_price_x96=encode_price_sqrt(1, 1),
+        tick=0,
+        liquidity=2 * E18,
+        fee=3000,
+        tick_spacing=60,
+        bitmap=bitmap if bitmap is not None else {-1: 0, 0: 0},
+        liquidity_net=liquidity_net or {},
+    )
+
+
+def test_simulation_within_one_word_matches_swap_step():
+    state = _pool()
+    simulation = simulate_exact_input(state, 10**15, zero_for_one=False)
+    # No initialized ticks: the single step targets the word boundary.
+    target = get_sqrt_ratio_at_tick(255 * 60)
+    expected = compute_swap_step(state.sqrt_price_x96, target, state.liquidity, 10**15, 3000)
+    assert simulation.complete and simulation.ticks_crossed == 0
+    assert simulation.sqrt_price_x96 == expected[0]
+    assert simulation.amount_out == expected[2]
+    assert simulation.tick == get_tick_at_sqrt_ratio(expected[0])
+
+
+def test_simulation_crosses_initialized_tick():
+    # Tick 60 is initialized in word 0 and adds liquidity when crossed upwards.
+    state = _pool(liquidity_net={60: E18}, bitmap={-1: 0, 0: 1 << 1})
+    to_tick = compute_swap_step(state.sqrt_price_x96, get_sqrt_ratio_at_tick(60), state.liquidity, 10**30, 3000)
+    amount = to_tick[1] + to_tick[3] + 10**15
+    simulation = simulate_exact_input(state, amount, zero_for_one=False)
+    assert simulation.complete
+    assert simulation.ticks_crossed == 1
+    assert simulation.liquidity == 3 * E18
+    assert simulation.tick >= 60
+    assert simulation.amount_out > to_tick[2]
+
+
+def test_simulation_stops_at_unloaded_word():
+    state = _pool(bitmap={0: 0})
+    simulation = simulate_exact_input(state, 10**30, zero_for_one=False)
+    assert not simulation.complete
+    assert 0 < simulation.amount_in_used < 10**30
+    assert simulation.tick == 255 * 60
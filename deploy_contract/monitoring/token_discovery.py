@@ -3,14 +3,15 @@ from __future__ import annotations
 import json
 import os
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 from web3 import Web3
 from web3.types import LogReceipt
 
 from .inventory import ERC20_ABI
+from .metadata_store import ChainMetadata
 from .pool_lookup import find_pools
 
 TRANSFER_TOPIC = '0x' + Web3.keccak(text="Transfer(address,address,uint256)").hex()
@@ -22,13 +23,24 @@ class DiscoveredToken:
     address: str
     symbol: Optional[str]
     decimals: Optional[int]
+    entry: Dict[str, Any] = field(default_factory=dict)
 
 
 def _normalise_topic_address(address: str) -> str:
     return "0x" + address.lower().replace("0x", "").rjust(64, "0")
 
 
-def _extract_token_metadata(w3: Web3, token_address: str) -> Tuple[Optional[str], Optional[int]]:
+def _extract_token_metadata(
+    w3: Web3,
+    token_address: str,
+    metadata: Optional[ChainMetadata] = None,
+) -> Tuple[Optional[str], Optional[int]]:
+    if metadata is not None:
+        cached_symbol = metadata.get_symbol(token_address)
+        cached_decimals = metadata.get_decimals(token_address)
+        if cached_symbol is not None and cached_decimals is not None:
+            return cached_symbol, cached_decimals
+
     contract = w3.eth.contract(address=Web3.to_checksum_address(token_address), abi=ERC20_ABI)
     symbol: Optional[str]
     decimals: Optional[int]
@@ -43,24 +55,24 @@ def _extract_token_metadata(w3: Web3, token_address: str) -> Tuple[Optional[str]
         decimals = int(decimals_value)
     except Exception:
         decimals = None
+    if metadata is not None:
+        metadata.set_token(token_address, decimals=decimals, symbol=symbol)
     return symbol, decimals
 
 
-def _append_token_entry(
-    config_data: dict,
+def _build_token_entry(
     address_value: str,
     symbol: Optional[str],
     decimals: Optional[int],
     default_threshold_bps: int,
-) -> None:
-    entry = {
+) -> Dict[str, Any]:
+    return {
         "address": address_value,
         "symbol": symbol,
         "decimals": decimals,
         "threshold_bps": default_threshold_bps,
         "pools": [],
     }
-    config_data.setdefault("tokens", []).append(entry)
 
 
 def _extract_env_name_from_placeholder(value: str) -> Optional[str]:
@@ -84,54 +96,9 @@ def _resolve_config_value(value: str) -> str:
     return value
 
 
-def discover_new_tokens(
-    config_path: str | Path,
-    *,
-    rpc_http: Optional[str] = None,
-    vault_address: Optional[str] = None,
-    from_block: int,
-    to_block: Optional[int] = None,
-    w3: Optional[Web3] = None,
-) -> List[DiscoveredToken]:
-    """Find new ERC-20 tokens transferred into the vault and append them to the config.
-
-    The search scans Transfer events with the vault address as the recipient. Newly
-    discovered tokens are added to the configuration file with placeholder pool data
-    so they can be inspected and configured later.
-    """
-
-    config_path = Path(config_path)
-    config_data = json.loads(config_path.read_text())
-
-    raw_rpc_http = rpc_http or config_data["rpc"]["http"]
-    raw_vault_address = vault_address or config_data["vault_address"]
-
-    rpc_http_value = (
-        _resolve_config_value(raw_rpc_http)
-        if isinstance(raw_rpc_http, str)
-        else raw_rpc_http
-    )
-    vault_address_value = (
-        _resolve_config_value(raw_vault_address)
-        if isinstance(raw_vault_address, str)
-        else raw_vault_address
-    )
-
-    local_w3 = w3 or Web3(Web3.HTTPProvider(rpc_http_value))
-    if to_block is None:
-        to_block = local_w3.eth.block_number
-
-    vault_topic = _normalise_topic_address(vault_address_value)
-    logs: Iterable[LogReceipt] = local_w3.eth.get_logs(
-        {
-            "fromBlock": from_block,
-            "toBlock": to_block,
-            "topics": [TRANSFER_TOPIC, None, vault_topic],
-        }
-    )
-
-    existing_addresses: set[str] = set()
-    existing_placeholders: set[str] = set()
+def _existing_config_addresses(config_data: dict) -> Tuple[Set[str], Set[str]]:
+    existing_addresses: Set[str] = set()
+    existing_placeholders: Set[str] = set()
 
     for token in config_data.get("tokens", []):
         address_value = token.get("address")
@@ -153,6 +120,38 @@ def discover_new_tokens(
             except ValueError:
                 continue
             existing_addresses.add(checksum.lower())
+    return existing_addresses, existing_placeholders
+
+
+def scan_new_tokens(
+    w3: Web3,
+    *,
+    vault_address: str,
+    from_block: int,
+    to_block: int,
+    known_addresses: Iterable[str],
+    default_threshold_bps: int = 1000,
+    known_placeholders: Iterable[str] = (),
+    metadata: Optional[ChainMetadata] = None,
+) -> List[DiscoveredToken]:
+    """Find new ERC-20 tokens transferred into the vault without touching the config file.
+
+    Each result carries the raw config ``entry`` (placeholders plus suggested
+    pools) so callers can add it to an in-memory registry and persist it later.
+    """
+
+    existing_addresses = {address.lower() for address in known_addresses}
+    existing_placeholders = set(known_placeholders)
+
+    vault_topic = _normalise_topic_address(vault_address)
+    logs: Iterable[LogReceipt] = w3.eth.get_logs(
+        {
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "topics": [TRANSFER_TOPIC, None, vault_topic],
+        }
+    )
+
     discovered_tokens: List[DiscoveredToken] = []
 
     for log in logs:
@@ -161,7 +160,7 @@ def discover_new_tokens(
         if checksum_lower in existing_addresses:
             continue
 
-        symbol, decimals = _extract_token_metadata(local_w3, token_address)
+        symbol, decimals = _extract_token_metadata(w3, token_address, metadata)
         env_name = _derive_env_name(token_address)
         placeholder = f"${env_name}"
 
@@ -169,20 +168,12 @@ def discover_new_tokens(
             continue
 
         os.environ.setdefault(env_name, token_address)
-        _append_token_entry(
-            config_data,
-            placeholder,
-            symbol,
-            decimals,
-            config_data["strategy"].get("default_threshold_bps", 1000),
-        )
-        token_entry = config_data.setdefault("tokens", [])[-1]
-        token_entry.setdefault("pools", [])
+        token_entry = _build_token_entry(placeholder, symbol, decimals, default_threshold_bps)
 
         existing_addresses.add(checksum_lower)
         existing_placeholders.add(placeholder)
         discovered_tokens.append(
-            DiscoveredToken(address=token_address, symbol=symbol, decimals=decimals)
+            DiscoveredToken(address=token_address, symbol=symbol, decimals=decimals, entry=token_entry)
         )
 
         print(
@@ -195,7 +186,8 @@ def discover_new_tokens(
             pool_matches = find_pools(
                 token_address=token_address,
                 token_env_var=env_name,
-                w3=local_w3,
+                w3=w3,
+                metadata=metadata,
             )
         except Exception as exc:  # pragma: no cover - network failure
             print(f"[monitor] pool lookup failed for {token_address}: {exc}")
@@ -226,7 +218,61 @@ def discover_new_tokens(
                 "Export this variable to enable automatic swaps."
             )
 
+    return discovered_tokens
+
+
+def discover_new_tokens(
+    config_path: str | Path,
+    *,
+    rpc_http: Optional[str] = None,
+    vault_address: Optional[str] = None,
+    from_block: int,
+    to_block: Optional[int] = None,
+    w3: Optional[Web3] = None,
+    metadata: Optional[ChainMetadata] = None,
+) -> List[DiscoveredToken]:
+    """Find new ERC-20 tokens transferred into the vault and append them to the config.
+
+    The search scans Transfer events with the vault address as the recipient. Newly
+    discovered tokens are added to the configuration file with placeholder pool data
+    so they can be inspected and configured later.
+    """
+
+    config_path = Path(config_path)
+    config_data = json.loads(config_path.read_text())
+
+    raw_rpc_http = rpc_http or config_data["rpc"]["http"]
+    raw_vault_address = vault_address or config_data["vault_address"]
+
+    rpc_http_value = (
+        _resolve_config_value(raw_rpc_http)
+        if isinstance(raw_rpc_http, str)
+        else raw_rpc_http
+    )
+    vault_address_value = (
+        _resolve_config_value(raw_vault_address)
+        if isinstance(raw_vault_address, str)
+        else raw_vault_address
+    )
+
+    local_w3 = w3 or Web3(Web3.HTTPProvider(rpc_http_value))
+    if to_block is None:
+        to_block = local_w3.eth.block_number
+
+    existing_addresses, existing_placeholders = _existing_config_addresses(config_data)
+    discovered_tokens = scan_new_tokens(
+        local_w3,
+        vault_address=vault_address_value,
+        from_block=from_block,
+        to_block=to_block,
+        known_addresses=existing_addresses,
+        known_placeholders=existing_placeholders,
+        default_threshold_bps=config_data["strategy"].get("default_threshold_bps", 1000),
+        metadata=metadata,
+    )
+
     if discovered_tokens:
+        config_data.setdefault("tokens", []).extend(token.entry for token in discovered_tokens)
         config_path.write_text(json.dumps(config_data, indent=2))
 
     return discovered_tokens
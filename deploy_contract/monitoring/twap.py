@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+UINT32 = 1 << 32
+UINT256 = 1 << 256
+
+Sample = Tuple[int, int]
+
+
+def tick_variance(points: Sequence[Sample]) -> Optional[float]:
+    """Time-weighted variance of the mean tick of consecutive intervals.
+
+    ``points`` are ``(timestamp, tick cumulative)`` pairs in time order, as
+    returned by ``observe`` or :meth:`ObservationRing.points`. Needs at least
+    two intervals; one tick is one basis point of price, so the square root
+    approximates realized volatility in bps over the sampling interval.
+    """
+    intervals = [
+        (later[0] - earlier[0], later[1] - earlier[1])
+        for earlier, later in zip(points, points[1:])
+        if later[0] > earlier[0]
+    ]
+    if len(intervals) < 2:
+        return None
+    elapsed = sum(seconds for seconds, _ in intervals)
+    mean = sum(delta for _, delta in intervals) / elapsed
+    return sum(seconds * (delta / seconds - mean) ** 2 for seconds, delta in intervals) / elapsed
+
+
+class ObservationRing:
+    """Bounded, time-ordered ``(timestamp, cumulative)`` samples for one pool.
+
+    The newest sample is always kept. Older samples are at least
+    ``resolution`` seconds apart: a sample arriving sooner than that after
+    the previous one replaces it, which is exact for cumulative values.
+    """
+
+    def __init__(self, capacity: int = 1024, resolution: int = 10) -> None:
+        self._capacity = max(2, capacity)
+        self._resolution = max(0, resolution)
+        self._timestamps: List[int] = []
+        self._cumulatives: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._timestamps)
+
+    @property
+    def latest(self) -> Optional[Sample]:
+        if not self._timestamps:
+            return None
+        return self._timestamps[-1], self._cumulatives[-1]
+
+    @property
+    def span(self) -> int:
+        if not self._timestamps:
+            return 0
+        return self._timestamps[-1] - self._timestamps[0]
+
+    def append(self, timestamp: int, cumulative: int) -> None:
+        timestamps = self._timestamps
+        if timestamps and timestamp <= timestamps[-1]:
+            if timestamp == timestamps[-1]:
+                self._cumulatives[-1] = cumulative
+            return
+        if len(timestamps) >= 2 and timestamps[-1] - timestamps[-2] < self._resolution:
+            timestamps[-1] = timestamp
+            self._cumulatives[-1] = cumulative
+            return
+        timestamps.append(timestamp)
+        self._cumulatives.append(cumulative)
+        if len(timestamps) >= 2 * self._capacity:
+            del timestamps[: -self._capacity]
+            del self._cumulatives[: -self._capacity]
+
+    def window(self, seconds: int) -> Optional[Sample]:
+        """``(cumulative delta, elapsed)`` from the newest sample at least ``seconds`` old."""
+        if not self._timestamps:
+            return None
+        now, latest = self._timestamps[-1], self._cumulatives[-1]
+        index = bisect_right(self._timestamps, now - seconds) - 1
+        if index < 0:
+            return None
+        return latest - self._cumulatives[index], now - self._timestamps[index]
+
+    def points(self, seconds: int) -> List[Sample]:
+        """Samples from the newest one at least ``seconds`` old up to now."""
+        if not self._timestamps:
+            return []
+        index = max(0, bisect_right(self._timestamps, self._timestamps[-1] - seconds) - 1)
+        return list(zip(self._timestamps[index:], self._cumulatives[index:]))
+
+    def clear(self) -> None:
+        self._timestamps.clear()
+        self._cumulatives.clear()
+
+    def samples(self) -> List[Sample]:
+        return list(zip(self._timestamps[-self._capacity :], self._cumulatives[-self._capacity :]))
+
+
+class TwapStore:
+    """Per-pool observation rings that turn the monitor's own reads into TWAPs.
+
+    V3 pools are fed the tick the monitor already reads, integrated locally
+    into a tick cumulative; a ring seeded from one ``observe`` call keeps the
+    pool's on-chain cumulative as its base. V2 pools are fed the
+    counterfactual ``priceXCumulativeLast`` at the read block, so their
+    windows are exact. Rings are keyed by ``<pool>:<series>``.
+
+    With a ``path`` the rings are spilled to JSON (atomic rename) at most
+    every ``spill_seconds`` and reloaded on start. A V3 ring whose newest
+    sample is older than ``max_gap_seconds`` is restarted rather than
+    integrating a stale tick across the gap.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        *,
+        capacity: int = 1024,
+        resolution: int = 10,
+        max_gap_seconds: int = 900,
+        spill_seconds: float = 60.0,
+    ) -> None:
+        self._path = Path(path) if path else None
+        self._capacity = capacity
+        self._resolution = resolution
+        self._max_gap = max_gap_seconds
+        self._spill_seconds = spill_seconds
+        self._rings: Dict[str, ObservationRing] = {}
+        self._ticks: Dict[str, int] = {}
+        self._dirty = False
+        self._last_spill = 0.0
+        self._lock = threading.Lock()
+        if self._path:
+            self._load(self._path)
+
+    def window(self, key: str, seconds: int) -> Optional[Sample]:
+        ring = self._rings.get(key)
+        return ring.window(seconds) if ring is not None else None
+
+    def points(self, key: str, seconds: int) -> List[Sample]:
+        ring = self._rings.get(key)
+        return ring.points(seconds) if ring is not None else []
+
+    def covers(self, key: str, seconds: int) -> bool:
+        ring = self._rings.get(key)
+        return ring is not None and ring.span >= seconds
+
+    def record_cumulative(self, key: str, timestamp: int, cumulative: int) -> None:
+        with self._lock:
+            self._ring(key).append(timestamp, cumulative)
+            self._dirty = True
+
+    def record_tick(self, key: str, timestamp: int, tick: int) -> None:
+        with self._lock:
+            ring = self._ring(key)
+            latest = ring.latest
+            previous_tick = self._ticks.get(key)
+            if latest is not None and previous_tick is not None and timestamp - latest[0] <= self._max_gap:
+                ring.append(timestamp, latest[1] + previous_tick * (timestamp - latest[0]))
+            elif latest is None or timestamp > latest[0]:
+                ring.clear()
+                ring.append(timestamp, 0)
+            self._ticks[key] = tick
+            self._dirty = True
+
+    def seed_ticks(
+        self,
+        key: str,
+        timestamp: int,
+        seconds_agos: Sequence[int],
+        tick_cumulatives: Sequence[int],
+        tick: int,
+    ) -> None:
+        """Replace ``key``'s ring with on-chain ``observe`` results at ``timestamp``."""
+        with self._lock:
+            ring = self._ring(key)
+            ring.clear()
+            for seconds_ago, cumulative in sorted(zip(seconds_agos, tick_cumulatives), reverse=True):
+                ring.append(timestamp - int(seconds_ago), int(cumulative))
+            self._ticks[key] = tick
+            self._dirty = True
+
+    def forget(self, pool_addresses: Iterable[str]) -> None:
+        prefixes = tuple(f"{address.lower()}:" for address in pool_addresses)
+        if not prefixes:
+            return
+        with self._lock:
+            for key in [key for key in self._rings if key.startswith(prefixes)]:
+                self._rings.pop(key, None)
+                self._ticks.pop(key, None)
+            self._dirty = True
+
+    def flush(self, *, force: bool = False) -> None:
+        if not self._path or not self._dirty:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_spill < self._spill_seconds:
+            return
+        with self._lock:
+            payload = json.dumps(
+                {
+                    key: {"tick": self._ticks.get(key), "samples": ring.samples()}
+                    for key, ring in self._rings.items()
+                }
+            )
+            self._dirty = False
+        self._last_spill = now
+        tmp_path = self._path.with_name(self._path.name + ".tmp")
+        try:
+            tmp_path.write_text(payload)
+            os.replace(tmp_path, self._path)
+        except Exception as exc:
+            self._dirty = True
+            print(f"[monitor] failed to spill TWAP history: {exc}")
+
+    def _ring(self, key: str) -> ObservationRing:
+        ring = self._rings.get(key)
+        if ring is None:
+            ring = self._rings[key] = ObservationRing(self._capacity, self._resolution)
+        return ring
+
+    def _load(self, path: Path) -> None:
+        if not path.exists():
+            return
+        try:
+            raw = json.loads(path.read_text())
+        except Exception:
+            return
+        for key, entry in raw.items():
+            ring = self._ring(key)
+            for timestamp, cumulative in entry.get("samples", []):
+                ring.append(int(timestamp), int(cumulative))
+            if entry.get("tick") is not None:
+                self._ticks[key] = int(entry["tick"])
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from .fixed_point import MAX_UINT256
+
+try:  # pragma: no cover - optional dependency
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None  # type: ignore
+
+BPS = 10_000
+
+# UniswapV2Library charges 0.30%; PancakeSwap V2 charges 0.25%.
+DEFAULT_FEE_BPS = 30
+
+
+def get_amount_out(amount_in: int, reserve_in: int, reserve_out: int, fee_bps: int = DEFAULT_FEE_BPS) -> int:
+    """``UniswapV2Library.getAmountOut`` with the fee expressed in bps."""
+    if amount_in <= 0 or reserve_in <= 0 or reserve_out <= 0:
+        return 0
+    amount_in_with_fee = amount_in * (BPS - fee_bps)
+    return amount_in_with_fee * reserve_out // (reserve_in * BPS + amount_in_with_fee)
+
+
+def price_impact_bps(
+    amount_in: int,
+    amount_out: int,
+    reserve_in: int,
+    reserve_out: int,
+    fee_bps: int = DEFAULT_FEE_BPS,
+) -> int:
+    """Shortfall of ``amount_out`` against the fee-adjusted mid price, rounded up.
+
+    The pool fee is not counted: a size with no impact scores 0 however
+    large the fee is.
+    """
+    if amount_in <= 0 or reserve_in <= 0 or reserve_out <= 0:
+        return 0
+    ideal = amount_in * (BPS - fee_bps) * reserve_out
+    shortfall = ideal - amount_out * reserve_in * BPS
+    return -(-shortfall * BPS // ideal)
+
+
+def max_input_for_impact(reserve_in: int, max_impact_bps: int, fee_bps: int = DEFAULT_FEE_BPS) -> int:
+    """Largest input whose constant-product impact stays within ``max_impact_bps``.
+
+    From ``impact = x / (reserve_in + x)`` with ``x`` the input after fee;
+    rounding of ``getAmountOut`` can add one bp on top.
+    """
+    if max_impact_bps <= 0:
+        return 0
+    if max_impact_bps >= BPS:
+        return MAX_UINT256
+    return max_impact_bps * reserve_in * BPS // ((BPS - fee_bps) * (BPS - max_impact_bps))
+
+
+@dataclass
+class SellSize:
+    amount_in: int
+    amount_out: int
+    impact_bps: int
+
+
+@dataclass
+class CandidateQuotes:
+    """Exact quotes for a set of candidate input sizes against one reserve pair."""
+
+    amounts_in: List[int]
+    amounts_out: List[int]
+    impacts_bps: List[int]
+
+    def best(self, max_impact_bps: Optional[int] = None) -> Optional[SellSize]:
+        """Largest candidate with a non-zero output within ``max_impact_bps`` (any when None)."""
+        best: Optional[SellSize] = None
+        for amount_in, amount_out, impact in zip(self.amounts_in, self.amounts_out, self.impacts_bps):
+            if amount_in <= 0 or amount_out <= 0 or (max_impact_bps is not None and impact > max_impact_bps):
+                continue
+            if best is None or amount_in > best.amount_in:
+                best = SellSize(amount_in=amount_in, amount_out=amount_out, impact_bps=impact)
+        return best
+
+
+def quote_candidates(
+    amounts_in: Sequence[int],
+    reserve_in: int,
+    reserve_out: int,
+    fee_bps: int = DEFAULT_FEE_BPS,
+) -> CandidateQuotes:
+    """Apply ``getAmountOut`` and :func:`price_impact_bps` to every candidate.
+
+    Plain Python integers, row by row: every output is exact (callers such
+    as split routing use them all) and uint256 products cannot overflow.
+    """
+    amounts = [int(amount) for amount in amounts_in]
+    if not amounts or reserve_in <= 0 or reserve_out <= 0:
+        return CandidateQuotes(amounts, [0] * len(amounts), [0] * len(amounts))
+    outs = [get_amount_out(amount, reserve_in, reserve_out, fee_bps) for amount in amounts]
+    impacts = [
+        price_impact_bps(amount, out, reserve_in, reserve_out, fee_bps)
+        for amount, out in zip(amounts, outs)
+    ]
+    return CandidateQuotes(amounts, outs, impacts)
+
+
+def _screen_candidates(
+    amounts_in: Sequence[int],
+    reserve_in: int,
+    fee_bps: int,
+    max_impact_bps: Optional[int],
+) -> List[int]:
+    """Distinct positive candidates that may fit ``max_impact_bps``, largest first.
+
+    With NumPy the impact is estimated in float64 as ``x / (reserve_in + x)``
+    (``x`` after fee). Flooring ``getAmountOut`` only adds impact, so a
+    candidate estimated above the budget cannot fit; the 1 bp margin covers
+    float error. Survivors are confirmed exactly by the caller.
+    """
+    ordered = sorted({int(amount) for amount in amounts_in if amount > 0}, reverse=True)
+    if max_impact_bps is None or np is None or not ordered:
+        return ordered
+    with_fee = np.array([float(amount) for amount in ordered], dtype=np.float64) * (BPS - fee_bps)
+    estimate = with_fee * BPS / (float(reserve_in) * BPS + with_fee)
+    return [amount for amount, keep in zip(ordered, (estimate <= max_impact_bps + 1).tolist()) if keep]
+
+
+def size_sell(
+    max_amount: int,
+    reserve_in: int,
+    reserve_out: int,
+    *,
+    fee_bps: int = DEFAULT_FEE_BPS,
+    max_impact_bps: Optional[int] = None,
+    candidates: int = 32,
+) -> Optional[SellSize]:
+    """Largest sell up to ``max_amount`` whose price impact fits ``max_impact_bps``.
+
+    Considers ``candidates`` evenly spaced sizes, plus the closed-form bound
+    from :func:`max_input_for_impact` and a few sizes just under it (to
+    absorb rounding). Sizes are screened in float64 and the survivors
+    confirmed with exact integer quotes, largest first. Returns None when
+    no positive size fits the budget or the pair is drained.
+    """
+    if max_amount <= 0 or reserve_in <= 0 or reserve_out <= 0:
+        return None
+    steps = max(1, candidates)
+    sizes: List[int] = [max_amount * step // steps for step in range(1, steps + 1)]
+    if max_impact_bps is not None:
+        bound = min(max_amount, max_input_for_impact(reserve_in, max_impact_bps, fee_bps))
+        sizes.extend(bound * (10_000 - shave) // 10_000 for shave in (0, 1, 10, 100))
+    for amount_in in _screen_candidates(sizes, reserve_in, fee_bps, max_impact_bps):
+        amount_out = get_amount_out(amount_in, reserve_in, reserve_out, fee_bps)
+        impact = price_impact_bps(amount_in, amount_out, reserve_in, reserve_out, fee_bps)
+        if amount_out > 0 and (max_impact_bps is None or impact <= max_impact_bps):
+            return SellSize(amount_in=amount_in, amount_out=amount_out, impact_bps=impact)
+    return None
@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Optional, Tuple
+
+from web3 import Web3
+from web3.types import BlockIdentifier
+
+from .config import PoolConfig
+from .fixed_point import (
+    MAX_SQRT_RATIO,
+    MAX_TICK,
+    MAX_UINT256,
+    MIN_SQRT_RATIO,
+    MIN_TICK,
+    Q96,
+    get_sqrt_ratio_at_tick,
+)
+from .multicall import MULTICALL3_ADDRESS, BatchReader, Multicall3Client, view_call
+
+FEE_PIPS = 1_000_000
+
+_TICKS_OUTPUTS = ["uint128", "int128", "uint256", "uint256", "int56", "uint160", "uint32", "bool"]
+_SLOT0_OUTPUTS = ["uint160", "int24", "uint16", "uint16", "uint16", "uint8", "bool"]
+
+
+def _div_rounding_up(numerator: int, denominator: int) -> int:
+    return -(-numerator // denominator)
+
+
+def get_amount0_delta(sqrt_a: int, sqrt_b: int, liquidity: int, round_up: bool) -> int:
+    """``SqrtPriceMath.getAmount0Delta`` for a non-negative liquidity."""
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    numerator1 = liquidity << 96
+    numerator2 = sqrt_b - sqrt_a
+    if round_up:
+        return _div_rounding_up(_div_rounding_up(numerator1 * numerator2, sqrt_b), sqrt_a)
+    return (numerator1 * numerator2 // sqrt_b) // sqrt_a
+
+
+def get_amount1_delta(sqrt_a: int, sqrt_b: int, liquidity: int, round_up: bool) -> int:
+    """``SqrtPriceMath.getAmount1Delta`` for a non-negative liquidity."""
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    if round_up:
+        return _div_rounding_up(liquidity * (sqrt_b - sqrt_a), Q96)
+    return liquidity * (sqrt_b - sqrt_a) // Q96
+
+
+def get_next_sqrt_price_from_input(sqrt_price: int, liquidity: int, amount_in: int, zero_for_one: bool) -> int:
+    """``SqrtPriceMath.getNextSqrtPriceFromInput``, including its overflow branches."""
+    if amount_in == 0:
+        return sqrt_price
+    if zero_for_one:
+        numerator1 = liquidity << 96
+        product = amount_in * sqrt_price
+        if product <= MAX_UINT256 and numerator1 + product <= MAX_UINT256:
+            return _div_rounding_up(numerator1 * sqrt_price, numerator1 + product)
+        return _div_rounding_up(numerator1, numerator1 // sqrt_price + amount_in)
+    return sqrt_price + (amount_in << 96) // liquidity
+
+
+def compute_swap_step(
+    sqrt_price: int,
+    sqrt_target: int,
+    liquidity: int,
+    amount_remaining: int,
+    fee_pips: int,
+) -> Tuple[int, int, int, int]:
+    """``SwapMath.computeSwapStep`` for exact input: ``(sqrt_next, amount_in, amount_out, fee)``."""
+    zero_for_one = sqrt_price >= sqrt_target
+    remaining_less_fee = amount_remaining * (FEE_PIPS - fee_pips) // FEE_PIPS
+    if zero_for_one:
+        amount_in = get_amount0_delta(sqrt_target, sqrt_price, liquidity, True)
+    else:
+        amount_in = get_amount1_delta(sqrt_price, sqrt_target, liquidity, True)
+    if remaining_less_fee >= amount_in:
+        sqrt_next = sqrt_target
+    else:
+        sqrt_next = get_next_sqrt_price_from_input(sqrt_price, liquidity, remaining_less_fee, zero_for_one)
+    reached = sqrt_next == sqrt_target
+    if zero_for_one:
+        if not reached:
+            amount_in = get_amount0_delta(sqrt_next, sqrt_price, liquidity, True)
+        amount_out = get_amount1_delta(sqrt_next, sqrt_price, liquidity, False)
+    else:
+        if not reached:
+            amount_in = get_amount1_delta(sqrt_price, sqrt_next, liquidity, True)
+        amount_out = get_amount0_delta(sqrt_price, sqrt_next, liquidity, False)
+    if reached:
+        fee_amount = _div_rounding_up(amount_in * fee_pips, FEE_PIPS - fee_pips)
+    else:
+        fee_amount = amount_remaining - amount_in
+    return sqrt_next, amount_in, amount_out, fee_amount
+
+
+def get_tick_at_sqrt_ratio(sqrt_price_x96: int) -> int:
+    """Greatest tick whose sqrt ratio is <= ``sqrt_price_x96`` (``TickMath.getTickAtSqrtRatio``)."""
+    if not MIN_SQRT_RATIO <= sqrt_price_x96 < MAX_SQRT_RATIO:
+        raise ValueError("sqrt price out of range")
+    low, high = MIN_TICK, MAX_TICK
+    while low < high:
+        middle = (low + high + 1) // 2
+        if get_sqrt_ratio_at_tick(middle) <= sqrt_price_x96:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+@dataclass
+class V3PoolState:
+    """Swap-relevant state of one V3 pool at one block.
+
+    ``bitmap`` holds the ``tickBitmap`` words that were loaded and
+    ``liquidity_net`` the ``ticks(t).liquidityNet`` of every initialized tick
+    inside them. A swap that needs a word outside the loaded range stops
+    there (see :attr:`SwapSimulation.complete`).
+    """
+
+    sqrt_price_x96: int
+    tick: int
+    liquidity: int
+    fee: int
+    tick_spacing: int
+    bitmap: Dict[int, int] = field(default_factory=dict)
+    liquidity_net: Dict[int, int] = field(default_factory=dict)
+
+    def next_initialized_tick(self, tick: int, lte: bool) -> Optional[Tuple[int, bool]]:
+        """``TickBitmap.nextInitializedTickWithinOneWord``; None when the word is not loaded."""
+        compressed = tick // self.tick_spacing
+        if lte:
+            word, bit = compressed >> 8, compressed % 256
+            if word not in self.bitmap:
+                return None
+            masked = self.bitmap[word] & ((1 << (bit + 1)) - 1)
+            if masked:
+                return (compressed - (bit - (masked.bit_length() - 1))) * self.tick_spacing, True
+            return (compressed - bit) * self.tick_spacing, False
+        word, bit = (compressed + 1) >> 8, (compressed + 1) % 256
+        if word not in self.bitmap:
+            return None
+        masked = self.bitmap[word] & ~((1 << bit) - 1) & MAX_UINT256
+        if masked:
+            lowest = (masked & -masked).bit_length() - 1
+            return (compressed + 1 + (lowest - bit)) * self.tick_spacing, True
+        return (compressed + 1 + (255 - bit)) * self.tick_spacing, False
+
+
+@dataclass
+class SwapSimulation:
+    """Result of an exact-input swap against a :class:`V3PoolState`.
+
+    ``complete`` is False when the swap ran past the loaded ticks (or hit
+    the price limit) before spending ``amount_in``; ``amount_out`` then
+    covers only ``amount_in_used`` and is a lower bound for the full size.
+    """
+
+    amount_in: int
+    amount_in_used: int
+    amount_out: int
+    sqrt_price_x96: int
+    tick: int
+    liquidity: int
+    ticks_crossed: int
+    complete: bool
+
+
+def simulate_exact_input(state: V3PoolState, amount_in: int, zero_for_one: bool) -> SwapSimulation:
+    """Replay ``UniswapV3Pool.swap`` for an exact input without a price limit."""
+    sqrt_limit = MIN_SQRT_RATIO + 1 if zero_for_one else MAX_SQRT_RATIO - 1
+    sqrt_price, tick, liquidity = state.sqrt_price_x96, state.tick, state.liquidity
+    remaining, amount_out, crossed = amount_in, 0, 0
+    while remaining > 0 and sqrt_price != sqrt_limit:
+        step = state.next_initialized_tick(tick, zero_for_one)
+        if step is None:
+            break
+        tick_next, initialized = step
+        tick_next = min(max(tick_next, MIN_TICK), MAX_TICK)
+        sqrt_next = get_sqrt_ratio_at_tick(tick_next)
+        if zero_for_one:
+            sqrt_target = max(sqrt_next, sqrt_limit)
+        else:
+            sqrt_target = min(sqrt_next, sqrt_limit)
+        sqrt_start = sqrt_price
+        sqrt_price, step_in, step_out, fee_amount = compute_swap_step(
+            sqrt_price, sqrt_target, liquidity, remaining, state.fee
+        )
+        remaining -= step_in + fee_amount
+        amount_out += step_out
+        if sqrt_price == sqrt_next:
+            if initialized:
+                net = state.liquidity_net.get(tick_next)
+                if net is None:
+                    tick = tick_next - 1 if zero_for_one else tick_next
+                    break
+                liquidity += -net if zero_for_one else net
+                crossed += 1
+            tick = tick_next - 1 if zero_for_one else tick_next
+        elif sqrt_price != sqrt_start:
+            tick = get_tick_at_sqrt_ratio(sqrt_price)
+    return SwapSimulation(
+        amount_in=amount_in,
+        amount_in_used=amount_in - remaining,
+        amount_out=amount_out,
+        sqrt_price_x96=sqrt_price,
+        tick=tick,
+        liquidity=liquidity,
+        ticks_crossed=crossed,
+        complete=remaining == 0,
+    )
+
+
+class V3StateLoader:
+    """Loads :class:`V3PoolState` through Multicall3, cached per pool and block.
+
+    One batch reads ``slot0``, ``liquidity`` and the ``tickBitmap`` words
+    within ``word_radius`` of the current tick (plus ``tickSpacing`` and
+    ``fee`` the first time a pool is seen); a second batch reads ``ticks()``
+    for every initialized tick in those words. Both are pinned to the block,
+    so the RPC call cache serves repeats as well.
+    """
+
+    def __init__(
+        self,
+        *,
+        multicall_address: Optional[str] = None,
+        word_radius: int = 2,
+        max_calls_per_batch: int = 500,
+    ) -> None:
+        self._multicall_address = multicall_address or MULTICALL3_ADDRESS
+        self._word_radius = max(0, word_radius)
+        self._max_calls = max_calls_per_batch
+        self._immutables: Dict[str, Tuple[int, int]] = {}
+        self._states: Dict[str, V3PoolState] = {}
+        self._block: Optional[BlockIdentifier] = None
+
+    def load(
+        self,
+        w3: Web3,
+        pool: PoolConfig,
+        block_identifier: BlockIdentifier = "latest",
+    ) -> V3PoolState:
+        if block_identifier != self._block or not isinstance(block_identifier, int):
+            self._states.clear()
+            self._block = block_identifier
+        address = pool.address.lower()
+        state = self._states.get(address)
+        if state is None:
+            state = self._states[address] = self._fetch(w3, pool, block_identifier)
+        return state
+
+    def _fetch(
+        self,
+        w3: Web3,
+        pool: PoolConfig,
+        block_identifier: BlockIdentifier,
+    ) -> V3PoolState:
+        address = pool.address.lower()
+        immutables = self._immutables.get(address)
+        batch = BatchReader()
+        if immutables is None:
+            batch.add("tickSpacing", view_call(address, "tickSpacing()", ["int24"]))
+            if pool.fee is None:
+                batch.add("fee", view_call(address, "fee()", ["uint24"]))
+        batch.add("slot0", view_call(address, "slot0()", _SLOT0_OUTPUTS))
+        batch.add("liquidity", view_call(address, "liquidity()", ["uint128"]))
+        self._execute(w3, batch, block_identifier)
+        if immutables is None:
+            spacing = self._value(batch, "tickSpacing")
+            fee = int(pool.fee) if pool.fee is not None else self._value(batch, "fee")
+            immutables = self._immutables[address] = (int(spacing), int(fee))
+        tick_spacing, fee = immutables
+        slot0 = batch.get("slot0")
+        if slot0 is None or not slot0.success:
+            raise ValueError(f"Failed to read slot0 for {pool.address}")
+        state = V3PoolState(
+            sqrt_price_x96=slot0.value(0),
+            tick=slot0.value(1),
+            liquidity=self._value(batch, "liquidity"),
+            fee=fee,
+            tick_spacing=tick_spacing,
+        )
+
+        center = (state.tick // tick_spacing) >> 8
+        words = range(center - self._word_radius, center + self._word_radius + 1)
+        batch = BatchReader()
+        for word in words:
+            batch.add(("word", word), view_call(address, "tickBitmap(int16)", ["uint256"], ["int16"], [word]))
+        self._execute(w3, batch, block_identifier)
+        for word in words:
+            state.bitmap[word] = self._value(batch, ("word", word))
+
+        initialized = [
+            ((word << 8) + bit) * tick_spacing
+            for word, bits in state.bitmap.items()
+            for bit in range(256)
+            if bits >> bit & 1
+        ]
+        if initialized:
+            batch = BatchReader()
+            for tick in initialized:
+                batch.add(("tick", tick), view_call(address, "ticks(int24)", _TICKS_OUTPUTS, ["int24"], [tick]))
+            self._execute(w3, batch, block_identifier)
+            for tick in initialized:
+                result = batch.get(("tick", tick))
+                if result is not None and result.success:
+                    state.liquidity_net[tick] = result.value(1)
+        return state
+
+    def _execute(self, w3: Web3, batch: BatchReader, block_identifier: BlockIdentifier) -> None:
+        client = Multicall3Client(w3, address=self._multicall_address, max_calls_per_batch=self._max_calls)
+        try:
+            batch.execute(client, block_identifier)
+        except Exception:
+            batch.execute_sequential(w3, block_identifier)
+
+    @staticmethod
+    def _value(batch: BatchReader, key: Hashable) -> int:
+        result = batch.get(key)
+        if result is None or not result.success:
+            raise ValueError(f"Failed to read {key} for V3 pool state")
+        return int(result.value())